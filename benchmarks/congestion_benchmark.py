@@ -0,0 +1,68 @@
+"""
+===============================================================================
+BITS BENCHMARK - Live Congestion Pipeline
+===============================================================================
+Sustained ping rate of the streaming congestion pipeline reading a synthetic
+ping CSV (parse, snap to zones and hotspots, merge into the rolling windows),
+on one core and with a process pool, plus the resulting hotspot levels.
+Run from the repository root:  python -m benchmarks.congestion_benchmark
+===============================================================================
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from bits import BaghdadGeographicalIntelligence, CongestionTracker
+
+
+def write_pings(path: str, pings: int, minutes: int, seed: int):
+    """Vehicles around zone centres, slowed to a crawl within a kilometre of the first two hotspots"""
+    rng = np.random.default_rng(seed)
+    cache = BaghdadGeographicalIntelligence.get_zone_cache()
+    zone = rng.integers(0, len(cache['names']), pings)
+    lats = cache['lats'][zone] + rng.normal(0, 0.01, pings)
+    lons = cache['lons'][zone] + rng.normal(0, 0.012, pings)
+    speeds = rng.gamma(4.0, 8.0, pings)
+    for spot in list(BaghdadGeographicalIntelligence.TRAFFIC_HOTSPOTS.values())[:2]:
+        near = np.hypot((lats - spot['lat']) * 111, (lons - spot['lon']) * 93) < 1.0
+        speeds[near] = rng.gamma(2.0, 3.0, near.sum())
+    start = time.time() - minutes * 60
+    pd.DataFrame({
+        'vehicle_id': rng.integers(0, 20_000, pings),
+        'timestamp': np.round(start + np.sort(rng.uniform(0, minutes * 60, pings)), 1),
+        'lat': np.round(lats, 6), 'lon': np.round(lons, 6), 'speed_kmh': np.round(speeds, 1),
+    }).to_csv(path, index=False)
+
+
+def run(pings: int, minutes: int, workers: List[int], seed: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "pings.csv")
+        write_pings(path, pings, minutes, seed)
+        print(f"{pings:,} pings over {minutes} minutes ({os.path.getsize(path) / 1e6:.1f} MB CSV)")
+        for count in workers:
+            tracker = CongestionTracker()
+            start = time.perf_counter()
+            read = tracker.consume(path, workers=count)
+            seconds = time.perf_counter() - start
+            label = "1 core" if count <= 1 else f"{count} workers"
+            print(f"{label:>10}: {read / seconds:>12,.0f} pings/s ({seconds:.2f} s, "
+                  f"{tracker.dropped:,} dropped)")
+    for name, spot in tracker.snapshot()['hotspots'].items():
+        print(f"  {name}: {spot['level']} ({spot['source']}, {spot['mean_speed_kmh']} km/h, "
+              f"{spot['pings_per_minute']} pings/min)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pings", type=int, default=2_000_000)
+    parser.add_argument("--minutes", type=int, default=5, help="time span of the synthetic pings")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4], help="pool sizes to compare (0: none)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.pings, args.minutes, args.workers, args.seed)
@@ -0,0 +1,60 @@
+"""
+===============================================================================
+BITS BENCHMARK - Dispatch Matching
+===============================================================================
+Time per matching round for drivers x orders spread over the zone area (or
+clustered around zone centroids), with total and mean pickup distance. For
+small batches it also compares greedy matching to the optimal assignment.
+Run from the repository root:  python -m benchmarks.dispatch_benchmark
+===============================================================================
+"""
+
+import argparse
+import time
+from typing import List
+
+import numpy as np
+
+from bits import BaghdadGeographicalIntelligence, DispatchMatcher
+
+
+def points(n: int, clustered: bool, rng: np.random.Generator):
+    cache = BaghdadGeographicalIntelligence.get_zone_cache()
+    lats, lons = cache['lats'][:-1], cache['lons'][:-1]
+    if clustered:
+        # Demand and drivers bunch around zone centres (about 1 km spread)
+        zone = rng.integers(0, len(lats), n)
+        return lats[zone] + rng.normal(0, 0.009, n), lons[zone] + rng.normal(0, 0.011, n)
+    return rng.uniform(lats.min(), lats.max(), n), rng.uniform(lons.min(), lons.max(), n)
+
+
+def run(sizes: List[int], repeat: int, clustered: bool, seed: int):
+    rng = np.random.default_rng(seed)
+    matcher = DispatchMatcher()
+    print(f"{'drivers x orders':>18} {'method':>8} {'median ms':>10} {'matched':>8} {'mean km':>8} {'total km':>10}")
+    for size in sizes:
+        drivers, orders = points(size, clustered, rng), points(size, clustered, rng)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = matcher.match(*drivers, *orders)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{f'{size:,} x {size:,}':>18} {result.attrs['method']:>8} {sorted(timings)[len(timings) // 2]:>10.1f} "
+              f"{len(result):>8,} {result['pickup_km'].mean():>8.3f} {result['pickup_km'].sum():>10.1f}")
+
+    size = 250
+    drivers, orders = points(size, clustered, rng), points(size, clustered, rng)
+    optimal = matcher.match(*drivers, *orders)
+    greedy = DispatchMatcher(optimal_max_pairs=0).match(*drivers, *orders)
+    print(f"{size} x {size}: optimal {optimal['pickup_km'].sum():.1f} km, greedy {greedy['pickup_km'].sum():.1f} km "
+          f"(+{(greedy['pickup_km'].sum() / optimal['pickup_km'].sum() - 1) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 300, 1_000, 5_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--clustered", action="store_true", help="points around zone centres instead of uniform")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat, args.clustered, args.seed)
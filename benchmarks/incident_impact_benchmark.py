@@ -0,0 +1,104 @@
+"""
+===============================================================================
+BITS BENCHMARK - Incident Impact Scoring
+===============================================================================
+Per-quote latency of scoring the incidents near a route corridor with the
+grid index of bits.spatial vs. a brute-force scan of every active incident,
+for straight zone-to-zone corridors and road paths of the synthetic grid.
+Run from the repository root:  python -m benchmarks.incident_impact_benchmark
+===============================================================================
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from bits import BaghdadGeographicalIntelligence, RoadGraph
+from bits.spatial import IncidentImpactIndex, project
+
+SEVERITIES = ["low", "medium", "high", "critical"]
+
+
+def synthetic_incidents(n: int, rng: random.Random) -> List[Dict]:
+    zones = list(BaghdadGeographicalIntelligence.ZONES.values())
+    incidents = []
+    for _ in range(n):
+        zone = rng.choice(zones)
+        incidents.append({"latitude": zone['lat'] + rng.uniform(-0.05, 0.05),
+                          "longitude": zone['lon'] + rng.uniform(-0.05, 0.05),
+                          "severity": rng.choice(SEVERITIES)})
+    return incidents
+
+
+def brute_force_impact(incidents: List[Dict], path: List, radius_km: float) -> float:
+    """Distance from every incident to every path segment"""
+    x, y = project([i['latitude'] for i in incidents], [i['longitude'] for i in incidents])
+    path = np.asarray(path, dtype=float).reshape(-1, 2)
+    px, py = project(path[:, 0], path[:, 1])
+    if len(px) == 1:
+        px, py = np.repeat(px, 2), np.repeat(py, 2)
+    distance = np.full(len(x), np.inf)
+    for ax, ay, bx, by in zip(px[:-1], py[:-1], px[1:], py[1:]):
+        vx, vy = bx - ax, by - ay
+        u = np.clip(((x - ax) * vx + (y - ay) * vy) / max(vx * vx + vy * vy, 1e-12), 0, 1)
+        distance = np.minimum(distance, np.hypot(x - (ax + u * vx), y - (ay + u * vy)))
+    weights = np.array([IncidentImpactIndex.SEVERITY_WEIGHTS[i['severity']] for i in incidents])
+    near = distance <= radius_km
+    return float(np.sum(weights[near] * (1 - distance[near] / radius_km)))
+
+
+def median_ms(timings: List[float]) -> float:
+    return sorted(timings)[len(timings) // 2] * 1000
+
+
+def run(sizes, quotes: int, brute_quotes: int, seed: int):
+    rng = random.Random(seed)
+    zones = [(z['lat'], z['lon']) for z in BaghdadGeographicalIntelligence.ZONES.values()]
+    straight = [[rng.choice(zones), rng.choice(zones)] for _ in range(quotes)]
+    graph = RoadGraph.synthetic_grid()
+    road = []
+    while len(road) < quotes:
+        route = graph.route(rng.choice(zones), rng.choice(zones), "distance")
+        if route is not None:
+            road.append(route['path'])
+    print(f"road paths: {sum(len(p) for p in road) / len(road):.0f} points on average")
+
+    radius = IncidentImpactIndex.CORRIDOR_KM
+    print(f"{'incidents':>10} {'build ms':>9} {'corridor':<9} {'index ms':>9} {'brute ms':>9} {'speedup':>8} "
+          f"{'in corridor':>12} {'max error':>10}")
+    for n in sizes:
+        incidents = synthetic_incidents(n, rng)
+        start = time.perf_counter()
+        index = IncidentImpactIndex(incidents)
+        build_ms = (time.perf_counter() - start) * 1000
+        for label, paths in (("straight", straight), ("road", road)):
+            index_timings, counts = [], []
+            for path in paths:
+                start = time.perf_counter()
+                impact = index.corridor_impact(path)
+                index_timings.append(time.perf_counter() - start)
+                counts.append(impact['count'])
+
+            # Brute force on a subset; the error comes from simplifying road paths (SIMPLIFY_KM)
+            brute_timings, error = [], 0.0
+            for path in paths[:brute_quotes]:
+                start = time.perf_counter()
+                expected = brute_force_impact(incidents, path, radius)
+                brute_timings.append(time.perf_counter() - start)
+                error = max(error, abs(index.corridor_impact(path)['score'] - expected) / max(expected, 1.0))
+            print(f"{n:>10,} {build_ms:>9.1f} {label:<9} {median_ms(index_timings):>9.3f} "
+                  f"{median_ms(brute_timings):>9.2f} {median_ms(brute_timings) / median_ms(index_timings):>7.0f}x "
+                  f"{sum(counts) / len(counts):>12.0f} {error:>9.2%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--quotes", type=int, default=200)
+    parser.add_argument("--brute-quotes", type=int, default=20, help="quotes re-scored by brute force")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.sizes, args.quotes, args.brute_quotes, args.seed)
@@ -0,0 +1,93 @@
+"""
+===============================================================================
+BITS BENCHMARK - Incident Ingestion
+===============================================================================
+Rows/sec for streaming incident ingest (insert, upsert, JSONL/CSV file) and bulk
+deactivation, compared with one add_incident call per row.
+Run from the repository root:  python -m benchmarks.incident_ingest_benchmark
+===============================================================================
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, Iterator
+
+from bits import BaghdadGeographicalIntelligence, TrafficDatabase
+
+FIELDS = ["external_id", "zone", "incident_type", "severity", "description",
+          "latitude", "longitude", "affected_road", "is_active"]
+
+
+def feed(n: int, seed: int, prefix: str = "feed") -> Iterator[Dict]:
+    """Synthetic traffic-police feed generated lazily"""
+    rng = random.Random(seed)
+    zones = list(BaghdadGeographicalIntelligence.ZONES.items())
+    for i in range(n):
+        zone, data = rng.choice(zones)
+        yield {
+            "external_id": f"{prefix}-{i}", "zone": zone,
+            "incident_type": rng.choice(["road_closure", "accident", "construction", "weather"]),
+            "severity": rng.choice(["low", "medium", "high", "critical"]),
+            "description": "تحديث من المرور", "affected_road": "طريق",
+            "latitude": data['lat'] + rng.uniform(-0.01, 0.01),
+            "longitude": data['lon'] + rng.uniform(-0.01, 0.01), "is_active": 1,
+        }
+
+
+def report(label: str, result: Dict[str, float]):
+    print(f"{label:<28} {result['rows']:>10,} rows {result['seconds']:>8.2f} s {result['rows_per_sec']:>12,.0f} rows/s")
+
+
+def run(n: int, chunk_size: int, single_rows: int, seed: int, trace_memory: bool):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = TrafficDatabase(os.path.join(tmp, "bench.db"))
+
+        start = time.perf_counter()
+        for record in feed(single_rows, seed, prefix="single"):
+            db.add_incident(record['zone'], record['incident_type'], record['severity'], record['description'],
+                            record['latitude'], record['longitude'], record['affected_road'])
+        seconds = time.perf_counter() - start
+        report("add_incident (per row)", {'rows': single_rows, 'seconds': seconds,
+                                          'rows_per_sec': single_rows / seconds})
+
+        report("bulk insert (iterable)", db.bulk_ingest_incidents(feed(n, seed), chunk_size))
+        report("bulk upsert (same ids)", db.bulk_ingest_incidents(feed(n, seed + 1), chunk_size))
+
+        jsonl_path = os.path.join(tmp, "feed.jsonl")
+        with open(jsonl_path, "w", encoding="utf-8") as f:
+            for record in feed(n, seed, prefix="jsonl"):
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        csv_path = os.path.join(tmp, "feed.csv")
+        with open(csv_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(feed(n, seed, prefix="csv"))
+
+        if trace_memory:
+            tracemalloc.start()
+        report("file ingest (JSONL)", db.ingest_incident_file(jsonl_path, chunk_size))
+        report("file ingest (CSV)", db.ingest_incident_file(csv_path, chunk_size))
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"peak traced memory during file ingest: {peak / 1024 / 1024:.1f} MB")
+
+        report("bulk deactivate", db.bulk_deactivate_incidents(f"feed-{i}" for i in range(n)))
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--single-rows", type=int, default=2000, help="rows for the add_incident baseline")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--trace-memory", action="store_true", help="report peak memory of the file ingest")
+    args = parser.parse_args()
+    run(args.rows, args.chunk_size, args.single_rows, args.seed, args.trace_memory)
@@ -0,0 +1,184 @@
+"""
+===============================================================================
+BITS BENCHMARK - Synthetic Day Load Generator
+===============================================================================
+Replays a seeded synthetic day of dispatcher traffic (quotes, incident adds
+and resolves, reverse-geocode lookups) against BitsAPI in-process, at a
+fixed rate or as fast as possible. Reports throughput, latency percentiles
+per operation and the database queries each operation cost. The same seed
+always produces the same workload (see the printed fingerprint).
+Run from the repository root:  python -m benchmarks.load_generator
+===============================================================================
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from bits import AutomationEngine, BaghdadGeographicalIntelligence, BitsAPI, Simulation
+
+# Relative demand per hour of the day (same shape as the predictions tab)
+DEMAND = [25, 18, 12, 8, 8, 12, 28, 55, 75, 85, 80, 72, 68, 62, 68, 78, 88, 95, 92, 82, 72, 62, 48, 32]
+MIX = [("quote", 0.70), ("reverse_geocode", 0.20), ("add_incident", 0.06), ("resolve_incident", 0.04)]
+SEVERITIES = ["low", "medium", "high", "critical"]
+INCIDENT_TYPES = ["accident", "road_closure", "construction", "weather"]
+
+Event = Tuple[float, str, Dict]
+
+
+def synthetic_day(simulation: Simulation, events: int) -> List[Event]:
+    """(seconds into the day, operation, arguments), in time order; draws only from the simulation"""
+    rng = simulation.stream("workload")
+    weather_rng = simulation.stream("weather")
+    zones = list(BaghdadGeographicalIntelligence.ZONES.items())
+    day_start = simulation.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    operations, weights = zip(*MIX)
+    schedule = []
+    for hour, demand in enumerate(DEMAND):
+        at = day_start.replace(hour=hour)
+        weather = AutomationEngine.simulate_weather(weather_rng)
+        is_peak = AutomationEngine.is_peak_hour(at.replace(minute=30))
+        conditions = {
+            "weather": weather, "weather_multiplier": AutomationEngine.get_weather_multiplier(weather),
+            "time_multiplier": AutomationEngine.PEAK_MULTIPLIER if is_peak else 1.0, "is_peak": is_peak,
+            "time_period": AutomationEngine.get_time_period(at),
+        }
+        for _ in range(round(events * demand / sum(DEMAND))):
+            operation = rng.choices(operations, weights)[0]
+            zone, data = rng.choice(zones)
+            if operation == "quote":
+                args = {"origin": zone, "destination": rng.choice(zones)[0], **conditions}
+            elif operation == "reverse_geocode":
+                args = {"lat": data['lat'] + rng.uniform(-0.02, 0.02), "lon": data['lon'] + rng.uniform(-0.02, 0.02)}
+            elif operation == "add_incident":
+                args = {"zone": zone, "incident_type": rng.choice(INCIDENT_TYPES), "severity": rng.choice(SEVERITIES),
+                        "description": "بلاغ محاكاة", "latitude": data['lat'] + rng.uniform(-0.01, 0.01),
+                        "longitude": data['lon'] + rng.uniform(-0.01, 0.01)}
+            else:
+                # Which of the incidents open at that moment to resolve, as a fraction of the list
+                args = {"pick": rng.random()}
+            schedule.append((hour * 3600 + rng.uniform(0, 3600), operation, args))
+    schedule.sort(key=lambda event: event[0])
+    return schedule
+
+
+def fingerprint(schedule: List[Event]) -> str:
+    return hashlib.sha1(json.dumps(schedule, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Replayer:
+    """Runs a schedule against one BitsAPI and records per-operation latency"""
+
+    def __init__(self, api: BitsAPI):
+        self.api = api
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def execute(self, operation: str, args: Dict):
+        if operation == "resolve_incident":
+            # The dispatcher picks from the incident list first; only the removal is timed
+            open_ids = sorted(i['id'] for i in self.api.get_active_incidents())
+            if not open_ids:
+                return
+            args = {"incident_id": open_ids[int(args['pick'] * len(open_ids))]}
+        start = time.perf_counter()
+        if operation == "quote":
+            self.api.quote(**args)
+        elif operation == "reverse_geocode":
+            self.api.reverse_geocode(**args)
+        elif operation == "add_incident":
+            self.api.add_incident(**args)
+        else:
+            self.api.remove_incident(**args)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latencies[operation].append(elapsed)
+
+
+def query_counts(api: BitsAPI) -> Dict[str, int]:
+    return {name: entry['count'] for name, entry in api.db.get_query_stats().items()}
+
+
+def run(events: int, rate: float, threads: int, seed: int, day: str, report_path: str):
+    simulation = Simulation(seed, datetime.fromisoformat(day))
+    schedule = synthetic_day(simulation, events)
+    print(f"workload: {len(schedule):,} events over one simulated day, seed {seed}, "
+          f"fingerprint {fingerprint(schedule)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        api = BitsAPI(db_path=os.path.join(tmp, "load.db"), simulation=simulation)
+        replayer = Replayer(api)
+        before = query_counts(api)
+        behind: List[float] = []
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for i, (offset, operation, args) in enumerate(schedule):
+                simulation.advance(offset - (schedule[i - 1][0] if i else 0))
+                if rate > 0:
+                    # Open loop: event i is due at i / rate seconds regardless of earlier latencies
+                    delay = start + i / rate - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        behind.append(-delay)
+                if threads > 1:
+                    pool.submit(replayer.execute, operation, args)
+                else:
+                    replayer.execute(operation, args)
+        seconds = time.perf_counter() - start
+        after = query_counts(api)
+        writer = api.db.get_pricing_writer()
+        writer.close()
+        pricing_rows = writer.stats()['written']
+        api.db.close()
+
+    latencies = replayer.latencies
+    total = sum(len(v) for v in latencies.values())
+    queries = {name: after[name] - before.get(name, 0) for name in after if after[name] - before.get(name, 0)}
+    print(f"{total:,} operations in {seconds:.2f} s -> {total / seconds:,.0f} ops/s "
+          f"({'unthrottled' if rate <= 0 else f'target {rate:,.0f} ops/s'}, {threads} thread(s)); "
+          f"{pricing_rows:,} pricing rows written")
+    if rate > 0:
+        print(f"behind schedule: {len(behind):,} events, worst {max(behind, default=0) * 1000:.1f} ms")
+    print(f"{'operation':<18} {'count':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'mean ms':>8}")
+    report = {"seed": seed, "events": total, "fingerprint": fingerprint(schedule), "seconds": seconds,
+              "ops_per_second": total / seconds, "operations": {}, "db_queries": queries}
+    for label, values in sorted(latencies.items()) + [("all", [x for v in latencies.values() for x in v])]:
+        stats = {"count": len(values), "p50_ms": percentile(values, 50) * 1000, "p95_ms": percentile(values, 95) * 1000,
+                 "p99_ms": percentile(values, 99) * 1000, "max_ms": max(values) * 1000,
+                 "mean_ms": statistics.mean(values) * 1000}
+        report["operations"][label] = stats
+        print(f"{label:<18} {stats['count']:>7,} {stats['p50_ms']:>8.3f} {stats['p95_ms']:>8.3f} "
+              f"{stats['p99_ms']:>8.3f} {stats['max_ms']:>8.2f} {stats['mean_ms']:>8.3f}")
+    print(f"database queries ({sum(queries.values()):,}, {sum(queries.values()) / total:.3f} per operation):")
+    for name, count in sorted(queries.items(), key=lambda item: -item[1]):
+        print(f"  {name:<36} {count:>7,}")
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20_000, help="events in the simulated day")
+    parser.add_argument("--rate", type=float, default=0, help="events per second (0: as fast as possible)")
+    parser.add_argument("--threads", type=int, default=1, help="concurrent callers (1 keeps runs repeatable)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--day", default="2024-03-04", help="simulated date (ISO)")
+    parser.add_argument("--json", dest="report_path", default=None, help="also write the report as JSON")
+    args = parser.parse_args()
+    run(args.events, args.rate, args.threads, args.seed, args.day, args.report_path)
@@ -0,0 +1,74 @@
+"""
+===============================================================================
+BITS BENCHMARK - Incident Overlay Scaling
+===============================================================================
+Server-side build time and payload size of the incident overlay as one
+folium Marker per incident vs. the clustered GeoJSON layer of bits.maps.
+Payload is the overlay script handed to the st_folium component (what the
+browser downloads and evaluates on every incident update).
+Run from the repository root:  python -m benchmarks.map_cluster_benchmark
+===============================================================================
+"""
+
+import argparse
+import random
+import time
+import warnings
+from typing import Dict, List, Tuple
+
+from bits import BaghdadGeographicalIntelligence
+from bits.maps import MapLayerCache
+
+SEVERITIES = ["low", "medium", "high", "critical"]
+
+
+def synthetic_incidents(n: int, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    zones = list(BaghdadGeographicalIntelligence.ZONES.items())
+    incidents = []
+    for i in range(n):
+        zone, data = rng.choice(zones)
+        incidents.append({
+            "id": i, "zone": zone, "severity": rng.choice(SEVERITIES), "description": "حادث مروري",
+            "latitude": data['lat'] + rng.uniform(-0.02, 0.02),
+            "longitude": data['lon'] + rng.uniform(-0.02, 0.02),
+        })
+    return incidents
+
+
+def overlay(incidents: List[Dict], cluster_threshold: int) -> Tuple[float, int]:
+    """(seconds, payload bytes) to build and serialize the overlay once"""
+    cache = MapLayerCache(cluster_threshold)
+    start = time.perf_counter()
+    script = cache.incident_overlay(0, lambda: incidents)
+    return time.perf_counter() - start, len(script.encode("utf-8"))
+
+
+def run(sizes, marker_limit: int, seed: int):
+    warnings.simplefilter("ignore")
+    print(f"{'incidents':>10} {'markers (s)':>12} {'markers MB':>11} {'cluster (s)':>12} {'cluster MB':>11} {'size ratio':>11}")
+    for n in sizes:
+        incidents = synthetic_incidents(n, seed)
+        cluster_seconds, cluster_bytes = overlay(incidents, cluster_threshold=0)
+
+        # Per-marker rendering is linear in n: time at most marker_limit incidents and extrapolate
+        sample = min(n, marker_limit)
+        marker_seconds, marker_bytes = overlay(incidents[:sample], cluster_threshold=None)
+        marker_seconds, marker_bytes = marker_seconds * n / sample, marker_bytes * n / sample
+
+        flag = "*" if sample < n else ""
+        print(f"{n:>10,} {marker_seconds:>11.3f}{flag or ' '} {marker_bytes / 1e6:>10.2f}{flag or ' '} "
+              f"{cluster_seconds:>12.3f} {cluster_bytes / 1e6:>11.2f} {marker_bytes / cluster_bytes:>10.1f}x")
+    print(f"* extrapolated from the first {marker_limit:,} incidents")
+    print(f"The map tab switches to the cluster layer above {MapLayerCache.CLUSTER_THRESHOLD} incidents "
+          f"(BITS_MAP_CLUSTER_THRESHOLD)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--marker-limit", type=int, default=10_000,
+                        help="max incidents to render as individual markers before extrapolating")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.sizes, args.marker_limit, args.seed)
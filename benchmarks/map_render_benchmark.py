@@ -0,0 +1,89 @@
+"""
+===============================================================================
+BITS BENCHMARK - Map Tab Render
+===============================================================================
+Per-rerun cost of the map tab: a fresh folium map through st_folium on every
+rerun vs. the cached base layer with the incident overlay from bits.maps.
+The st_folium component is stubbed, so times cover building and serializing
+the map (the server-side cost) and bytes are the payload sent to the browser.
+Run from the repository root:  python -m benchmarks.map_render_benchmark
+===============================================================================
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import warnings
+from typing import Callable, Dict, List, Tuple
+
+import streamlit_folium
+from streamlit_folium import st_folium
+
+from bits import BitsAPI, BaghdadGeographicalIntelligence
+from bits.maps import MapLayerCache, build_base_map, build_incident_layer
+
+sent: List[Dict] = []
+
+
+def capture_component(**args):
+    sent.append(args)
+
+
+def payload_bytes(args: Dict) -> int:
+    return len(json.dumps({k: v for k, v in args.items() if k != "on_change"}, default=str).encode("utf-8"))
+
+
+def legacy_render(api: BitsAPI):
+    """Map tab before the layer cache: everything rebuilt and re-serialized on every rerun"""
+    m = build_base_map(BaghdadGeographicalIntelligence.ZONES)
+    build_incident_layer(api.get_active_incidents()).add_to(m)
+    st_folium(m, width="100%", height=400)
+
+
+def measure(render: Callable[[], None], reruns: int) -> Tuple[float, int]:
+    """(median ms per rerun, bytes sent by the last rerun)"""
+    timings = []
+    for _ in range(reruns):
+        sent.clear()
+        start = time.perf_counter()
+        render()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2], payload_bytes(sent[-1])
+
+
+def run(incidents: int, reruns: int):
+    warnings.simplefilter("ignore")
+    streamlit_folium._component_func = capture_component  # the legacy path goes through st_folium
+    with tempfile.TemporaryDirectory() as tmp:
+        api = BitsAPI(db_path=os.path.join(tmp, "bench.db"))
+        zones = list(BaghdadGeographicalIntelligence.ZONES)
+        for i in range(incidents):
+            api.add_incident(zones[i % len(zones)], "accident", "high", f"حادث {i}")
+
+        cache = MapLayerCache(component=capture_component)
+        cached_render = lambda: cache.render(api.get_incident_version(), api.get_active_incidents)
+        cached_render()  # first render of the process populates the cache
+
+        def changed_render():
+            api.add_incident(zones[0], "accident", "critical", "حادث جديد")
+            cached_render()
+
+        print(f"{incidents} incidents, {reruns} reruns each (median)")
+        print(f"{'path':<34} {'ms/rerun':>10} {'bytes':>10}")
+        for label, render in (("fresh map every rerun", lambda: legacy_render(api)),
+                              ("cached layers (steady)", cached_render),
+                              ("cached layers (incident changed)", changed_render)):
+            ms, size = measure(render, reruns)
+            print(f"{label:<34} {ms:>10.3f} {size:>10,}")
+        api.db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--incidents", type=int, default=50)
+    parser.add_argument("--reruns", type=int, default=30)
+    args = parser.parse_args()
+    run(args.incidents, args.reruns)
@@ -0,0 +1,97 @@
+"""
+===============================================================================
+BITS BENCHMARK - Risk Tensor Predictions
+===============================================================================
+Training time of the zone x weekday x hour risk tensor over a synthetic
+history (full, then incremental after new rows arrive), load time of the
+saved model, and the latency of predictions for every zone at once.
+Run from the repository root:  python -m benchmarks.prediction_benchmark
+===============================================================================
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import List
+
+from bits import AIPredictiveAnalysis, BaghdadGeographicalIntelligence, RiskModel, TrafficDatabase
+
+SEVERITIES = ["low", "medium", "high", "critical"]
+
+
+def timestamps(n: int, days: int, rng: random.Random) -> List[str]:
+    now = time.time()
+    return [time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(now - rng.uniform(0, days * 86400))) for _ in range(n)]
+
+
+def add_history(db_path: str, incidents: int, quotes: int, days: int, rng: random.Random):
+    """Backdated incidents and pricing rows written straight to SQLite"""
+    zones = list(BaghdadGeographicalIntelligence.ZONES)
+    conn = sqlite3.connect(db_path)
+    conn.executemany("""
+        INSERT INTO active_road_incidents
+        (zone, incident_type, severity, description, latitude, longitude, created_at, is_active)
+        VALUES (?, 'accident', ?, '', 33.31, 44.36, ?, 0)
+    """, ((rng.choice(zones), rng.choice(SEVERITIES), at) for at in timestamps(incidents, days, rng)))
+    conn.executemany("""
+        INSERT INTO pricing_history
+        (origin_zone, destination_zone, base_price, final_price, route_type, distance_km, multiplier, created_at)
+        VALUES (?, ?, 3000, 4000, 'fastest', 5.0, ?, ?)
+    """, ((rng.choice(zones), rng.choice(zones), rng.choice([1.0, 1.2, 1.68]), at)
+          for at in timestamps(quotes, days, rng)))
+    conn.commit()
+    conn.close()
+
+
+def median_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)[len(timings) // 2]
+
+
+def run(incidents: int, quotes: int, days: int, repeat: int, seed: int):
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        db = TrafficDatabase(db_path)
+        add_history(db_path, incidents, quotes, days, rng)
+        print(f"history: {incidents:,} incidents, {quotes:,} quotes over {days} days")
+
+        model_path = os.path.join(tmp, "bench_risk.npz")
+        model = RiskModel(BaghdadGeographicalIntelligence.get_zone_cache()['names'], model_path)
+        start = time.perf_counter()
+        model.train(db)
+        model.save()
+        print(f"full training + save:        {(time.perf_counter() - start) * 1000:>9.1f} ms")
+
+        add_history(db_path, incidents // 100, quotes // 100, 1, rng)
+        start = time.perf_counter()
+        model.train(db)
+        model.save()
+        print(f"incremental (+1% rows):      {(time.perf_counter() - start) * 1000:>9.1f} ms")
+
+        print(f"load saved model:            {median_ms(lambda: RiskModel.load(model_path), repeat):>9.3f} ms "
+              f"({os.path.getsize(model_path) / 1024:.0f} KB)")
+        zones = model.zone_names
+        print(f"all {len(zones)} zones, one slice:      "
+              f"{median_ms(lambda: AIPredictiveAnalysis.get_all_predictions(model), repeat):>9.3f} ms")
+        print(f"all {len(zones)} zones, one at a time:  "
+              f"{median_ms(lambda: [AIPredictiveAnalysis.predict_traffic(z, model=model) for z in zones], repeat):>9.3f} ms")
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--incidents", type=int, default=100_000)
+    parser.add_argument("--quotes", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.incidents, args.quotes, args.days, args.repeat, args.seed)
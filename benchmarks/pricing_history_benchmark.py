@@ -0,0 +1,64 @@
+"""
+===============================================================================
+BITS BENCHMARK - Pricing History Logging
+===============================================================================
+Quotes/sec from calculate_route_pricing with pricing_history logging off and on.
+Run from the repository root:  python -m benchmarks.pricing_history_benchmark
+===============================================================================
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from bits import AutomationEngine, BaghdadGeographicalIntelligence, SmartRoutingSystem, TrafficDatabase
+
+
+def quote_loop(routing: SmartRoutingSystem, n: int, seed: int) -> float:
+    """Run n quotes over random zone pairs; returns elapsed seconds"""
+    rng = random.Random(seed)
+    zones = list(BaghdadGeographicalIntelligence.ZONES.keys())
+    pairs = [(rng.choice(zones), rng.choice(zones)) for _ in range(n)]
+    weathers = list(AutomationEngine.WEATHER_CONDITIONS.keys())
+    start = time.perf_counter()
+    for i, (origin, destination) in enumerate(pairs):
+        weather = weathers[i % len(weathers)]
+        routing.calculate_route_pricing(origin, destination, AutomationEngine.get_weather_multiplier(weather),
+                                        1.0, False, weather=weather, time_period="صباحاً")
+    return time.perf_counter() - start
+
+
+def run(n: int, seed: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        db = TrafficDatabase(db_path)
+
+        off_seconds = quote_loop(SmartRoutingSystem(db, record_history=False), n, seed)
+        on_seconds = quote_loop(SmartRoutingSystem(db, record_history=True), n, seed)
+
+        writer = db.get_pricing_writer()
+        start = time.perf_counter()
+        writer.close()
+        drain_seconds = time.perf_counter() - start
+        stats = writer.stats()
+        db.close()
+
+        with sqlite3.connect(db_path) as conn:
+            rows = conn.execute("SELECT COUNT(*) FROM pricing_history").fetchone()[0]
+
+    print(f"quotes: {n:,}")
+    print(f"logging off: {n / off_seconds:>12,.0f} quotes/s")
+    print(f"logging on:  {n / on_seconds:>12,.0f} quotes/s  ({on_seconds / off_seconds:.2f}x time)")
+    print(f"shutdown drain: {drain_seconds * 1000:.1f} ms")
+    print(f"writer: {stats}  rows in table: {rows:,}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quotes", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.quotes, args.seed)
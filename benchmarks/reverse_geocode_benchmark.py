@@ -0,0 +1,72 @@
+"""
+===============================================================================
+BITS BENCHMARK - Reverse Geocoding
+===============================================================================
+Per-point haversine loop vs. grid-indexed bulk_reverse_geocode.
+Run from the repository root:  python -m benchmarks.reverse_geocode_benchmark
+===============================================================================
+"""
+
+import argparse
+import time
+from typing import Tuple
+
+import numpy as np
+
+from bits import BaghdadGeographicalIntelligence as Geo
+
+
+def legacy_nearest_zone(lat: float, lon: float) -> Tuple[str, str]:
+    """Original linear scan of get_zone_by_coordinates"""
+    min_distance = float('inf')
+    nearest_zone = "غير معروف"
+    nearest_region = "غير معروف"
+    for zone_name, zone_data in Geo.ZONES.items():
+        distance = Geo.haversine_distance(lat, lon, zone_data['lat'], zone_data['lon'])
+        if distance < min_distance:
+            min_distance = distance
+            nearest_zone = zone_name
+            nearest_region = zone_data['region']
+    return nearest_zone, nearest_region
+
+
+def random_pings(n: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Uniform points over greater Baghdad (zone bounding box plus ~10 km)"""
+    rng = np.random.default_rng(seed)
+    return rng.uniform(33.13, 33.45, n), rng.uniform(44.22, 44.52, n)
+
+
+def run(sizes, loop_limit: int, seed: int):
+    Geo.get_spatial_index()  # build outside the timed region
+    print(f"{'points':>12} {'loop (s)':>12} {'bulk (s)':>10} {'speedup':>9} {'bulk pts/s':>14}  check")
+    for n in sizes:
+        lats, lons = random_pings(n, seed)
+
+        start = time.perf_counter()
+        result = Geo.bulk_reverse_geocode(lats, lons)
+        bulk_seconds = time.perf_counter() - start
+
+        # The loop is timed on at most loop_limit points and extrapolated linearly
+        sample = min(n, loop_limit)
+        start = time.perf_counter()
+        expected = [legacy_nearest_zone(lats[i], lons[i]) for i in range(sample)]
+        loop_seconds = (time.perf_counter() - start) * n / sample
+
+        zones = result['zone'].iloc[:sample].astype(str).tolist()
+        regions = result['region'].iloc[:sample].astype(str).tolist()
+        matches = sum(z == e[0] and r == e[1] for z, r, e in zip(zones, regions, expected))
+
+        loop_label = f"{loop_seconds:.3f}" + ("*" if sample < n else "")
+        print(f"{n:>12,} {loop_label:>12} {bulk_seconds:>10.3f} {loop_seconds / bulk_seconds:>8.1f}x "
+              f"{n / bulk_seconds:>14,.0f}  {matches}/{sample} match")
+    print("* extrapolated from the first loop-limit points")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 10_000_000])
+    parser.add_argument("--loop-limit", type=int, default=100_000,
+                        help="max points to run through the Python loop before extrapolating")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.sizes, args.loop_limit, args.seed)
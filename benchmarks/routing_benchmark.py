@@ -0,0 +1,96 @@
+"""
+===============================================================================
+BITS BENCHMARK - Road Graph Routing
+===============================================================================
+Query latency of RoadGraph.route (ALT on travel time, ALT on road length)
+between random points, with active incidents slowing nearby roads, checked
+against plain Dijkstra. Uses --graph if given, else a synthetic street grid.
+The rows with incidents are first searches for their version, the latency a
+quote sees right after incidents change; "again" rows are cache hits.
+Run from the repository root:  python -m benchmarks.routing_benchmark
+===============================================================================
+"""
+
+import argparse
+import math
+import random
+import time
+from typing import Dict, List
+
+from bits import BaghdadGeographicalIntelligence, RoadGraph
+
+SEVERITIES = ["low", "medium", "high", "critical"]
+
+
+def random_incidents(graph: RoadGraph, n: int, rng: random.Random) -> List[Dict]:
+    nodes = [rng.randrange(graph.node_count) for _ in range(n)]
+    return [{"latitude": float(graph.node_lat[i]), "longitude": float(graph.node_lon[i]),
+             "severity": rng.choice(SEVERITIES)} for i in nodes]
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def run(graph_path: str, spacing_km: float, queries: int, incidents: int, verify: int, seed: int):
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    graph = RoadGraph.load(graph_path) if graph_path else RoadGraph.synthetic_grid(spacing_km)
+    print(f"graph: {graph.node_count:,} nodes, {graph.arc_count:,} arcs, loaded in {time.perf_counter() - start:.2f} s")
+    for metric in ("time", "distance"):
+        start = time.perf_counter()
+        graph.landmarks(metric)
+        print(f"landmarks ({metric}): {graph.LANDMARKS} in {time.perf_counter() - start:.2f} s")
+
+    active = random_incidents(graph, incidents, rng)
+    points = [(float(graph.node_lat[i]), float(graph.node_lon[i]))
+              for i in (rng.randrange(graph.node_count) for _ in range(2 * queries))]
+    pairs = list(zip(points[::2], points[1::2]))
+    zones = [(z['lat'], z['lon']) for z in BaghdadGeographicalIntelligence.ZONES.values()]
+    zone_pairs = [(a, b) for a in zones for b in zones if a != b]
+
+    print(f"{'queries':<26} {'metric':<9} {'median ms':>10} {'p95 ms':>9} {'max ms':>9} {'mean km':>9}")
+    for label, query_pairs, incident_set, version in (
+            (f"{queries} random", pairs, None, None),
+            (f"{queries} random, {incidents} inc.", pairs, active, 1),
+            (f"{len(zone_pairs)} zone pairs, {incidents} inc.", zone_pairs, active, 1),
+            ("same zone pairs again", zone_pairs, active, 1)):
+        for metric in ("time", "distance"):
+            timings, lengths = [], []
+            for origin, destination in query_pairs:
+                start = time.perf_counter()
+                route = graph.route(origin, destination, metric, incident_set, version)
+                timings.append((time.perf_counter() - start) * 1000)
+                if route is not None:
+                    lengths.append(route['distance_km'])
+            print(f"{label:<26} {metric:<9} {percentile(timings, 0.5):>10.2f} {percentile(timings, 0.95):>9.2f} "
+                  f"{max(timings):>9.2f} {sum(lengths) / max(len(lengths), 1):>9.2f}")
+
+    # Optimality against a full Dijkstra on the same costs
+    minutes = graph.travel_minutes(active, version=1)
+    lengths = graph.arc_length.tolist()
+    mismatches, dijkstra_ms = 0, []
+    for origin, destination in pairs[:verify]:
+        source, target = graph.nearest_node(*origin), graph.nearest_node(*destination)
+        for metric, costs in (("time", minutes), ("distance", lengths)):
+            start = time.perf_counter()
+            expected = graph._dijkstra(graph._offsets, graph._targets, None, costs, source)[target]
+            dijkstra_ms.append((time.perf_counter() - start) * 1000)
+            route = graph.route(origin, destination, metric, active, version=1)
+            got = math.inf if route is None else route['time_minutes' if metric == "time" else 'distance_km']
+            mismatches += not (got == expected or abs(got - expected) <= 1e-9 * max(1.0, expected))
+    print(f"full Dijkstra: {percentile(dijkstra_ms, 0.5):.1f} ms median; "
+          f"{2 * min(verify, len(pairs)) - mismatches}/{2 * min(verify, len(pairs))} routes optimal")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--graph", default=None, help="road network (.osm XML or edge-list CSV)")
+    parser.add_argument("--spacing-km", type=float, default=0.1, help="synthetic grid spacing")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--incidents", type=int, default=200)
+    parser.add_argument("--verify", type=int, default=50, help="queries re-checked with a full Dijkstra")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.graph, args.spacing_km, args.queries, args.incidents, args.verify, args.seed)
@@ -0,0 +1,136 @@
+"""
+===============================================================================
+BITS BENCHMARK - Service Load Test
+===============================================================================
+Concurrent keep-alive clients against bits.service; reports requests/sec and
+p50/p99 latency overall and per endpoint.
+Run from the repository root:  python -m benchmarks.service_load_test
+(starts an in-process service on a temporary database unless --url is given)
+===============================================================================
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from bits import BaghdadGeographicalIntelligence, BitsAPI
+from bits.service import BitsService
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def request_mix(rng: random.Random) -> Tuple[str, str, str, Dict]:
+    """(label, method, path, body) drawn from a dispatcher-like workload"""
+    zones = list(BaghdadGeographicalIntelligence.ZONES.keys())
+    roll = rng.random()
+    if roll < 0.70:
+        return "quote", "POST", "/quote", {
+            "origin": rng.choice(zones), "destination": rng.choice(zones), "weather_multiplier": 1.2,
+            "time_multiplier": 1.4, "is_peak": True, "weather": "مطر خفيف", "time_period": "صباحاً",
+        }
+    if roll < 0.85:
+        return "reverse-geocode", "GET", "/reverse-geocode?" + urlencode(
+            {"lat": rng.uniform(33.22, 33.36), "lon": rng.uniform(44.32, 44.43)}), None
+    if roll < 0.95:
+        return "incidents", "GET", "/incidents", None
+    return "predictions", "GET", "/predictions", None
+
+
+async def client(host: str, port: int, n: int, seed: int, latencies: Dict[str, List[float]]):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(n):
+            label, method, path, body = request_mix(rng)
+            data = json.dumps(body).encode("utf-8") if body is not None else b""
+            head = f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(data)}\r\n\r\n"
+            start = time.perf_counter()
+            writer.write(head.encode("latin-1") + data)
+            await writer.drain()
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies[label].append(time.perf_counter() - start)
+            if b" 200 " not in status_line:
+                latencies["errors"].append(0.0)
+    finally:
+        writer.close()
+
+
+async def load(host: str, port: int, concurrency: int, requests: int, seed: int) -> Tuple[Dict, float]:
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    per_client = requests // concurrency
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, per_client, seed + i, latencies) for i in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+def start_local_service(db_path: str, workers: int) -> Tuple[BitsService, int]:
+    """Run the service on its own event loop thread; returns (service, port)"""
+    service = BitsService(BitsAPI(db_path=db_path), workers=workers)
+    ready = threading.Event()
+    port = []
+
+    def run_loop():
+        loop = asyncio.new_event_loop()
+        server = loop.run_until_complete(service.start("127.0.0.1", 0))
+        port.append(server.sockets[0].getsockname()[1])
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run_loop, name="bits-service", daemon=True).start()
+    ready.wait()
+    return service, port[0]
+
+
+def run(url: str, concurrency: int, requests: int, workers: int, seed: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        if url:
+            parts = urlsplit(url)
+            host, port = parts.hostname, parts.port or 80
+        else:
+            _, port = start_local_service(os.path.join(tmp, "load.db"), workers)
+            host = "127.0.0.1"
+
+        asyncio.run(load(host, port, min(concurrency, 8), min(requests, 400), seed))  # warm-up
+        latencies, seconds = asyncio.run(load(host, port, concurrency, requests, seed))
+
+    errors = len(latencies.pop("errors", []))
+    total = sum(len(v) for v in latencies.values())
+    everything = [x for v in latencies.values() for x in v]
+    print(f"concurrency {concurrency}, {total:,} requests in {seconds:.2f} s -> {total / seconds:,.0f} req/s, "
+          f"{errors} errors")
+    print(f"{'endpoint':<16} {'count':>8} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    for label, values in sorted(latencies.items()) + [("all", everything)]:
+        print(f"{label:<16} {len(values):>8,} {percentile(values, 50) * 1000:>8.2f} "
+              f"{percentile(values, 99) * 1000:>8.2f} {statistics.mean(values) * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="target an already running service instead of starting one")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=8, help="thread pool size of the in-process service")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.url, args.concurrency, args.requests, args.workers, args.seed)
@@ -0,0 +1,102 @@
+"""
+===============================================================================
+BITS BENCHMARK - Cold Start
+===============================================================================
+Time to first render of app.py (fresh process, fresh database) and the
+per-import cost of the modules it loads, from python -X importtime.
+Run from the repository root:  python -m benchmarks.startup_benchmark
+===============================================================================
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_RENDER_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+harness_loaded = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+first_render = time.perf_counter()
+at.run()
+rerun = time.perf_counter()
+at.sidebar.radio[0].set_value("map").run()
+map_tab = time.perf_counter()
+print(json.dumps({
+    "harness_s": harness_loaded - start,
+    "first_render_s": first_render - harness_loaded,
+    "rerun_s": rerun - first_render,
+    "first_map_tab_s": map_tab - rerun,
+    "exceptions": len(at.exception),
+}))
+"""
+
+
+def import_costs(statement: str) -> List[Tuple[str, int, int]]:
+    """(module, depth, cumulative_us) for every import triggered by statement"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    costs = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nested imports are indented by two extra spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        costs.append((name.strip(), depth, int(cumulative_us)))
+    return costs
+
+
+def first_render(runs: int) -> List[Dict]:
+    """Fresh interpreter and fresh database per run"""
+    results = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {**os.environ, "PYTHONPATH": REPO_ROOT}
+            env.pop("BITS_SERVICE_URL", None)
+            output = subprocess.run([sys.executable, "-c", FIRST_RENDER_SCRIPT, os.path.join(REPO_ROOT, "app.py")],
+                                    cwd=tmp, env=env, capture_output=True, text=True, check=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def run(runs: int, top: int):
+    print("Per-import cost of `import app` (modules app imports directly, cumulative):")
+    costs = import_costs("import app")
+    # importtime lists children before their parent: app's imports sit between the previous top-level entry and app
+    app_at = next(i for i, (name, depth, _) in enumerate(costs) if name == "app" and depth == 0)
+    first = max((i + 1 for i, (_, depth, _) in enumerate(costs[:app_at]) if depth == 0), default=0)
+    direct = sorted((c for c in costs[first:app_at] if c[1] == 1), key=lambda c: -c[2])
+    for name, _, cumulative_us in direct[:top]:
+        print(f"  {name:<32} {cumulative_us / 1000:>9.1f} ms")
+    print(f"  {'app (total)':<32} {costs[app_at][2] / 1000:>9.1f} ms")
+
+    deferred = {name: cumulative_us for name, depth, cumulative_us in import_costs("import folium, streamlit_folium")
+                if depth == 0 and name in ("folium", "streamlit_folium")}
+    print("Deferred until the map tab opens:")
+    for name, cumulative_us in deferred.items():
+        print(f"  {name:<32} {cumulative_us / 1000:>9.1f} ms")
+
+    print(f"Time to first render ({runs} cold runs, AppTest harness excluded):")
+    results = first_render(runs)
+    for key in ("first_render_s", "rerun_s", "first_map_tab_s"):
+        values = sorted(r[key] for r in results)
+        print(f"  {key:<32} {values[len(values) // 2] * 1000:>9.1f} ms (median)")
+    if any(r["exceptions"] for r in results):
+        print("  WARNING: the app raised exceptions during the run")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=12, help="number of imports to list")
+    args = parser.parse_args()
+    run(args.runs, args.top)
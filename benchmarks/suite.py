@@ -0,0 +1,274 @@
+"""
+===============================================================================
+BITS BENCHMARK - Core Engine Suite
+===============================================================================
+Micro benchmarks (one call, auto-ranged like timeit) and macro benchmarks
+(database at several table sizes, a replayed synthetic day) of the core
+engines. Results are written as JSON and compared with a stored baseline;
+any case slower than the baseline by more than its threshold is a
+regression and the exit status is 1. Runs offline on temporary databases.
+Baselines are machine-specific: record one with --save-baseline on the box
+that runs the comparisons.
+Run from the repository root:  python -m benchmarks.suite [--quick]
+===============================================================================
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from bits import (AIPredictiveAnalysis, BaghdadGeographicalIntelligence, BitsAPI, RiskModel, Simulation,
+                  SmartRoutingSystem, TrafficDatabase)
+
+from .load_generator import Replayer, synthetic_day
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+# Allowed slowdown vs. the baseline before a case counts as a regression
+DEFAULT_THRESHOLD = 0.25
+DB_THRESHOLD = 0.50
+
+SEVERITIES = ["low", "medium", "high", "critical"]
+
+
+def autorange(fn: Callable[[], object], min_time: float, repeat: int) -> float:
+    """Best seconds per call over `repeat` timed batches of at least min_time each"""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        if time.perf_counter() - start >= min_time / 10 or loops >= 1 << 20:
+            break
+        loops *= 10
+    loops = max(1, int(loops * min_time / max(time.perf_counter() - start, 1e-9)))
+    best = float("inf")
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            best = min(best, (time.perf_counter() - start) / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best
+
+
+def feed(n: int, rng: random.Random, prefix: str):
+    zones = list(BaghdadGeographicalIntelligence.ZONES.items())
+    for i in range(n):
+        zone, data = rng.choice(zones)
+        yield {"external_id": f"{prefix}-{i}", "zone": zone, "incident_type": "accident",
+               "severity": rng.choice(SEVERITIES), "description": "حادث", "affected_road": "طريق",
+               "latitude": data['lat'] + rng.uniform(-0.01, 0.01),
+               "longitude": data['lon'] + rng.uniform(-0.01, 0.01), "is_active": 1}
+
+
+class Suite:
+    """Collects {case name: {seconds, threshold, ...}}; lower seconds is better for every case"""
+
+    def __init__(self, tmp: str, quick: bool, only: str = None):
+        self.tmp = tmp
+        self.quick = quick
+        self.only = only
+        self.min_time = 0.05 if quick else 0.2
+        self.repeat = 3 if quick else 5
+        self.results: Dict[str, Dict] = {}
+
+    def wanted(self, name: str) -> bool:
+        return self.only is None or self.only in name
+
+    def record(self, name: str, seconds: float, threshold: float = DEFAULT_THRESHOLD, **extra):
+        self.results[name] = {"seconds": seconds, "threshold": threshold, **extra}
+        print(f"  {name:<48} {format_seconds(seconds):>12}", flush=True)
+
+    def micro(self, name: str, fn: Callable[[], object], threshold: float = DEFAULT_THRESHOLD):
+        if self.wanted(name):
+            self.record(name, autorange(fn, self.min_time, self.repeat), threshold)
+
+    # Cases
+
+    def geo(self):
+        geo = BaghdadGeographicalIntelligence
+        self.micro("geo.haversine_distance", lambda: geo.haversine_distance(33.3209, 44.3661, 33.3156, 44.4012))
+        self.micro("geo.get_zone_by_coordinates", lambda: geo.get_zone_by_coordinates(33.3012, 44.3789))
+        lats = np.random.default_rng(0).uniform(33.2, 33.4, 10_000)
+        lons = np.random.default_rng(1).uniform(44.3, 44.5, 10_000)
+        self.micro("geo.bulk_reverse_geocode[10k]", lambda: geo.bulk_reverse_geocode(lats, lons))
+
+    def routing(self):
+        db = TrafficDatabase(os.path.join(self.tmp, "routing.db"))
+        routing = SmartRoutingSystem(db, record_history=False)
+        zones = list(BaghdadGeographicalIntelligence.ZONES)
+        self.micro("routing.calculate_route_pricing",
+                   lambda: routing.calculate_route_pricing(zones[0], zones[5], 1.2, 1.4, True))
+        origins = np.repeat(zones, len(zones))
+        destinations = np.tile(zones, len(zones))
+        self.micro("routing.calculate_route_pricing_batch[484]",
+                   lambda: routing.calculate_route_pricing_batch(origins, destinations, 1.2, 1.4, True))
+        db.close()
+
+    def database(self):
+        sizes = [100, 1_000, 10_000] if self.quick else [100, 1_000, 10_000, 50_000]
+        rng = random.Random(42)
+        for size in sizes:
+            names = (f"db.get_active_incidents[{size}]", f"db.get_active_incidents_cached[{size}]")
+            if not any(self.wanted(name) for name in names):
+                continue
+            db = TrafficDatabase(os.path.join(self.tmp, f"incidents_{size}.db"))
+            db.bulk_ingest_incidents(feed(size - len(db.get_active_incidents()), rng, f"s{size}"))
+
+            def cold():
+                db.incident_cache.invalidate()
+                return db.get_active_incidents()
+
+            self.micro(names[0], cold, DB_THRESHOLD)
+            self.micro(names[1], db.get_active_incidents, DB_THRESHOLD)
+            db.close()
+
+        if self.wanted("db.add_incident"):
+            db = TrafficDatabase(os.path.join(self.tmp, "add.db"))
+            zones = list(BaghdadGeographicalIntelligence.ZONES.items())
+            n = 200 if self.quick else 1_000
+            start = time.perf_counter()
+            for i in range(n):
+                zone, data = zones[i % len(zones)]
+                db.add_incident(zone, "accident", "high", "حادث", data['lat'], data['lon'], "طريق")
+            seconds = (time.perf_counter() - start) / n
+            self.record("db.add_incident", seconds, DB_THRESHOLD, ops_per_second=1 / seconds)
+            db.close()
+
+    def prediction(self):
+        db = TrafficDatabase(os.path.join(self.tmp, "prediction.db"))
+        model = RiskModel.for_database(db).refresh(db)
+        now = datetime(2024, 3, 4, 8, 0)
+        self.micro("prediction.predict_traffic",
+                   lambda: AIPredictiveAnalysis.predict_traffic("المنصور", model=model, now=now))
+        self.micro("prediction.get_all_predictions",
+                   lambda: AIPredictiveAnalysis.get_all_predictions(model, now=now))
+        db.close()
+
+    def ui(self):
+        if not self.wanted("ui.generate_dynamic_css"):
+            return
+        sys.path.insert(0, os.path.dirname(BENCH_DIR))
+        from app import generate_dynamic_css
+        self.micro("ui.generate_dynamic_css", lambda: generate_dynamic_css("مطر خفيف", True, True))
+
+    def macro(self):
+        name = "macro.synthetic_day"
+        if not self.wanted(name):
+            return
+        events = 2_000 if self.quick else 10_000
+        simulation = Simulation(42, datetime(2024, 3, 4))
+        schedule = synthetic_day(simulation, events)
+        api = BitsAPI(db_path=os.path.join(self.tmp, "day.db"), simulation=simulation)
+        replayer = Replayer(api)
+        start = time.perf_counter()
+        for i, (offset, operation, args) in enumerate(schedule):
+            simulation.advance(offset - (schedule[i - 1][0] if i else 0))
+            replayer.execute(operation, args)
+        seconds = time.perf_counter() - start
+        api.db.get_pricing_writer().close()
+        api.db.close()
+        quotes = sorted(replayer.latencies["quote"])
+        self.record(name, seconds / len(schedule), DB_THRESHOLD, events=len(schedule),
+                    quote_p99=quotes[int(len(quotes) * 0.99)])
+
+    def run(self) -> Dict[str, Dict]:
+        for group in (self.geo, self.routing, self.database, self.prediction, self.ui, self.macro):
+            group()
+        return self.results
+
+
+def format_seconds(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
+
+
+def machine_info() -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=BENCH_DIR, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+            "system": platform.platform(), "cpus": os.cpu_count(), "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict]) -> List[Tuple[str, float, bool]]:
+    """(case, current / baseline, regressed) for every case present in both"""
+    rows = []
+    for name, current in results.items():
+        if name in baseline:
+            ratio = current['seconds'] / baseline[name]['seconds']
+            rows.append((name, ratio, ratio > 1 + current['threshold']))
+    return rows
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="smaller tables and shorter timings")
+    parser.add_argument("--only", default=None, help="run only cases whose name contains this")
+    parser.add_argument("--output", default=None, help="write the results as JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=None, help="override every case's allowed slowdown")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'case':<50} {'per call':>12}")
+        results = Suite(tmp, args.quick, args.only).run()
+    if args.threshold is not None:
+        for result in results.values():
+            result['threshold'] = args.threshold
+    report = {"machine": machine_info(), "quick": args.quick, "results": results}
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; record one with --save-baseline")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("quick") != args.quick:
+        print("note: baseline and this run differ in --quick; table sizes and timings are not comparable")
+    rows = compare(results, baseline['results'])
+    print(f"\nvs. baseline ({baseline['machine'].get('commit') or 'unknown commit'}, "
+          f"{baseline['machine'].get('timestamp', '?')})")
+    print(f"{'case':<50} {'ratio':>7} {'allowed':>8}")
+    for name, ratio, regressed in rows:
+        print(f"{name:<50} {ratio:>6.2f}x {1 + results[name]['threshold']:>7.2f}x"
+              f"{'  REGRESSION' if regressed else ''}")
+    regressions = [name for name, _, regressed in rows if regressed]
+    print(f"{len(regressions)} regression(s) in {len(rows)} compared case(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
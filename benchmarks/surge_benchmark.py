@@ -0,0 +1,71 @@
+"""
+===============================================================================
+BITS BENCHMARK - Surge Engine
+===============================================================================
+Event ingest rate of the per-zone sliding-window counters (one call per
+event, and batched), latency of a zone's multiplier read, and what surge adds
+to a quote.
+Run from the repository root:  python -m benchmarks.surge_benchmark
+===============================================================================
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from bits import SmartRoutingSystem, SurgeEngine, TrafficDatabase
+
+
+def run(events: int, minutes: int, seed: int):
+    rng = random.Random(seed)
+    # Simulated clock so the stream spans several window expiries
+    now = [time.time()]
+    engine = SurgeEngine(clock=lambda: now[0])
+    zones = engine.zone_names
+    stream = [(rng.choice(("order", "order", "driver")), rng.choice(zones)) for _ in range(events)]
+    step = minutes * 60 / events
+
+    start = time.perf_counter()
+    for kind, zone in stream:
+        now[0] += step
+        engine.record(kind, zone)
+    seconds = time.perf_counter() - start
+    print(f"record():          {events / seconds:>12,.0f} events/s ({seconds / events * 1e6:.2f} us/event, "
+          f"{minutes} simulated minutes)")
+
+    batch = [zone for _, zone in stream]
+    start = time.perf_counter()
+    engine.record_many("order", batch)
+    seconds = time.perf_counter() - start
+    print(f"record_many():     {events / seconds:>12,.0f} events/s")
+
+    reads = min(events, 200_000)
+    start = time.perf_counter()
+    for _, zone in stream[:reads]:
+        engine.multiplier(zone)
+    print(f"multiplier():      {(time.perf_counter() - start) / reads * 1e6:>12.2f} us/read")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = TrafficDatabase(os.path.join(tmp, "bench.db"))
+        quotes = [(rng.choice(zones), rng.choice(zones)) for _ in range(2_000)]
+        for label, surge in (("without surge", None), ("with surge", engine)):
+            routing = SmartRoutingSystem(db, record_history=False, surge=surge)
+            routing.calculate_route_pricing(zones[0], zones[1], 1.0, 1.0, False)
+            start = time.perf_counter()
+            for origin, destination in quotes:
+                routing.calculate_route_pricing(origin, destination, 1.2, 1.4, True)
+            print(f"quote {label + ':':<15} {(time.perf_counter() - start) / len(quotes) * 1e6:>8.1f} us")
+        db.close()
+    top = sorted(engine.snapshot()['zones'].items(), key=lambda item: -item[1]['multiplier'])[:3]
+    print("highest surge: " + ", ".join(f"{zone} {stats['multiplier']}x" for zone, stats in top))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=500_000)
+    parser.add_argument("--minutes", type=int, default=60, help="simulated span of the event stream")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.events, args.minutes, args.seed)
@@ -0,0 +1,134 @@
+"""
+===============================================================================
+BITS BENCHMARK - Zone Catalog
+===============================================================================
+Memory and access cost of the columnar zone catalog against the nested
+{name: {field: value}} dicts it replaces, for catalogs of synthetic sub-zones
+(the built-in zones split into neighbourhoods): retained memory per zone
+after loading, load time per file format, and per-zone and whole-column
+reads. Memory is measured with tracemalloc (NumPy buffers included).
+Run from the repository root:  python -m benchmarks.zone_catalog_benchmark
+===============================================================================
+"""
+
+import argparse
+import gc
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, List
+
+import numpy as np
+import pandas as pd
+
+from bits import BaghdadGeographicalIntelligence, ZoneCatalog
+
+
+def sub_zones(count: int, seed: int) -> pd.DataFrame:
+    """`count` neighbourhoods scattered around the built-in zones, inheriting their attributes"""
+    rng = np.random.default_rng(seed)
+    parents = list(BaghdadGeographicalIntelligence.ZONES.items())
+    rows = []
+    for i in range(count):
+        name, zone = parents[i % len(parents)]
+        rows.append({"name": f"{name} - حي {i // len(parents) + 1}", **zone,
+                     "lat": round(zone['lat'] + rng.normal(0, 0.01), 6),
+                     "lon": round(zone['lon'] + rng.normal(0, 0.012), 6),
+                     "base_price": int(zone['base_price'] + rng.integers(-5, 6) * 100)})
+    return pd.DataFrame(rows)
+
+
+def write_files(frame: pd.DataFrame, directory: str) -> dict:
+    paths = {fmt: os.path.join(directory, f"zones.{fmt}") for fmt in ("json", "csv", "geojson", "parquet")}
+    records = {row.pop("name"): row for row in frame.to_dict("records")}
+    with open(paths["json"], "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False)
+    frame.to_csv(paths["csv"], index=False)
+    features = [{"type": "Feature", "properties": {k: v for k, v in row.items() if k not in ("lat", "lon")} | {"name": name},
+                 "geometry": {"type": "Point", "coordinates": [row["lon"], row["lat"]]}}
+                for name, row in records.items()]
+    with open(paths["geojson"], "w", encoding="utf-8") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f, ensure_ascii=False)
+    try:
+        frame.to_parquet(paths["parquet"])
+    except ImportError:
+        del paths["parquet"]
+    return paths
+
+
+def retained_bytes(load: Callable[[], object]) -> int:
+    """Bytes still allocated once load() returns and its temporaries are freed"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = load()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def best_seconds(fn: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def load_json(path: str):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run(sizes: List[int], repeat: int, seed: int):
+    print(f"{'zones':>8} {'dict B/zone':>12} {'catalog B/zone':>15} {'ratio':>6} "
+          f"{'names+index B/zone':>19} {'attrs ratio':>12}")
+    timing_rows = []
+    for count in sizes:
+        frame = sub_zones(count, seed)
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = write_files(frame, tmp)
+            dict_bytes = retained_bytes(lambda: load_json(paths["json"]))
+            catalog_bytes = retained_bytes(lambda: ZoneCatalog.load(paths["csv"]))
+            # Name strings and the name -> row index exist in both layouts; the rest is per-zone attributes
+            names = retained_bytes(lambda: (lambda n: (n, {k: i for i, k in enumerate(n)}))(frame["name"].tolist()))
+            print(f"{count:>8,} {dict_bytes / count:>12,.0f} {catalog_bytes / count:>15,.0f} "
+                  f"{dict_bytes / catalog_bytes:>5.1f}x {names / count:>19,.0f} "
+                  f"{(dict_bytes - names) / max(catalog_bytes - names, 1):>11.1f}x")
+
+            loads = {"json dicts": lambda: load_json(paths["json"])}
+            loads.update({f"{fmt} catalog": (lambda p=path: ZoneCatalog.load(p)) for fmt, path in paths.items()})
+            records, catalog = load_json(paths["json"]), ZoneCatalog.load(paths["csv"])
+            names_list = list(records)
+            probe = [names_list[i] for i in np.random.default_rng(seed).integers(0, count, 10_000)]
+            reads = {
+                "zone[...]['base_price'] dict": lambda: [records[n]['base_price'] for n in probe],
+                "zone[...]['base_price'] catalog": lambda: [catalog[n]['base_price'] for n in probe],
+                "all base prices dict": lambda: np.array([z['base_price'] for z in records.values()]),
+                "all base prices catalog": lambda: catalog.column('base_price'),
+            }
+            timing_rows.append((count, {label: best_seconds(fn, repeat) for label, fn in loads.items()},
+                                {label: best_seconds(fn, repeat) for label, fn in reads.items()}))
+
+    for count, loads, reads in timing_rows:
+        print(f"\n{count:,} zones")
+        for label, seconds in loads.items():
+            print(f"  load {label:<34} {seconds * 1000:>9.2f} ms")
+        for label, seconds in reads.items():
+            per = seconds / (10_000 if "zone[" in label else 1)
+            unit = "per read" if "zone[" in label else "per call"
+            print(f"  {label:<39} {per * 1e6:>9.2f} µs {unit}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat, args.seed)
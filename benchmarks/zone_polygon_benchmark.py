@@ -0,0 +1,139 @@
+"""
+===============================================================================
+BITS BENCHMARK - Zone Polygons
+===============================================================================
+Reverse geocoding by zone polygon (STR tree + vectorized point-in-polygon)
+against the nearest-centroid grid lookup: throughput, and accuracy against
+ground-truth boundaries. Without --geojson the boundaries are synthetic: the
+Voronoi cells of the zone centroids moved by about --shift-km (real borders
+are not centroid bisectors, and zones sharing a centroid get separate cells),
+with a vertex every 50 m.
+Run from the repository root:  python -m benchmarks.zone_polygon_benchmark
+===============================================================================
+"""
+
+import argparse
+import json
+import math
+import os
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+from bits import BaghdadGeographicalIntelligence as Geo
+from bits.spatial import project
+
+MARGIN_KM = 3.0
+VERTEX_KM = 0.05
+
+
+def unproject(x: np.ndarray, y: np.ndarray):
+    """Inverse of spatial.project: (lats, lons)"""
+    center_lat, center_lon = Geo.BAGHDAD_CENTER
+    return y / 111.32 + center_lat, x / (111.32 * math.cos(math.radians(center_lat))) + center_lon
+
+
+def clip(polygon: np.ndarray, normal: np.ndarray, offset: float) -> np.ndarray:
+    """Part of a convex polygon where normal . p <= offset"""
+    side = polygon @ normal - offset
+    result = []
+    for i in range(len(polygon)):
+        j = (i + 1) % len(polygon)
+        if side[i] <= 0:
+            result.append(polygon[i])
+        if (side[i] <= 0) != (side[j] <= 0):
+            t = side[i] / (side[i] - side[j])
+            result.append(polygon[i] + t * (polygon[j] - polygon[i]))
+    return np.array(result)
+
+
+def write_voronoi_zones(path: str, shift_km: float, seed: int):
+    """GeoJSON of the Voronoi cells of the shifted zone centroids; returns the seeds (km)"""
+    rng = np.random.default_rng(seed)
+    cache = Geo.get_zone_cache()
+    x, y = project(cache['lats'][:-1], cache['lons'][:-1])
+    seeds = np.column_stack([x, y]) + rng.normal(0, shift_km, (len(x), 2))
+    x0, y0 = seeds.min(axis=0) - MARGIN_KM
+    x1, y1 = seeds.max(axis=0) + MARGIN_KM
+    features = []
+    for i, name in enumerate(cache['names']):
+        cell = np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]])
+        for j in range(len(seeds)):
+            if j != i:
+                normal = seeds[j] - seeds[i]
+                cell = clip(cell, normal, normal @ (seeds[i] + seeds[j]) / 2)
+        ring = np.vstack([cell, cell[:1]])
+        # Densify: real boundaries carry hundreds of vertices
+        points = [ring[0]]
+        for a, b in zip(ring[:-1], ring[1:]):
+            steps = max(1, int(np.hypot(*(b - a)) / VERTEX_KM))
+            points.extend(a + (b - a) * t for t in np.arange(1, steps + 1) / steps)
+        points = np.array(points)
+        lats, lons = unproject(points[:, 0], points[:, 1])
+        features.append({"type": "Feature", "properties": {"name": name},
+                         "geometry": {"type": "Polygon", "coordinates": [np.column_stack([lons, lats]).tolist()]}})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f, ensure_ascii=False)
+    return seeds, (x0, y0, x1, y1)
+
+
+def run(sizes: List[int], geojson: str, shift_km: float, repeat: int, seed: int):
+    rng = np.random.default_rng(seed)
+    names = Geo.get_zone_cache()['names']
+    with tempfile.TemporaryDirectory() as tmp:
+        seeds = None
+        if geojson is None:
+            geojson = os.path.join(tmp, "zones.geojson")
+            seeds, box = write_voronoi_zones(geojson, shift_km, seed)
+        Geo.load_zone_polygons(geojson)
+        polygons = Geo._zone_polygons
+        edges = len(polygons.edges)
+        print(f"{len(polygons)} zone polygons, {edges:,} edges (band copies), "
+              f"{len(polygons.levels)} tree level(s)")
+        if seeds is None:
+            bounds = polygons.part_bounds
+            box = (*project(bounds[:, 1].min(), bounds[:, 0].min()), *project(bounds[:, 3].max(), bounds[:, 2].max()))
+
+        print(f"{'points':>12} {'centroid pts/s':>15} {'polygon pts/s':>15} {'centroid ok':>12} {'polygon ok':>11}")
+        for n in sizes:
+            x = rng.uniform(box[0], box[2], n)
+            y = rng.uniform(box[1], box[3], n)
+            lats, lons = unproject(x, y)
+            results = {}
+            for method in ("centroid", "polygon"):
+                if method == "centroid":
+                    Geo.clear_zone_polygons()
+                else:
+                    Geo.load_zone_polygons(geojson)
+                Geo.bulk_reverse_geocode(lats[:1000], lons[:1000])
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    zones = Geo.bulk_reverse_geocode(lats, lons)['zone']
+                    timings.append(time.perf_counter() - start)
+                results[method] = (n / min(timings), zones.cat.codes.to_numpy())
+            if seeds is not None:
+                # Ground truth: the nearest shifted seed, i.e. the Voronoi cell
+                truth = np.argmin((x[:, None] - seeds[:, 0]) ** 2 + (y[:, None] - seeds[:, 1]) ** 2, axis=1)
+            else:
+                truth = results["polygon"][1]
+            accuracy = {method: np.mean(codes == truth) for method, (_, codes) in results.items()}
+            print(f"{n:>12,} {results['centroid'][0]:>15,.0f} {results['polygon'][0]:>15,.0f} "
+                  f"{accuracy['centroid']:>11.1%} {accuracy['polygon']:>10.1%}")
+        never = [names[i] for i in range(len(names)) if not np.any(results['centroid'][1] == i)]
+        if never:
+            print("never returned by the centroid lookup: " + ", ".join(never))
+        Geo.clear_zone_polygons()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--geojson", default=None, help="real zone boundaries (accuracy is then agreement)")
+    parser.add_argument("--shift-km", type=float, default=0.6, help="centroid displacement of the synthetic borders")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.sizes, args.geojson, args.shift_km, args.repeat, args.seed)
@@ -0,0 +1,35 @@
+"""
+===============================================================================
+BITS - Baghdad Intelligent Traffic System core
+===============================================================================
+Headless engines shared by the Streamlit page and the HTTP/JSON service
+===============================================================================
+"""
+
+from .api import BitsAPI
+from .automation import AutomationEngine
+from .catalog import HotspotCatalog, ZoneCatalog
+from .client import ServiceClient
+from .congestion import CongestionTracker
+from .database import (IncidentCache, IncidentSnapshot, PricingHistoryWriter, QueryStats,
+                       SQLiteConnectionPool, TrafficDatabase)
+from .dispatch import DispatchMatcher
+from .environment import (EnvironmentService, EnvironmentSnapshot, FileWeatherProvider,
+                          SimulatedWeatherProvider, WeatherProvider)
+from .geo import BaghdadGeographicalIntelligence
+from .metrics import Metrics
+from .prediction import AIPredictiveAnalysis, RiskModel
+from .roads import RoadGraph
+from .routing import SmartRoutingSystem
+from .simulation import Simulation
+from .spatial import GridIndex, IncidentImpactIndex
+from .surge import SurgeEngine
+
+__all__ = [
+    "AIPredictiveAnalysis", "AutomationEngine", "BaghdadGeographicalIntelligence", "BitsAPI",
+    "CongestionTracker", "DispatchMatcher", "EnvironmentService", "EnvironmentSnapshot", "FileWeatherProvider", "GridIndex",
+    "HotspotCatalog", "IncidentCache", "IncidentImpactIndex", "IncidentSnapshot", "Metrics", "PricingHistoryWriter",
+    "QueryStats", "RiskModel", "RoadGraph", "SQLiteConnectionPool", "ServiceClient",
+    "SimulatedWeatherProvider", "Simulation", "SmartRoutingSystem", "SurgeEngine", "TrafficDatabase",
+    "WeatherProvider", "ZoneCatalog",
+]
@@ -0,0 +1,177 @@
+"""
+===============================================================================
+BITS - Core API
+===============================================================================
+In-process facade over the engines, served by bits.service and used by the page
+===============================================================================
+"""
+
+import os
+from typing import Dict, List
+
+from .congestion import CongestionTracker, get_congestion_tracker
+from .database import TrafficDatabase
+from .dispatch import DispatchMatcher
+from .environment import EnvironmentService, get_environment_service
+from .geo import BaghdadGeographicalIntelligence
+from .prediction import AIPredictiveAnalysis, RiskModel
+from .routing import SmartRoutingSystem
+from .simulation import Simulation
+from .surge import SurgeEngine, get_surge_engine
+
+
+class BitsAPI:
+    """Pricing, incidents, predictions and reverse geocoding behind one JSON-friendly interface"""
+    
+    def __init__(self, db: TrafficDatabase = None, db_path: str = "bits_traffic.db", road_graph_path: str = None,
+                 simulation: Simulation = None):
+        self.db_path = db_path
+        # A simulation with a clock fixes the time of time-dependent answers (predictions)
+        self.simulation = simulation
+        # Without a road network, routes fall back to straight-line estimates
+        self.road_graph_path = road_graph_path or os.environ.get("BITS_ROAD_GRAPH")
+        self.geo = BaghdadGeographicalIntelligence
+        # Zone and hotspot catalog files (CSV, Parquet or GeoJSON), reloaded when edited; built-in otherwise
+        zone_catalog = os.environ.get("BITS_ZONE_CATALOG")
+        if zone_catalog and self.geo.zone_catalog_path != os.path.abspath(zone_catalog):
+            self.geo.load_zone_catalog(zone_catalog)
+        hotspots = os.environ.get("BITS_HOTSPOTS")
+        if hotspots and self.geo.hotspot_catalog_path != os.path.abspath(hotspots):
+            self.geo.load_hotspots(hotspots)
+        # Zone boundaries for reverse geocoding; without them points go to the nearest zone centroid
+        zone_polygons = os.environ.get("BITS_ZONE_POLYGONS")
+        if zone_polygons and self.geo.zone_polygons_path != os.path.abspath(zone_polygons):
+            self.geo.load_zone_polygons(zone_polygons)
+        self._db = db
+        self._routing = None
+        self.environment: EnvironmentService = get_environment_service()
+        self.surge: SurgeEngine = get_surge_engine()
+        self.congestion: CongestionTracker = get_congestion_tracker()
+        self.dispatcher = DispatchMatcher()
+    
+    @property
+    def db(self) -> TrafficDatabase:
+        """Process-wide database for db_path, opened (and schema-initialized) on first use by any API"""
+        if self._db is None:
+            self._db = TrafficDatabase.for_path(self.db_path)
+        return self._db
+    
+    @property
+    def routing(self) -> SmartRoutingSystem:
+        """Process-wide engine for the database and road network"""
+        if self._routing is None:
+            self._routing = SmartRoutingSystem.for_database(self.db, self.road_graph_path)
+        return self._routing
+    
+    def health(self) -> Dict:
+        return {"status": "ok", "incident_version": self.db.incident_cache.version}
+    
+    # Incidents
+    
+    def get_active_incidents(self) -> List[Dict]:
+        return self.db.get_active_incidents()
+    
+    def get_critical_incidents(self) -> List[Dict]:
+        return self.db.get_critical_incidents()
+    
+    def get_incident_count_by_zone(self) -> Dict[str, int]:
+        return self.db.get_incident_count_by_zone()
+    
+    def get_incident_version(self) -> int:
+        """Changes whenever active incidents change (in any process)"""
+        return self.db.incident_cache.snapshot().version
+    
+    def add_incident(self, zone: str, incident_type: str, severity: str, description: str = "",
+                     latitude: float = None, longitude: float = None, affected_road: str = "") -> bool:
+        """Add an incident; coordinates default to the zone centroid"""
+        zone_data = self.geo.ZONES.get(zone, {})
+        if latitude is None:
+            latitude = zone_data.get('lat', self.geo.BAGHDAD_CENTER[0])
+        if longitude is None:
+            longitude = zone_data.get('lon', self.geo.BAGHDAD_CENTER[1])
+        return self.db.add_incident(zone, incident_type, severity, description,
+                                    float(latitude), float(longitude), affected_road)
+    
+    def remove_incident(self, incident_id: int) -> bool:
+        return self.db.remove_incident(int(incident_id))
+    
+    # Pricing
+    
+    def quote(self, origin: str, destination: str, weather_multiplier: float = 1.0,
+              time_multiplier: float = 1.0, is_peak: bool = False,
+              weather: str = None, time_period: str = None) -> Dict:
+        return self.routing.calculate_route_pricing(
+            origin, destination, float(weather_multiplier), float(time_multiplier), bool(is_peak),
+            weather=weather, time_period=time_period
+        )
+    
+    # Dispatch
+    
+    def dispatch(self, drivers: List[Dict], orders: List[Dict]) -> Dict:
+        """Match {"lat", "lon"} drivers to orders; assignments refer to list positions"""
+        result = self.dispatcher.match([d['lat'] for d in drivers], [d['lon'] for d in drivers],
+                                       [o['lat'] for o in orders], [o['lon'] for o in orders])
+        return {"assignments": result.round({'pickup_km': 3, 'eta_minutes': 1}).to_dict(orient="records"),
+                **result.attrs}
+    
+    # Demand and supply
+    
+    def record_surge_events(self, events: List[Dict]) -> int:
+        """Feed {"kind": "order" | "driver", "zone": ..., "at": epoch seconds (optional)} events to the
+        surge engine; returns how many were counted"""
+        return sum(self.surge.record(event['kind'], event['zone'], event.get('at')) for event in events)
+    
+    def get_surge(self) -> Dict:
+        return self.surge.snapshot()
+    
+    # Congestion
+    
+    def ingest_pings(self, pings: List[Dict]) -> int:
+        """Feed {"timestamp": epoch seconds, "lat", "lon", "speed_kmh"} vehicle pings to the congestion
+        windows; returns how many were counted"""
+        return self.congestion.ingest([p['timestamp'] for p in pings], [p['lat'] for p in pings],
+                                      [p['lon'] for p in pings], [p['speed_kmh'] for p in pings])
+    
+    def get_congestion(self) -> Dict:
+        return self.congestion.snapshot()
+    
+    def get_environment(self) -> Dict:
+        """Weather, peak hour and multipliers for the current interval (the same for every session)"""
+        return self.environment.snapshot(self._now()).to_dict()
+    
+    # Predictions and geography
+    
+    @property
+    def predictor(self) -> RiskModel:
+        """Risk tensor loaded once per process, retrained incrementally as incidents and quotes arrive"""
+        return RiskModel.for_database(self.db).refresh(self.db)
+    
+    def _now(self):
+        """Simulated time, or None for the wall clock"""
+        return self.simulation.now() if self.simulation is not None and self.simulation.has_clock else None
+    
+    def get_predictions(self) -> List[Dict]:
+        now = self._now()
+        return AIPredictiveAnalysis.get_all_predictions(
+            self.predictor, now=now, weather_multiplier=self.environment.snapshot(now).weather_multiplier)
+    
+    def predict(self, zone: str, hour: int = None) -> Dict:
+        now = self._now()
+        return AIPredictiveAnalysis.predict_traffic(
+            zone, None if hour is None else int(hour), self.predictor, now=now,
+            weather_multiplier=self.environment.snapshot(now).weather_multiplier)
+    
+    def reverse_geocode(self, lat: float, lon: float) -> Dict:
+        zone, region, distance = self.geo.get_nearest_zone(float(lat), float(lon))
+        return {"zone": zone, "region": region, "distance_km": distance}
+    
+    # Diagnostics
+    
+    def get_stats(self) -> Dict:
+        cache = self.db.incident_cache
+        return {
+            "query_stats": self.db.get_query_stats(),
+            "connections_opened": self.db.pool.connections_opened,
+            "incident_cache": {"hits": cache.hits, "misses": cache.misses, "version": cache.version},
+            "pricing_history": self.db.get_pricing_writer().stats(),
+        }
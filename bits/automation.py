@@ -0,0 +1,75 @@
+"""
+===============================================================================
+BITS - Automation Engine
+===============================================================================
+Auto-weather and auto-time (peak hours, time periods)
+===============================================================================
+"""
+
+import random
+from datetime import datetime, time
+from typing import Dict
+
+
+class AutomationEngine:
+    """Full Automation Engine for Auto-Weather and Auto-Time"""
+    
+    WEATHER_CONDITIONS = {
+        "صافٍ": {"icon": "☀️", "multiplier": 1.0, "color": "green"},
+        "غائم": {"icon": "☁️", "multiplier": 1.0, "color": "gray"},
+        "مطر خفيف": {"icon": "🌧️", "multiplier": 1.2, "color": "blue"},
+        "مطر غزير": {"icon": "🌧️", "multiplier": 1.5, "color": "blue"},
+        "عاصف": {"icon": "💨", "multiplier": 1.1, "color": "orange"},
+        "عاصف رملي": {"icon": "🌪️", "multiplier": 1.3, "color": "orange"},
+    }
+    
+    PEAK_HOURS_MORNING = (time(7, 30), time(9, 30))
+    PEAK_HOURS_AFTERNOON = (time(14, 0), time(16, 0))
+    PEAK_MULTIPLIER = 1.4
+    
+    @classmethod
+    def simulate_weather(cls, rng: random.Random = None) -> str:
+        """Simulate live Baghdad weather (pass a seeded rng for repeatable runs)"""
+        weather_types = list(cls.WEATHER_CONDITIONS.keys())
+        weights = [0.4, 0.2, 0.15, 0.1, 0.1, 0.05]
+        return (rng or random).choices(weather_types, weights=weights)[0]
+    
+    @classmethod
+    def simulate_operations(cls, rng: random.Random = None) -> Dict[str, int]:
+        """Simulate the fleet metrics of the operations hub"""
+        rng = rng or random
+        return {
+            "active_drivers": rng.randint(150, 400), "pending_orders": rng.randint(50, 250),
+            "new_drivers": rng.randint(10, 50), "new_orders": rng.randint(5, 30),
+        }
+    
+    @classmethod
+    def get_weather_multiplier(cls, weather: str) -> float:
+        return cls.WEATHER_CONDITIONS.get(weather, {}).get('multiplier', 1.0)
+    
+    @classmethod
+    def get_weather_color(cls, weather: str) -> str:
+        return cls.WEATHER_CONDITIONS.get(weather, {}).get('color', 'green')
+    
+    @classmethod
+    def is_peak_hour(cls, current_time: datetime = None) -> bool:
+        """Check if current time is peak hour (7:30-9:30 AM or 2:00-4:00 PM)"""
+        if current_time is None:
+            current_time = datetime.now()
+        current_time_only = current_time.time()
+        morning_peak = cls.PEAK_HOURS_MORNING[0] <= current_time_only <= cls.PEAK_HOURS_MORNING[1]
+        afternoon_peak = cls.PEAK_HOURS_AFTERNOON[0] <= current_time_only <= cls.PEAK_HOURS_AFTERNOON[1]
+        return morning_peak or afternoon_peak
+    
+    @classmethod
+    def get_time_period(cls, current_time: datetime = None) -> str:
+        if current_time is None:
+            current_time = datetime.now()
+        hour = current_time.hour
+        if 5 <= hour < 12:
+            return "صباحاً"
+        elif 12 <= hour < 17:
+            return "ظهراً"
+        elif 17 <= hour < 21:
+            return "مساءً"
+        return "ليلاً"
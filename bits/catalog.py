@@ -0,0 +1,217 @@
+"""
+===============================================================================
+BITS - Zone and Hotspot Catalogs
+===============================================================================
+Named places stored column-wise (NumPy coordinate and price columns, interned
+category codes) and loaded from CSV, Parquet or GeoJSON, behind a read-only
+mapping that reads like the original nested-dict literals
+===============================================================================
+"""
+
+import json
+import os
+import sys
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class _RecordView(Mapping):
+    """One row of a catalog as a read-only dict (values are read from the columns on access)"""
+
+    __slots__ = ("_catalog", "_row")
+
+    def __init__(self, catalog: "Catalog", row: int):
+        self._catalog = catalog
+        self._row = row
+
+    def __getitem__(self, field: str):
+        return self._catalog.value(field, self._row)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._catalog.FIELDS)
+
+    def __len__(self) -> int:
+        return len(self._catalog.FIELDS)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class Catalog(Mapping):
+    """Structure-of-arrays table of named places, read as {name: {field: value}}.
+
+    Numeric fields are NumPy columns; text fields are small-integer codes into a list of
+    interned categories, so a thousand zones in one region share one region string. The
+    mapping is read-only: reloading builds a new catalog and swaps it in.
+    """
+
+    # field -> dtype for numeric columns, in FIELDS order with the text columns
+    NUMBER_FIELDS: Dict[str, type] = {}
+    # Defaults for optional columns (fields without one are required)
+    DEFAULTS: Dict[str, object] = {}
+    FIELDS: Tuple[str, ...] = ()
+
+    def __init__(self, names: List[str], columns: Dict[str, object], source: str = None):
+        self.names = [str(name) for name in names]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        if len(self.index) != len(self.names):
+            duplicates = sorted({name for name in self.names if self.names.count(name) > 1})
+            raise ValueError(f"duplicate names in catalog: {', '.join(duplicates)}")
+        self.source = source
+        self.numbers: Dict[str, np.ndarray] = {}
+        self.codes: Dict[str, np.ndarray] = {}
+        self.categories: Dict[str, List[str]] = {}
+        for field in self.FIELDS:
+            values = columns.get(field)
+            if values is None:
+                if field not in self.DEFAULTS:
+                    raise ValueError(f"catalog is missing the {field!r} column")
+                values = [self.DEFAULTS[field]] * len(self.names)
+            values = pd.Series(list(values) if not isinstance(values, (pd.Series, np.ndarray)) else values)
+            if field in self.NUMBER_FIELDS:
+                if values.isna().any() and field in self.DEFAULTS:
+                    values = values.fillna(self.DEFAULTS[field])
+                self.numbers[field] = self._number_column(field, values)
+            else:
+                if field in self.DEFAULTS:
+                    values = values.fillna(self.DEFAULTS[field])
+                codes, categories = pd.factorize(values.astype(str))
+                self.codes[field] = codes.astype(np.min_scalar_type(max(len(categories) - 1, 0)))
+                self.categories[field] = [sys.intern(category) for category in categories]
+
+    def _number_column(self, field: str, values: pd.Series) -> np.ndarray:
+        """Numeric column with its dtype; non-numbers, and fractions in integer fields, are errors
+        (rather than NaN or silently truncated values)"""
+        numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+        bad = np.isnan(numbers)
+        dtype = self.NUMBER_FIELDS[field]
+        if np.issubdtype(dtype, np.integer):
+            bad |= numbers != np.round(numbers)
+        if bad.any():
+            rows = np.flatnonzero(bad)
+            examples = ", ".join(f"{self.names[i]}={values.iloc[i]}" for i in rows[:5])
+            kind = "an integer" if np.issubdtype(dtype, np.integer) else "a number"
+            raise ValueError(f"catalog column {field!r} must be {kind}: {examples}"
+                             + (f" and {len(rows) - 5} more" if len(rows) > 5 else ""))
+        return numbers.astype(dtype)
+
+    # Mapping view
+
+    def __getitem__(self, name: str) -> _RecordView:
+        return _RecordView(self, self.index[name])
+
+    def __contains__(self, name) -> bool:
+        return name in self.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self)} entries from {self.source or 'literal'})"
+
+    def value(self, field: str, row: int):
+        numbers = self.numbers.get(field)
+        if numbers is not None:
+            return numbers[row].item()
+        return self.categories[field][self.codes[field][row]]
+
+    def column(self, field: str) -> np.ndarray:
+        """Whole column: the NumPy array of a numeric field, or the decoded values of a text field"""
+        if field in self.numbers:
+            return self.numbers[field]
+        return np.array(self.categories[field], dtype=object)[self.codes[field]]
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the catalog: columns, names, name index and categories"""
+        total = sum(a.nbytes for a in self.numbers.values()) + sum(a.nbytes for a in self.codes.values())
+        total += sum(sys.getsizeof(name) for name in self.names) + sys.getsizeof(self.names)
+        total += sys.getsizeof(self.index)
+        total += sum(sys.getsizeof(c) for categories in self.categories.values() for c in categories)
+        return total
+
+    # Loading
+
+    @classmethod
+    def from_records(cls, records: Dict[str, Dict], source: str = None) -> "Catalog":
+        """From the {name: {field: value}} form of the original literals and zone JSON files"""
+        names = list(records)
+        columns = {field: [records[name].get(field, cls.DEFAULTS.get(field)) for name in names]
+                   for field in cls.FIELDS}
+        return cls(names, columns, source)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, source: str = None) -> "Catalog":
+        """From a table with a name column and one column per field"""
+        if "name" not in frame.columns:
+            raise ValueError("catalog table has no 'name' column")
+        return cls(frame["name"].astype(str).tolist(),
+                   {field: frame[field] for field in cls.FIELDS if field in frame.columns}, source)
+
+    @classmethod
+    def load(cls, path: str) -> "Catalog":
+        """Read a .csv, .parquet, or .geojson/.json file (GeoJSON features or {name: {...}} JSON)"""
+        extension = os.path.splitext(path)[1].lower()
+        source = os.path.abspath(path)
+        if extension == ".csv":
+            return cls.from_frame(pd.read_csv(path, encoding="utf-8"), source)
+        if extension in (".parquet", ".pq"):
+            return cls.from_frame(pd.read_parquet(path), source)
+        if extension in (".geojson", ".json"):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("type") == "FeatureCollection":
+                return cls.from_frame(pd.DataFrame(_feature_rows(data["features"])), source)
+            return cls.from_records(data, source)
+        raise ValueError(f"unsupported catalog format: {path} (use .csv, .parquet or .geojson)")
+
+
+def _feature_rows(features: List[Dict]) -> List[Dict]:
+    """Feature properties plus lat/lon: the Point, or the centroid of the largest polygon ring
+    (explicit lat/lon properties take precedence)"""
+    rows = []
+    for feature in features:
+        row = dict(feature.get("properties") or {})
+        geometry = feature.get("geometry") or {}
+        if "lat" not in row or "lon" not in row:
+            if geometry.get("type") == "Point":
+                row["lon"], row["lat"] = geometry["coordinates"][:2]
+            elif geometry.get("type") in ("Polygon", "MultiPolygon"):
+                parts = [geometry["coordinates"]] if geometry["type"] == "Polygon" else geometry["coordinates"]
+                row["lon"], row["lat"], _ = max((_ring_centroid(part[0]) for part in parts), key=lambda c: c[2])
+        rows.append(row)
+    return rows
+
+
+def _ring_centroid(ring) -> Tuple[float, float, float]:
+    """(x, y, |area|) of a polygon ring (shoelace formula; vertex mean for degenerate rings)"""
+    points = np.asarray(ring, dtype=float)[:, :2]
+    x, y = points[:, 0], points[:, 1]
+    x1, y1 = np.roll(x, -1), np.roll(y, -1)
+    cross = x * y1 - x1 * y
+    area = cross.sum() / 2
+    if abs(area) < 1e-15:
+        return float(x.mean()), float(y.mean()), 0.0
+    return float(((x + x1) * cross).sum() / (6 * area)), float(((y + y1) * cross).sum() / (6 * area)), abs(area)
+
+
+class ZoneCatalog(Catalog):
+    """Zones: region, type, lat, lon, typical_demand, base_price and icon per name"""
+
+    FIELDS = ("region", "type", "lat", "lon", "typical_demand", "base_price", "icon")
+    NUMBER_FIELDS = {"lat": np.float64, "lon": np.float64, "base_price": np.int64}
+    DEFAULTS = {"region": "غير معروف", "type": "residential", "typical_demand": "medium",
+                "base_price": 3000, "icon": "📍"}
+
+
+class HotspotCatalog(Catalog):
+    """Traffic hotspots: lat, lon and the catalog congestion_level per name"""
+
+    FIELDS = ("lat", "lon", "congestion_level")
+    NUMBER_FIELDS = {"lat": np.float64, "lon": np.float64}
+    DEFAULTS = {"congestion_level": "medium"}
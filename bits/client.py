@@ -0,0 +1,97 @@
+"""
+===============================================================================
+BITS - Service Client
+===============================================================================
+Synchronous HTTP client with the same methods as BitsAPI (used by the page)
+===============================================================================
+"""
+
+import json
+from typing import Dict, List
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+
+class ServiceClient:
+    """Talks to a running bits.service instance; drop-in replacement for BitsAPI"""
+
+    def __init__(self, base_url: str, timeout: float = 5.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, payload: Dict = None, params: Dict = None):
+        url = self.base_url + path
+        if params:
+            url += "?" + urlencode(params)
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        request = Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except HTTPError as e:
+            raise RuntimeError(f"BITS service {method} {path} failed ({e.code}): {e.read().decode('utf-8')}") from e
+
+    def health(self) -> Dict:
+        return self._request("GET", "/health")
+
+    def get_active_incidents(self) -> List[Dict]:
+        return self._request("GET", "/incidents")
+
+    def get_critical_incidents(self) -> List[Dict]:
+        return self._request("GET", "/incidents", params={"critical": 1})
+
+    def get_incident_count_by_zone(self) -> Dict[str, int]:
+        return self._request("GET", "/incidents/counts")
+
+    def get_incident_version(self) -> int:
+        return self._request("GET", "/incidents/version")["version"]
+
+    def add_incident(self, zone: str, incident_type: str, severity: str, description: str = "",
+                     latitude: float = None, longitude: float = None, affected_road: str = "") -> bool:
+        return self._request("POST", "/incidents", {
+            "zone": zone, "incident_type": incident_type, "severity": severity, "description": description,
+            "latitude": latitude, "longitude": longitude, "affected_road": affected_road,
+        })["ok"]
+
+    def remove_incident(self, incident_id: int) -> bool:
+        return self._request("DELETE", f"/incidents/{int(incident_id)}")["ok"]
+
+    def quote(self, origin: str, destination: str, weather_multiplier: float = 1.0,
+              time_multiplier: float = 1.0, is_peak: bool = False,
+              weather: str = None, time_period: str = None) -> Dict:
+        return self._request("POST", "/quote", {
+            "origin": origin, "destination": destination, "weather_multiplier": weather_multiplier,
+            "time_multiplier": time_multiplier, "is_peak": is_peak, "weather": weather, "time_period": time_period,
+        })
+
+    def dispatch(self, drivers: List[Dict], orders: List[Dict]) -> Dict:
+        return self._request("POST", "/dispatch", {"drivers": drivers, "orders": orders})
+
+    def record_surge_events(self, events: List[Dict]) -> int:
+        return self._request("POST", "/surge/events", {"events": events})["recorded"]
+
+    def get_surge(self) -> Dict:
+        return self._request("GET", "/surge")
+
+    def ingest_pings(self, pings: List[Dict]) -> int:
+        return self._request("POST", "/pings", {"pings": pings})["counted"]
+
+    def get_congestion(self) -> Dict:
+        return self._request("GET", "/congestion")
+
+    def get_environment(self) -> Dict:
+        return self._request("GET", "/environment")
+
+    def get_predictions(self) -> List[Dict]:
+        return self._request("GET", "/predictions")
+
+    def predict(self, zone: str, hour: int = None) -> Dict:
+        params = {"zone": zone} if hour is None else {"zone": zone, "hour": hour}
+        return self._request("GET", "/predictions", params=params)
+
+    def reverse_geocode(self, lat: float, lon: float) -> Dict:
+        return self._request("GET", "/reverse-geocode", params={"lat": lat, "lon": lon})
+
+    def get_stats(self) -> Dict:
+        return self._request("GET", "/stats")
@@ -0,0 +1,429 @@
+"""
+===============================================================================
+BITS - Live Congestion
+===============================================================================
+Vehicle pings streamed from a file, socket or stdin in bounded blocks, snapped
+to zones and traffic hotspots, and kept as rolling speed and density windows
+that publish live congestion levels to the map and the road graph
+===============================================================================
+"""
+
+import io
+import os
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .geo import BaghdadGeographicalIntelligence
+from .roads import RoadGraph
+from .spatial import GridIndex
+
+# CSV columns every ping source must have (others, such as vehicle_id, are ignored);
+# timestamp is epoch seconds
+PING_COLUMNS = ("timestamp", "lat", "lon", "speed_kmh")
+
+
+@contextmanager
+def open_ping_source(source) -> Iterator[BinaryIO]:
+    """Binary stream for a path, "-" (stdin), "tcp://host:port" or an open binary file"""
+    if hasattr(source, "read"):
+        yield source
+    elif source == "-":
+        yield sys.stdin.buffer
+    elif str(source).startswith("tcp://"):
+        host, _, port = str(source)[len("tcp://"):].rpartition(":")
+        with socket.create_connection((host, int(port))) as connection, connection.makefile("rb") as stream:
+            yield stream
+    else:
+        with open(source, "rb") as stream:
+            yield stream
+
+
+def iter_ping_blocks(stream: BinaryIO, block_bytes: int) -> Iterator[Tuple[List[str], bytes]]:
+    """(header columns, block of whole CSV lines) of at most about block_bytes each.
+
+    Each read takes what the stream has ready (up to block_bytes), so a slow socket or pipe
+    yields small blocks promptly and a file yields full ones; only one block is held at a time.
+    """
+    columns = stream.readline().decode("utf-8").strip().split(",")
+    missing = set(PING_COLUMNS) - set(columns)
+    if missing:
+        raise ValueError(f"ping stream is missing columns {sorted(missing)}")
+    read = getattr(stream, "read1", stream.read)
+    rest = b""
+    while True:
+        data = read(block_bytes)
+        if not data:
+            break
+        data = rest + data
+        end = data.rfind(b"\n") + 1
+        rest = data[end:]
+        if end:
+            yield columns, data[:end]
+    if rest.strip():
+        yield columns, rest
+
+
+def parse_ping_block(columns: List[str], block: bytes) -> Tuple[np.ndarray, ...]:
+    """timestamp, lat, lon and speed_kmh arrays of a block (malformed values become NaN)"""
+    try:
+        frame = pd.read_csv(io.BytesIO(block), header=None, names=columns, usecols=PING_COLUMNS,
+                            dtype=float, engine="c")
+    except ValueError:
+        frame = pd.read_csv(io.BytesIO(block), header=None, names=columns, usecols=PING_COLUMNS,
+                            dtype=str, engine="c", on_bad_lines="skip").apply(pd.to_numeric, errors="coerce")
+    return tuple(frame[column].to_numpy(dtype=float) for column in PING_COLUMNS)
+
+
+class CongestionTracker:
+    """Rolling per-zone and per-hotspot ping counts and speed sums, with live congestion levels.
+
+    Rows are the zones followed by the TRAFFIC_HOTSPOTS. Each row has a ring buffer of
+    WINDOW_MINUTES per-minute ping counts and speed sums (as SurgeEngine keeps events), so memory
+    stays fixed however many pings arrive. A row's level comes from the mean speed over the window
+    once it holds MIN_PINGS pings; until then hotspots keep their catalog level and zones have none.
+    `version` changes whenever a hotspot's level does, so readers can cache on it.
+
+    A tracker built on the geo catalogs (no zone_names or hotspots given) follows them when they are
+    reloaded: rows of the names that remain keep their windows, new names start empty.
+    """
+
+    WINDOW_MINUTES = 10
+    MIN_PINGS = 20
+    # Upper mean speeds (km/h) of each level; anything faster is "low"
+    LEVEL_SPEEDS_KMH = (("critical", 10.0), ("high", 18.0), ("medium", 28.0))
+    # Pings faster than this are GPS noise; pings farther than MAX_ZONE_KM from every zone are out of town
+    MAX_SPEED_KMH = 160.0
+    MAX_ZONE_KM = 5.0
+    # A hotspot covers the same arcs the road graph slows down for it
+    HOTSPOT_RADIUS_KM = RoadGraph.HOTSPOT_RADIUS_KM
+    BLOCK_BYTES = 1 << 20
+
+    def __init__(self, zone_names: List[str] = None, hotspots: Dict[str, Dict] = None,
+                 window_minutes: int = None, clock: Callable[[], float] = None):
+        geo = BaghdadGeographicalIntelligence
+        self.window = window_minutes or self.WINDOW_MINUTES
+        self.clock = clock or time.time
+        self._follow_catalogs = zone_names is None and hotspots is None
+        self._catalogs = self._geo_catalogs()
+        self.zone_names = []
+        self.hotspot_names = []
+        self._counts = np.zeros((0, self.window), dtype=np.int64)
+        self._speeds = np.zeros((0, self.window))
+        self._bind(zone_names if zone_names is not None else geo.get_zone_cache()['names'],
+                   hotspots if hotspots is not None else geo.TRAFFIC_HOTSPOTS)
+        self._hotspot_levels = dict(zip(self.hotspot_names, self._static_levels))
+        self._minute = None
+        self._lock = threading.Lock()
+        self._version = 0
+        self.pings = 0
+        self.dropped = 0
+        self._feed = None
+
+    # Catalog rows
+
+    @staticmethod
+    def _geo_catalogs() -> Tuple[Dict, Dict]:
+        """The (zones, hotspots) catalogs that aggregate() rows refer to"""
+        geo = BaghdadGeographicalIntelligence
+        return geo.ZONES, geo.TRAFFIC_HOTSPOTS
+
+    @staticmethod
+    def _same(a: Tuple[Dict, Dict], b: Tuple[Dict, Dict]) -> bool:
+        return a[0] is b[0] and a[1] is b[1]
+
+    @staticmethod
+    def _row_keys(zone_names, hotspot_names) -> List[Tuple[str, str]]:
+        return [("zone", name) for name in zone_names] + [("hotspot", name) for name in hotspot_names]
+
+    def _bind(self, zone_names: List[str], hotspots: Dict[str, Dict]):
+        """Lay the rows out for these zones and hotspots, keeping the windows of rows that remain (lock held)"""
+        old_rows = {row: i for i, row in enumerate(self._row_keys(self.zone_names, self.hotspot_names))}
+        self.zone_names = zone_names
+        self.hotspots = hotspots
+        self._zone_index = {name: i for i, name in enumerate(self.zone_names)}
+        self.hotspot_names = list(self.hotspots)
+        new_rows = self._row_keys(self.zone_names, self.hotspot_names)
+        source = np.array([old_rows.get(row, -1) for row in new_rows], dtype=np.int64)
+        kept = source >= 0
+        counts = np.zeros((len(new_rows), self.window), dtype=np.int64)
+        speeds = np.zeros((len(new_rows), self.window))
+        counts[kept], speeds[kept] = self._counts[source[kept]], self._speeds[source[kept]]
+        self._counts, self._speeds = counts, speeds
+        self._total_counts = counts.sum(axis=1)
+        self._total_speeds = speeds.sum(axis=1)
+        self._static_levels = [self.hotspots[name].get('congestion_level') for name in self.hotspot_names]
+        self._levels: List[Optional[str]] = [None] * len(self.zone_names) + self._static_levels
+
+    def _sync_catalogs(self):
+        """Follow a reloaded geo catalog (trackers built on it only)"""
+        if not self._follow_catalogs or self._same(self._geo_catalogs(), self._catalogs):
+            return
+        with self._lock:
+            catalogs = self._geo_catalogs()
+            if self._same(catalogs, self._catalogs):
+                return
+            self._catalogs = catalogs
+            self._bind(BaghdadGeographicalIntelligence.get_zone_cache()['names'], catalogs[1])
+            self._publish()
+            # Hotspots may have moved even if no level changed
+            self._version += 1
+
+    def _remap(self, rows: np.ndarray, catalogs: Tuple[Dict, Dict]) -> np.ndarray:
+        """aggregate() rows laid out for other catalogs -> this tracker's rows (-1: name no longer here)"""
+        current = {row: i for i, row in enumerate(self._row_keys(self.zone_names, self.hotspot_names))}
+        mapping = np.array([current.get(row, -1) for row in self._row_keys(*catalogs)], dtype=np.int64)
+        return mapping[rows]
+
+    # Aggregation (runs in pool workers too, so it only reads the class and the geo catalog)
+
+    @classmethod
+    def aggregate(cls, timestamps, lats, lons, speeds) -> Tuple[np.ndarray, ...]:
+        """(minute, row, ping count, speed sum) per minute and row for a batch of pings; rows are the
+        catalog zones followed by the catalog hotspots. Invalid and out-of-town pings are left out."""
+        timestamps, lats, lons, speeds = (np.asarray(a, dtype=float) for a in (timestamps, lats, lons, speeds))
+        with np.errstate(invalid="ignore"):
+            valid = (np.isfinite(timestamps) & np.isfinite(lats) & np.isfinite(lons)
+                     & (speeds >= 0) & (speeds <= cls.MAX_SPEED_KMH))
+        if not valid.all():
+            timestamps, lats, lons, speeds = timestamps[valid], lats[valid], lons[valid], speeds[valid]
+        geo = BaghdadGeographicalIntelligence
+        n_zones = len(geo.get_zone_cache()['names'])
+        hotspots = list(geo.TRAFFIC_HOTSPOTS.values())
+        n_rows = n_zones + len(hotspots)
+        if len(timestamps) == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, empty, np.empty(0)
+
+        zone, distance = geo._nearest_zone_indices(lats, lons)
+        in_town = np.flatnonzero((zone >= 0) & (distance <= cls.MAX_ZONE_KM))
+        # Index the few hotspots and query every ping against them
+        spot_index = GridIndex([h['lat'] for h in hotspots], [h['lon'] for h in hotspots], cls.HOTSPOT_RADIUS_KM)
+        ping, spot, _ = spot_index.pairs_within(lats, lons, cls.HOTSPOT_RADIUS_KM)
+        pings = np.concatenate([in_town, ping])
+        rows = np.concatenate([zone[in_town], n_zones + spot])
+
+        minutes = (timestamps // 60).astype(np.int64)
+        first = minutes.min()
+        keys, inverse = np.unique((minutes[pings] - first) * n_rows + rows, return_inverse=True)
+        return (first + keys // n_rows, keys % n_rows, np.bincount(inverse),
+                np.bincount(inverse, weights=speeds[pings]))
+
+    @classmethod
+    def aggregate_block(cls, columns: List[str], block: bytes) -> Tuple[int, Tuple[np.ndarray, ...]]:
+        """(pings in the block, aggregate()) of a raw CSV block"""
+        pings = parse_ping_block(columns, block)
+        return len(pings[0]), cls.aggregate(*pings)
+
+    # Windows
+
+    def _advance(self, minute: int):
+        """Make `minute` the newest ring column, clearing the columns that fall out of the window (lock held)"""
+        if self._minute is not None:
+            for expired in range(self._minute + 1, min(minute, self._minute + self.window) + 1):
+                column = expired % self.window
+                self._total_counts -= self._counts[:, column]
+                self._total_speeds -= self._speeds[:, column]
+                self._counts[:, column] = 0
+                self._speeds[:, column] = 0.0
+            # Float sums drift slightly as columns are subtracted; empty rows are exactly zero
+            self._total_speeds[self._total_counts == 0] = 0.0
+        self._minute = minute
+
+    def _publish(self):
+        """Recompute levels from the window totals, bumping the version if a hotspot changed (lock held)"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_speed = self._total_speeds / self._total_counts
+        thresholds = [speed for _, speed in self.LEVEL_SPEEDS_KMH]
+        names = [level for level, _ in self.LEVEL_SPEEDS_KMH] + ["low"]
+        live = self._total_counts >= self.MIN_PINGS
+        level_index = np.searchsorted(thresholds, mean_speed, side="right")
+        n_zones = len(self.zone_names)
+        levels = [names[i] if ok else None for i, ok in zip(level_index.tolist(), live.tolist())]
+        levels[n_zones:] = [level or static for level, static in zip(levels[n_zones:], self._static_levels)]
+        self._levels = levels
+        hotspot_levels = dict(zip(self.hotspot_names, levels[n_zones:]))
+        if hotspot_levels != self._hotspot_levels:
+            self._hotspot_levels = hotspot_levels
+            self._version += 1
+
+    def _expire(self):
+        self._sync_catalogs()
+        minute = int(self.clock() // 60)
+        if self._minute is None or minute > self._minute:
+            with self._lock:
+                if self._minute is None or minute > self._minute:
+                    self._advance(minute)
+                    self._publish()
+
+    def merge(self, pings: int, minutes: np.ndarray, rows: np.ndarray, counts: np.ndarray,
+              speed_sums: np.ndarray, catalogs: Tuple[Dict, Dict] = None) -> int:
+        """Add the aggregate() output of `pings` pings to the windows; returns how many were counted
+        (invalid and out-of-town pings, and pings older than the window, are dropped).
+
+        `catalogs` are the geo (zones, hotspots) the rows were aggregated against, when they may
+        differ from this tracker's (a reload since); rows of names no longer present are dropped.
+        """
+        self._sync_catalogs()
+        with self._lock:
+            if catalogs is not None and self._follow_catalogs and not self._same(catalogs, self._catalogs):
+                rows = self._remap(rows, catalogs)
+                keep = rows >= 0
+                minutes, rows, counts, speed_sums = minutes[keep], rows[keep], counts[keep], speed_sums[keep]
+            if len(minutes) and (self._minute is None or minutes.max() > self._minute):
+                self._advance(int(minutes.max()))
+            if self._minute is not None:
+                keep = minutes > self._minute - self.window
+                minutes, rows, counts, speed_sums = minutes[keep], rows[keep], counts[keep], speed_sums[keep]
+            columns = minutes % self.window
+            np.add.at(self._counts, (rows, columns), counts)
+            np.add.at(self._speeds, (rows, columns), speed_sums)
+            np.add.at(self._total_counts, rows, counts)
+            np.add.at(self._total_speeds, rows, speed_sums)
+            counted = int(counts[rows < len(self.zone_names)].sum())
+            self.pings += pings
+            self.dropped += pings - counted
+            self._publish()
+        return counted
+
+    def ingest(self, timestamps, lats, lons, speeds) -> int:
+        """Snap and count a batch of pings in this process; returns how many were counted"""
+        BaghdadGeographicalIntelligence.get_zone_cache()  # picks up a due catalog reload first
+        catalogs = self._geo_catalogs()
+        return self.merge(len(timestamps), *self.aggregate(timestamps, lats, lons, speeds), catalogs=catalogs)
+
+    # Streams
+
+    def consume(self, source, workers: int = 0, block_bytes: int = None) -> int:
+        """Ingest every ping from a source (see open_ping_source) until it ends; returns the pings read.
+
+        With workers > 1, blocks are parsed and snapped in a process pool and merged here in order;
+        at most two blocks per worker are in flight, so memory stays bounded at any input rate.
+        """
+        block_bytes = block_bytes or self.BLOCK_BYTES
+        total = 0
+        with open_ping_source(source) as stream:
+            blocks = iter_ping_blocks(stream, block_bytes)
+            if workers <= 1:
+                for columns, block in blocks:
+                    BaghdadGeographicalIntelligence.get_zone_cache()
+                    catalogs = self._geo_catalogs()
+                    pings, aggregated = self.aggregate_block(columns, block)
+                    self.merge(pings, *aggregated, catalogs=catalogs)
+                    total += pings
+                return total
+            geo = BaghdadGeographicalIntelligence
+            geo.get_zone_cache()
+            # Workers snap against the catalogs as of now; their rows are remapped after a reload
+            catalogs = self._geo_catalogs()
+            with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                     initargs=(*catalogs, geo.zone_polygons_path)) as pool:
+                pending = deque()
+                for columns, block in blocks:
+                    pending.append(pool.submit(type(self).aggregate_block, columns, block))
+                    if len(pending) >= 2 * workers:
+                        total += self._merge_result(pending.popleft(), catalogs)
+                while pending:
+                    total += self._merge_result(pending.popleft(), catalogs)
+        return total
+
+    def _merge_result(self, future, catalogs: Tuple[Dict, Dict]) -> int:
+        pings, aggregated = future.result()
+        self.merge(pings, *aggregated, catalogs=catalogs)
+        return pings
+
+    def start_feed(self, source, workers: int = 0) -> threading.Thread:
+        """consume() a source on a daemon thread (one feed per tracker)"""
+        if self._feed is not None and self._feed.is_alive():
+            raise RuntimeError("a ping feed is already running")
+
+        def run():
+            try:
+                read = self.consume(source, workers)
+                print(f"Ping feed {source} ended after {read:,} pings")
+            except (OSError, ValueError) as e:
+                print(f"Ping feed {source} failed: {e}")
+
+        self._feed = threading.Thread(target=run, name="bits-pings", daemon=True)
+        self._feed.start()
+        return self._feed
+
+    # Readers
+
+    @property
+    def version(self) -> int:
+        self._expire()
+        return self._version
+
+    def hotspot_levels(self) -> Dict[str, str]:
+        """Current level of every hotspot (live, or its catalog level without enough pings)"""
+        self._expire()
+        return self._hotspot_levels
+
+    def zone_level(self, zone: str) -> Optional[str]:
+        """Live level of a zone, or None without enough recent pings"""
+        self._expire()
+        i = self._zone_index.get(zone)
+        return None if i is None else self._levels[i]
+
+    def snapshot(self) -> Dict:
+        """Window ping counts, pings per minute, mean speed and level per zone and per hotspot"""
+        self._expire()
+        with self._lock:
+            counts, speeds, levels = self._total_counts.tolist(), self._total_speeds.tolist(), self._levels
+            version = self._version
+
+        def stats(i: int) -> Dict:
+            return {"pings": counts[i], "pings_per_minute": round(counts[i] / self.window, 1),
+                    "mean_speed_kmh": round(speeds[i] / counts[i], 1) if counts[i] else None,
+                    "level": levels[i]}
+
+        n_zones = len(self.zone_names)
+        hotspots = {}
+        for j, name in enumerate(self.hotspot_names):
+            spot = self.hotspots[name]
+            hotspots[name] = {"lat": spot['lat'], "lon": spot['lon'], "radius_km": self.HOTSPOT_RADIUS_KM,
+                              **stats(n_zones + j),
+                              "source": "live" if counts[n_zones + j] >= self.MIN_PINGS else "static"}
+        return {
+            "window_minutes": self.window, "version": version,
+            "pings": sum(counts[:n_zones]), "pings_read": self.pings, "dropped": self.dropped,
+            "zones": {zone: stats(i) for i, zone in enumerate(self.zone_names)},
+            "hotspots": hotspots,
+        }
+
+
+def _init_worker(zones: Dict[str, Dict], hotspots: Dict[str, Dict], zone_polygons_path: Optional[str]):
+    """Pool initializer: snap against the parent's zone catalog, boundaries and hotspots (not reloaded here)"""
+    geo = BaghdadGeographicalIntelligence
+    geo.zone_catalog_path = geo.hotspot_catalog_path = None
+    if geo.ZONES is not zones:
+        geo.set_zones(zones)
+    geo.set_hotspots(hotspots)
+    if zone_polygons_path and geo.zone_polygons_path != zone_polygons_path:
+        geo.load_zone_polygons(zone_polygons_path)
+
+
+_congestion_tracker = None
+_congestion_tracker_lock = threading.Lock()
+
+
+def get_congestion_tracker() -> CongestionTracker:
+    """Process-wide tracker read by the map and the shared routing engine; BITS_PINGS names a ping
+    source to follow (see open_ping_source) and BITS_PING_WORKERS its process pool size"""
+    global _congestion_tracker
+    with _congestion_tracker_lock:
+        if _congestion_tracker is None:
+            _congestion_tracker = CongestionTracker()
+            source = os.environ.get("BITS_PINGS")
+            if source:
+                _congestion_tracker.start_feed(source, int(os.environ.get("BITS_PING_WORKERS") or 0))
+        return _congestion_tracker
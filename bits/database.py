@@ -0,0 +1,707 @@
+"""
+===============================================================================
+BITS - Database Management (SQLite3)
+===============================================================================
+Pooled WAL connections, incident cache, pricing-history writer and bulk ingest
+===============================================================================
+"""
+
+import atexit
+import csv
+import json
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from itertools import count, islice
+from time import perf_counter
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from .geo import BaghdadGeographicalIntelligence
+from .metrics import get_metrics
+from .spatial import IncidentImpactIndex
+
+
+class QueryStats:
+    """Thread-safe per-query timing counters"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+    
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            entry = self._stats.setdefault(name, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            entry['count'] += 1
+            entry['total_ms'] += seconds * 1000
+            entry['max_ms'] = max(entry['max_ms'], seconds * 1000)
+    
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {name: {**entry, 'avg_ms': entry['total_ms'] / entry['count']}
+                    for name, entry in self._stats.items()}
+    
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+class SQLiteConnectionPool:
+    """Pool of persistent SQLite connections shared across threads (WAL journaling).
+    
+    An in-memory database (":memory:") exists only inside the connection that opened it, so it
+    gets one connection for the pool's lifetime, lent to one thread at a time.
+    """
+    
+    PRAGMAS = {
+        "journal_mode": "WAL",      # readers never block on the writer
+        "synchronous": "NORMAL",    # safe with WAL, avoids an fsync per commit
+        "cache_size": -16000,       # 16 MB page cache per connection
+        "temp_store": "MEMORY",
+    }
+    
+    def __init__(self, db_path: str, max_idle: int = 8, busy_timeout_ms: int = 5000):
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._idle = queue.LifoQueue(maxsize=max_idle)
+        self._closed = False
+        self.connections_opened = 0
+        self.in_memory = db_path == ":memory:"
+        self._memory_conn = None
+        self._memory_lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        for pragma, value in self.PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        self.connections_opened += 1
+        return conn
+    
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it is returned to the pool (not closed) afterwards"""
+        if self.in_memory:
+            with self._memory_lock:
+                if self._memory_conn is None:
+                    self._memory_conn = self._connect()
+                conn = self._memory_conn
+                try:
+                    yield conn
+                finally:
+                    if conn.in_transaction:
+                        conn.rollback()
+            return
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            if self._closed:
+                conn.close()
+            else:
+                try:
+                    self._idle.put_nowait(conn)
+                except queue.Full:
+                    conn.close()
+    
+    @property
+    def closed(self) -> bool:
+        return self._closed
+    
+    def close_all(self):
+        self._closed = True
+        with self._memory_lock:
+            if self._memory_conn is not None:
+                self._memory_conn.close()
+                self._memory_conn = None
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class IncidentSnapshot:
+    """Immutable view of the active incidents at one data version (treat contents as read-only)"""
+    
+    def __init__(self, version: int, incidents: List[Dict]):
+        self.version = version
+        self.incidents = incidents
+        self.by_zone: Dict[str, List[Dict]] = {}
+        for incident in incidents:
+            self.by_zone.setdefault(incident['zone'], []).append(incident)
+        self.critical = [i for i in incidents if i['severity'] == 'critical']
+        self.counts_by_zone = {zone: len(self.by_zone[zone]) for zone in sorted(self.by_zone)}
+        self._impact_index = None
+    
+    @property
+    def impact_index(self) -> IncidentImpactIndex:
+        """Grid index of these incidents for corridor impact scoring (built on first use per version)"""
+        if self._impact_index is None:
+            self._impact_index = IncidentImpactIndex(self.incidents)
+        return self._impact_index
+
+
+class IncidentCache:
+    """Process-wide cache of active incidents, invalidated by a data version.
+    
+    Writes through TrafficDatabase bump the version directly. Incident changes committed by other
+    processes are picked up by polling the trigger-maintained incident_data_version row at most
+    every CHANGE_CHECK_INTERVAL seconds, so reads in between cost no SQL at all. (PRAGMA
+    data_version would also move on every pricing_history batch and drop the cache for nothing.)
+    """
+    
+    CHANGE_CHECK_INTERVAL = 1.0
+    
+    _registry: Dict[str, "IncidentCache"] = {}
+    _registry_lock = threading.Lock()
+    
+    def __init__(self, db_path: str, loader):
+        self.db_path = db_path
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._version = 0
+        self._snapshot = None
+        self._watcher = None
+        self._watcher_lock = threading.Lock()
+        self._last_data_version = None
+        self._last_check = 0.0
+        self.hits = 0
+        self.misses = 0
+    
+    @classmethod
+    def for_database(cls, key: str, db_path: str, loader) -> "IncidentCache":
+        """Shared cache for a database (one per process), by TrafficDatabase.key"""
+        with cls._registry_lock:
+            cache = cls._registry.get(key)
+            if cache is None:
+                cache = cls._registry[key] = cls(db_path, loader)
+            return cache
+    
+    @property
+    def version(self) -> int:
+        return self._version
+    
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+    
+    def _data_version(self):
+        """Incident data version in the database file (None for in-memory databases, which only
+        this process can write)"""
+        if self.db_path == ":memory:":
+            return None
+        with self._watcher_lock:
+            if self._watcher is None:
+                self._watcher = sqlite3.connect(self.db_path, check_same_thread=False)
+            row = self._watcher.execute("SELECT version FROM incident_data_version WHERE id = 1").fetchone()
+            return row[0] if row else None
+    
+    def _check_external_changes(self):
+        now = perf_counter()
+        if self.db_path == ":memory:" or now - self._last_check < self.CHANGE_CHECK_INTERVAL:
+            return
+        self._last_check = now
+        data_version = self._data_version()
+        # Compared with the version the current snapshot was loaded at, so this process's own
+        # writes (already invalidated directly) do not cause a second reload
+        if self._last_data_version is not None and data_version != self._last_data_version:
+            self.invalidate()
+    
+    def snapshot(self) -> IncidentSnapshot:
+        self._check_external_changes()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self._version:
+            self.hits += 1
+            return snapshot
+        with self._lock:
+            version = self._version
+            if self._snapshot is None or self._snapshot.version != version:
+                self.misses += 1
+                # Read before loading: a write landing in between shows up as a change on the next check
+                self._last_data_version = self._data_version()
+                self._snapshot = IncidentSnapshot(version, self._loader())
+            return self._snapshot
+
+
+class PricingHistoryWriter:
+    """Background writer that batches pricing_history rows into executemany transactions.
+    
+    submit() never blocks the quote: when the queue is full the rows are dropped and counted.
+    Batches are flushed every BATCH_SIZE rows or FLUSH_INTERVAL seconds, whichever comes first.
+    close() (also run at interpreter exit) flushes everything still queued, or drops it with drain=False.
+    """
+    
+    BATCH_SIZE = 500
+    FLUSH_INTERVAL = 1.0
+    MAX_QUEUE = 50_000
+    
+    _STOP = object()
+    _registry: Dict[str, "PricingHistoryWriter"] = {}
+    _registry_lock = threading.Lock()
+    
+    def __init__(self, db: "TrafficDatabase", batch_size: int = None, flush_interval: float = None,
+                 max_queue: int = None):
+        self.db = db
+        self.batch_size = batch_size or self.BATCH_SIZE
+        self.flush_interval = flush_interval or self.FLUSH_INTERVAL
+        self._queue = queue.Queue(maxsize=max_queue or self.MAX_QUEUE)
+        self._counter_lock = threading.Lock()
+        self._closed = False
+        self._drain = True
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, name="pricing-history-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    @classmethod
+    def for_database(cls, db: "TrafficDatabase") -> "PricingHistoryWriter":
+        """Shared writer for a database (one per process), by TrafficDatabase.key"""
+        with cls._registry_lock:
+            writer = cls._registry.get(db.key)
+            if writer is None or writer._closed:
+                writer = cls._registry[db.key] = cls(db)
+            return writer
+    
+    def _count(self, field: str, n: int):
+        with self._counter_lock:
+            setattr(self, field, getattr(self, field) + n)
+    
+    def submit(self, rows: List[Tuple]) -> bool:
+        """Queue rows without waiting; returns False if they were dropped"""
+        if self._closed:
+            self._count('dropped', len(rows))
+            return False
+        try:
+            self._queue.put_nowait(rows)
+        except queue.Full:
+            self._count('dropped', len(rows))
+            return False
+        self._count('submitted', len(rows))
+        return True
+    
+    def _flush(self, batch: List[Tuple]):
+        if not batch:
+            return
+        try:
+            with self.db.query("write_pricing_history") as cursor:
+                cursor.executemany("""
+                    INSERT INTO pricing_history
+                    (origin_zone, destination_zone, base_price, final_price, route_type,
+                     distance_km, multiplier, weather, time_period)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, batch)
+            self._count('written', len(batch))
+            self._count('batches', 1)
+        except Exception as e:
+            print(f"Error writing pricing history: {e}")
+            self._count('dropped', len(batch))
+    
+    def _run(self):
+        batch: List[Tuple] = []
+        deadline = perf_counter() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - perf_counter()))
+            except queue.Empty:
+                item = None
+            
+            if item is self._STOP:
+                while True:
+                    try:
+                        rows = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if self._drain:
+                        batch.extend(rows)
+                    else:
+                        self._count('dropped', len(rows))
+                for start in range(0, len(batch), self.batch_size):
+                    self._flush(batch[start:start + self.batch_size])
+                return
+            
+            if item:
+                batch.extend(item)
+            if len(batch) >= self.batch_size or perf_counter() >= deadline:
+                self._flush(batch)
+                batch = []
+                deadline = perf_counter() + self.flush_interval
+    
+    def stats(self) -> Dict[str, int]:
+        with self._counter_lock:
+            return {'submitted': self.submitted, 'written': self.written, 'dropped': self.dropped,
+                    'batches': self.batches, 'queued': self._queue.qsize()}
+    
+    def close(self, drain: bool = True, timeout: float = 10.0):
+        """Stop the writer, flushing queued rows (drain=True) or dropping them"""
+        if self._closed:
+            return
+        self._closed = True
+        self._drain = drain
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+
+
+class TrafficDatabase:
+    """SQLite Database Manager for Active Road Incidents"""
+    
+    # Ordered schema migrations; PRAGMA user_version records the last one applied
+    SCHEMA_MIGRATIONS = [
+        (1, [
+            "CREATE INDEX IF NOT EXISTS idx_incidents_active_zone_severity "
+            "ON active_road_incidents (is_active, zone, severity)",
+        ]),
+        (2, [
+            "ALTER TABLE active_road_incidents ADD COLUMN external_id TEXT",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_incidents_external_id ON active_road_incidents (external_id)",
+        ]),
+        # Incident writes from any connection bump a counter that other writes (pricing_history) leave alone
+        (3, [
+            "CREATE TABLE IF NOT EXISTS incident_data_version "
+            "(id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)",
+            "INSERT OR IGNORE INTO incident_data_version (id, version) VALUES (1, 0)",
+            *(f"CREATE TRIGGER IF NOT EXISTS incident_data_version_{event.lower()} "
+              f"AFTER {event} ON active_road_incidents "
+              "BEGIN UPDATE incident_data_version SET version = version + 1 WHERE id = 1; END"
+              for event in ("INSERT", "UPDATE", "DELETE")),
+        ]),
+    ]
+    
+    INCIDENT_FIELDS = ("external_id", "zone", "incident_type", "severity", "description",
+                       "latitude", "longitude", "affected_road", "is_active")
+    # is_active spellings accepted from feeds (compared lower-cased); empty means active
+    BOOLEAN_VALUES = {"1": 1, "true": 1, "t": 1, "yes": 1, "y": 1,
+                      "0": 0, "false": 0, "f": 0, "no": 0, "n": 0}
+    
+    _registry: Dict[str, "TrafficDatabase"] = {}
+    _registry_lock = threading.Lock()
+    _memory_ids = count(1)
+    
+    def __init__(self, db_path: str = "bits_traffic.db"):
+        self.db_path = db_path
+        # Registry key of the per-database caches and writer: the file, or this private in-memory database
+        self.key = f":memory:#{next(self._memory_ids)}" if db_path == ":memory:" else os.path.abspath(db_path)
+        self.pool = SQLiteConnectionPool(db_path)
+        self.query_stats = QueryStats()
+        self.metrics = get_metrics()
+        self.init_database()
+        self.incident_cache = IncidentCache.for_database(self.key, db_path, self._load_active_incidents)
+    
+    @classmethod
+    def for_path(cls, db_path: str = "bits_traffic.db") -> "TrafficDatabase":
+        """Shared database for a file (one per process): schema setup and the connection pool are paid
+        once, however many sessions or threads use it; a closed one is replaced on the next call"""
+        key = db_path if db_path == ":memory:" else os.path.abspath(db_path)
+        with cls._registry_lock:
+            db = cls._registry.get(key)
+            if db is None or db.pool.closed:
+                db = cls._registry[key] = cls(db_path)
+            return db
+    
+    @contextmanager
+    def query(self, name: str):
+        """Timed cursor on a pooled connection; commits on success, rolls back on error"""
+        start = perf_counter()
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    yield cursor
+                    conn.commit()
+                finally:
+                    cursor.close()
+        finally:
+            elapsed = perf_counter() - start
+            self.query_stats.record(name, elapsed)
+            if self.metrics.enabled:
+                self.metrics.observe(f"db.{name}", elapsed)
+    
+    def get_query_stats(self) -> Dict[str, Dict]:
+        """Per-query count/total/avg/max in milliseconds"""
+        return self.query_stats.snapshot()
+    
+    def close(self):
+        self.pool.close_all()
+    
+    def init_database(self):
+        """Initialize database schema"""
+        with self.query("init_database") as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS active_road_incidents (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    zone TEXT NOT NULL,
+                    incident_type TEXT NOT NULL,
+                    severity TEXT NOT NULL,
+                    description TEXT,
+                    latitude REAL,
+                    longitude REAL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    is_active INTEGER DEFAULT 1,
+                    affected_road TEXT
+                )
+            """)
+            
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS pricing_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    origin_zone TEXT NOT NULL,
+                    destination_zone TEXT NOT NULL,
+                    base_price REAL,
+                    final_price REAL,
+                    route_type TEXT,
+                    distance_km REAL,
+                    multiplier REAL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    weather TEXT,
+                    time_period TEXT
+                )
+            """)
+            
+            self._migrate(cursor)
+            
+            cursor.execute("SELECT COUNT(*) FROM active_road_incidents")
+            if cursor.fetchone()[0] == 0:
+                sample_incidents = [
+                    ("المنصور", "road_closure", "high", "اغلاق جزئي للطريق", 33.3209, 44.3661, "شارع الجزائر"),
+                    ("الكرادة", "construction", "medium", "اعمال بناء", 33.3156, 44.4012, "شارع كراده"),
+                    ("الجادرية", "accident", "high", "حادث مروري", 33.3089, 44.3432, "جسر الجادرية"),
+                    ("الأعظمية", "road_closure", "critical", "اغلاق كامل", 33.3428, 44.3278, "شارع الأعظمية"),
+                ]
+                cursor.executemany("""
+                    INSERT INTO active_road_incidents 
+                    (zone, incident_type, severity, description, latitude, longitude, affected_road)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, sample_incidents)
+    
+    def _migrate(self, cursor):
+        """Bring existing database files up to the latest schema version.
+        
+        Each migration and its user_version bump commit together in one IMMEDIATE transaction, and
+        the version is re-read once the write lock is held: a process that lost the race to another,
+        or restarts after a crash mid-migration, never applies a migration twice.
+        """
+        conn = cursor.connection
+        for version, statements in self.SCHEMA_MIGRATIONS:
+            cursor.execute("PRAGMA user_version")
+            if cursor.fetchone()[0] >= version:
+                continue
+            if conn.in_transaction:
+                conn.commit()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.execute("PRAGMA user_version")
+                if cursor.fetchone()[0] < version:
+                    for statement in statements:
+                        cursor.execute(statement)
+                    cursor.execute(f"PRAGMA user_version = {int(version)}")
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+    
+    def get_active_incidents(self) -> List[Dict]:
+        return list(self.incident_cache.snapshot().incidents)
+    
+    def get_incidents_by_zone(self) -> Dict[str, List[Dict]]:
+        return self.incident_cache.snapshot().by_zone
+    
+    def get_critical_incidents(self) -> List[Dict]:
+        return list(self.incident_cache.snapshot().critical)
+    
+    def _load_active_incidents(self) -> List[Dict]:
+        with self.query("get_active_incidents") as cursor:
+            cursor.execute("""
+                SELECT id, zone, incident_type, severity, description, 
+                       latitude, longitude, affected_road, created_at
+                FROM active_road_incidents 
+                WHERE is_active = 1
+                ORDER BY CASE severity
+                    WHEN 'critical' THEN 1
+                    WHEN 'high' THEN 2
+                    WHEN 'medium' THEN 3
+                    ELSE 4
+                END
+            """)
+            incidents = []
+            for row in cursor.fetchall():
+                incidents.append({
+                    'id': row[0], 'zone': row[1], 'incident_type': row[2],
+                    'severity': row[3], 'description': row[4],
+                    'latitude': row[5], 'longitude': row[6],
+                    'affected_road': row[7], 'created_at': row[8]
+                })
+        return incidents
+    
+    def add_incident(self, zone: str, incident_type: str, severity: str, 
+                    description: str, latitude: float, longitude: float, affected_road: str) -> bool:
+        try:
+            with self.query("add_incident") as cursor:
+                cursor.execute("""
+                    INSERT INTO active_road_incidents 
+                    (zone, incident_type, severity, description, latitude, longitude, affected_road)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (zone, incident_type, severity, description, latitude, longitude, affected_road))
+            self.incident_cache.invalidate()
+            return True
+        except Exception as e:
+            print(f"Error adding incident: {e}")
+            return False
+    
+    def remove_incident(self, incident_id: int) -> bool:
+        try:
+            with self.query("remove_incident") as cursor:
+                cursor.execute("UPDATE active_road_incidents SET is_active = 0 WHERE id = ?", (incident_id,))
+            self.incident_cache.invalidate()
+            return True
+        except Exception as e:
+            print(f"Error removing incident: {e}")
+            return False
+    
+    def get_incident_count_by_zone(self) -> Dict[str, int]:
+        return dict(self.incident_cache.snapshot().counts_by_zone)
+    
+    @classmethod
+    def _incident_row(cls, record: Dict) -> Tuple:
+        """Normalize a feed record (dict, CSV strings allowed) into an insert row (ValueError if malformed)"""
+        row = {field: record.get(field) for field in cls.INCIDENT_FIELDS}
+        for field in ("zone", "incident_type", "severity"):
+            if row[field] is None or not str(row[field]).strip():
+                raise ValueError(f"incident record is missing {field!r}")
+        for field in ("external_id", "description", "affected_road"):
+            if row[field] == "":
+                row[field] = None
+        for field in ("latitude", "longitude"):
+            row[field] = float(row[field]) if row[field] not in (None, "") else None
+        if row["latitude"] is None or row["longitude"] is None:
+            zone_data = BaghdadGeographicalIntelligence.ZONES.get(row["zone"], {})
+            center = BaghdadGeographicalIntelligence.BAGHDAD_CENTER
+            row["latitude"] = zone_data.get('lat', center[0]) if row["latitude"] is None else row["latitude"]
+            row["longitude"] = zone_data.get('lon', center[1]) if row["longitude"] is None else row["longitude"]
+        row["is_active"] = cls._parse_active(row["is_active"])
+        return tuple(row[field] for field in cls.INCIDENT_FIELDS)
+    
+    @classmethod
+    def _parse_active(cls, value) -> int:
+        if value is None or value == "":
+            return 1
+        if isinstance(value, (bool, int, float)) and value in (0, 1):
+            return int(value)
+        parsed = cls.BOOLEAN_VALUES.get(str(value).strip().lower())
+        if parsed is None:
+            raise ValueError(f"is_active must be a boolean, got {value!r}")
+        return parsed
+    
+    @staticmethod
+    def _chunks(iterable: Iterable, size: int) -> Iterator[List]:
+        iterator = iter(iterable)
+        while True:
+            chunk = list(islice(iterator, size))
+            if not chunk:
+                return
+            yield chunk
+    
+    def bulk_ingest_incidents(self, records: Iterable[Dict], chunk_size: int = 5000) -> Dict[str, float]:
+        """Stream incidents into the table, upserting on external_id, one transaction per chunk.
+        
+        Memory stays bounded by chunk_size however long the iterable is. Malformed records (no zone,
+        type or severity, bad coordinates or is_active) are skipped and counted rather than failing
+        their chunk.
+        """
+        start = perf_counter()
+        rows = skipped = 0
+        for chunk in self._chunks(records, chunk_size):
+            insert_rows = []
+            for record in chunk:
+                try:
+                    insert_rows.append(self._incident_row(record))
+                except (TypeError, ValueError):
+                    skipped += 1
+            if not insert_rows:
+                continue
+            with self.query("bulk_ingest_incidents") as cursor:
+                cursor.executemany("""
+                    INSERT INTO active_road_incidents
+                    (external_id, zone, incident_type, severity, description,
+                     latitude, longitude, affected_road, is_active)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(external_id) DO UPDATE SET
+                        zone = excluded.zone, incident_type = excluded.incident_type,
+                        severity = excluded.severity, description = excluded.description,
+                        latitude = excluded.latitude, longitude = excluded.longitude,
+                        affected_road = excluded.affected_road, is_active = excluded.is_active
+                """, insert_rows)
+            rows += len(insert_rows)
+            self.incident_cache.invalidate()
+        return {**self._throughput(rows, perf_counter() - start), 'skipped': skipped}
+    
+    def bulk_deactivate_incidents(self, external_ids: Iterable[str], chunk_size: int = 5000) -> Dict[str, float]:
+        """Deactivate incidents by external_id, one transaction per chunk (rows counts the incidents
+        found, not the ids given)"""
+        start = perf_counter()
+        rows = 0
+        for chunk in self._chunks(external_ids, chunk_size):
+            with self.query("bulk_deactivate_incidents") as cursor:
+                cursor.executemany("UPDATE active_road_incidents SET is_active = 0 WHERE external_id = ?",
+                                   [(str(external_id),) for external_id in chunk])
+                rows += cursor.rowcount
+            self.incident_cache.invalidate()
+        return self._throughput(rows, perf_counter() - start)
+    
+    @staticmethod
+    def iter_incident_file(path: str) -> Iterator[Dict]:
+        """Lazily read incident records from a .csv (header row) or .jsonl file"""
+        with open(path, encoding='utf-8', newline='') as f:
+            if path.lower().endswith('.csv'):
+                yield from csv.DictReader(f)
+            else:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+    
+    def ingest_incident_file(self, path: str, chunk_size: int = 5000) -> Dict[str, float]:
+        return self.bulk_ingest_incidents(self.iter_incident_file(path), chunk_size)
+    
+    @staticmethod
+    def _throughput(rows: int, seconds: float) -> Dict[str, float]:
+        return {'rows': rows, 'seconds': seconds, 'rows_per_sec': rows / seconds if seconds > 0 else 0.0}
+    
+    def get_pricing_writer(self) -> PricingHistoryWriter:
+        return PricingHistoryWriter.for_database(self)
+    
+    def record_pricing(self, rows: List[Tuple]) -> bool:
+        """Queue pricing_history rows for the background writer (never blocks)"""
+        return self.get_pricing_writer().submit(rows)
+    
+    def count_active_incidents_in_zones(self, zones: List[str]) -> int:
+        """Indexed count of active incidents in the given zones (no rows are fetched)"""
+        zones = list(dict.fromkeys(zones))
+        if not zones:
+            return 0
+        with self.query("count_active_incidents_in_zones") as cursor:
+            cursor.execute(f"""
+                SELECT COUNT(*) FROM active_road_incidents
+                WHERE is_active = 1 AND zone IN ({", ".join("?" * len(zones))})
+            """, zones)
+            return cursor.fetchone()[0]
+    
+    def count_active_incidents_by_severity(self, zones: List[str] = None) -> Dict[str, int]:
+        """Indexed per-severity count of active incidents, optionally limited to some zones"""
+        sql = "SELECT severity, COUNT(*) FROM active_road_incidents WHERE is_active = 1"
+        params: List[str] = []
+        if zones is not None:
+            params = list(dict.fromkeys(zones))
+            if not params:
+                return {}
+            sql += f" AND zone IN ({', '.join('?' * len(params))})"
+        with self.query("count_active_incidents_by_severity") as cursor:
+            cursor.execute(sql + " GROUP BY severity", params)
+            return {row[0]: row[1] for row in cursor.fetchall()}
@@ -0,0 +1,176 @@
+"""
+===============================================================================
+BITS - Dispatch Matching
+===============================================================================
+Assigns available drivers to open orders in batches, minimizing pickup
+distance: optimal assignment for small batches, grid-pruned greedy for large
+===============================================================================
+"""
+
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from .geo import BaghdadGeographicalIntelligence
+from .spatial import GridIndex, project
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # optional; _min_cost_assignment is used instead
+    linear_sum_assignment = None
+
+
+def _min_cost_assignment(cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(rows, cols) of a minimum-cost assignment for a matrix with rows <= cols.
+
+    Shortest augmenting path with row/column potentials (Hungarian method), one row at a time;
+    each step is vectorized over the columns.
+    """
+    n, m = cost.shape
+    u, v = np.zeros(n + 1), np.zeros(m + 1)
+    # owner[j]: 1-based row assigned to column j (0: free); column 0 is the augmenting root
+    owner = np.zeros(m + 1, dtype=np.int64)
+    way = np.zeros(m + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        owner[0] = i
+        j0 = 0
+        min_reduced = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = ~used[1:] & (reduced < min_reduced[1:])
+            min_reduced[1:][better] = reduced[better]
+            way[1:][better] = j0
+            candidates = np.where(used[1:], np.inf, min_reduced[1:])
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+            u[owner[used]] += delta
+            v[used] -= delta
+            min_reduced[~used] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+    cols = np.nonzero(owner[1:])[0]
+    return owner[1:][cols] - 1, cols
+
+
+class DispatchMatcher:
+    """Batch driver-to-order matching on pickup distance.
+
+    Batches up to OPTIMAL_MAX_PAIRS driver x order pairs get a minimum total distance assignment.
+    Larger ones are matched greedily, shortest pickup first, over candidate pairs from a grid index
+    of the drivers: the search radius starts where SEARCH_CANDIDATES drivers are expected and
+    doubles for whoever is left, up to max_pickup_km. Orders with no driver within max_pickup_km
+    stay unmatched.
+    """
+
+    OPTIMAL_MAX_PAIRS = 90_000
+    # First search radius holds about this many drivers per order at the batch's driver density
+    SEARCH_CANDIDATES = 6
+    MAX_PICKUP_KM = 15.0
+    # Road distance / straight-line distance, and average pickup speed (as the economic route)
+    ROAD_FACTOR = 1.2
+    PICKUP_SPEED_KMH = 25.0
+
+    def __init__(self, max_pickup_km: float = None, optimal_max_pairs: int = None):
+        self.max_pickup_km = max_pickup_km or self.MAX_PICKUP_KM
+        self.optimal_max_pairs = self.OPTIMAL_MAX_PAIRS if optimal_max_pairs is None else optimal_max_pairs
+
+    def match(self, driver_lats, driver_lons, order_lats, order_lons) -> pd.DataFrame:
+        """One row per assignment: driver and order (input positions), pickup_km, eta_minutes and the
+        order's zone, sorted by order. attrs holds the method and the unmatched counts."""
+        driver_lats, driver_lons = np.asarray(driver_lats, dtype=float), np.asarray(driver_lons, dtype=float)
+        order_lats, order_lons = np.asarray(order_lats, dtype=float), np.asarray(order_lons, dtype=float)
+        if driver_lats.shape != driver_lons.shape or order_lats.shape != order_lons.shape:
+            raise ValueError("lat and lon arrays must have the same length")
+
+        n_drivers, n_orders = len(driver_lats), len(order_lats)
+        if n_drivers == 0 or n_orders == 0:
+            method = "none"
+            drivers = orders = np.empty(0, dtype=np.int64)
+            distance = np.empty(0)
+        elif n_drivers * n_orders <= self.optimal_max_pairs:
+            method = "optimal"
+            drivers, orders, distance = self._optimal(driver_lats, driver_lons, order_lats, order_lons)
+        else:
+            method = "greedy"
+            drivers, orders, distance = self._greedy(driver_lats, driver_lons, order_lats, order_lons)
+
+        by_order = np.argsort(orders, kind="stable")
+        drivers, orders, distance = drivers[by_order], orders[by_order], distance[by_order]
+        result = pd.DataFrame({
+            'driver': drivers,
+            'order': orders,
+            'pickup_km': distance,
+            'eta_minutes': distance * self.ROAD_FACTOR / self.PICKUP_SPEED_KMH * 60,
+            'order_zone': BaghdadGeographicalIntelligence.bulk_reverse_geocode(
+                order_lats[orders], order_lons[orders])['zone'].to_numpy(),
+        })
+        result.attrs.update(method=method, unmatched_orders=n_orders - len(orders),
+                            unmatched_drivers=n_drivers - len(drivers))
+        return result
+
+    def _optimal(self, driver_lats, driver_lons, order_lats, order_lons):
+        dx, dy = project(driver_lats, driver_lons)
+        ox, oy = project(order_lats, order_lons)
+        distance = np.hypot(dx[:, None] - ox[None, :], dy[:, None] - oy[None, :])
+        # Pairs beyond the pickup limit cost more than any assignment of allowed pairs
+        cost = np.where(distance <= self.max_pickup_km, distance, self.max_pickup_km * (min(distance.shape) + 1))
+        if linear_sum_assignment is not None:
+            drivers, orders = linear_sum_assignment(cost)
+        elif cost.shape[0] <= cost.shape[1]:
+            drivers, orders = _min_cost_assignment(cost)
+        else:
+            orders, drivers = _min_cost_assignment(cost.T)
+        drivers, orders = np.asarray(drivers, dtype=np.int64), np.asarray(orders, dtype=np.int64)
+        allowed = distance[drivers, orders] <= self.max_pickup_km
+        return drivers[allowed], orders[allowed], distance[drivers, orders][allowed]
+
+    def _greedy(self, driver_lats, driver_lons, order_lats, order_lons):
+        free_drivers = np.arange(len(driver_lats))
+        free_orders = np.arange(len(order_lats))
+        matched = []
+        x, y = project(driver_lats, driver_lons)
+        area = max(np.ptp(x) * np.ptp(y), 1.0)
+        radius = max(np.sqrt(area / len(driver_lats) * self.SEARCH_CANDIDATES / np.pi), 0.05)
+        while len(free_drivers) and len(free_orders):
+            radius = min(radius, self.max_pickup_km)
+            index = GridIndex(driver_lats[free_drivers], driver_lons[free_drivers], cell_km=radius)
+            query, point, distance = index.pairs_within(order_lats[free_orders], order_lons[free_orders], radius)
+            by_distance = np.argsort(distance, kind="stable")
+            orders, drivers = free_orders[query[by_distance]], free_drivers[point[by_distance]]
+            distance = distance[by_distance]
+            order_done = np.zeros(len(order_lats), dtype=bool)
+            driver_done = np.zeros(len(driver_lats), dtype=bool)
+            order_first = np.empty(len(order_lats), dtype=np.int64)
+            driver_first = np.empty(len(driver_lats), dtype=np.int64)
+            while len(orders):
+                # A pair that is the shortest remaining for both its order and its driver is the one
+                # sequential shortest-first greedy would take; accept all such pairs at once
+                rank = np.arange(len(orders))
+                order_first[orders] = len(orders)
+                driver_first[drivers] = len(orders)
+                np.minimum.at(order_first, orders, rank)
+                np.minimum.at(driver_first, drivers, rank)
+                mutual = (order_first[orders] == rank) & (driver_first[drivers] == rank)
+                matched.append((drivers[mutual], orders[mutual], distance[mutual]))
+                order_done[orders[mutual]] = True
+                driver_done[drivers[mutual]] = True
+                open_pairs = ~(order_done[orders] | driver_done[drivers])
+                orders, drivers, distance = orders[open_pairs], drivers[open_pairs], distance[open_pairs]
+            free_orders = free_orders[~order_done[free_orders]]
+            free_drivers = free_drivers[~driver_done[free_drivers]]
+            if radius >= self.max_pickup_km:
+                break
+            radius *= 2
+        if not matched:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+        drivers, orders, distance = (np.concatenate(parts) for parts in zip(*matched))
+        return drivers, orders, distance
@@ -0,0 +1,144 @@
+"""
+===============================================================================
+BITS - Environment Snapshots
+===============================================================================
+Weather, peak hour, time period and pricing multipliers, computed once per
+interval and shared by every session, from a pluggable weather provider
+===============================================================================
+"""
+
+import json
+import os
+import random
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict
+
+from .automation import AutomationEngine
+from .simulation import Simulation
+
+
+class WeatherProvider(ABC):
+    """Source of the current weather condition (a key of AutomationEngine.WEATHER_CONDITIONS)"""
+
+    name = "provider"
+
+    @abstractmethod
+    def current_weather(self, now: datetime) -> str:
+        """Weather condition at `now`"""
+
+
+class SimulatedWeatherProvider(WeatherProvider):
+    """Draws from AutomationEngine.simulate_weather (seeded rng for repeatable runs)"""
+
+    name = "simulator"
+
+    def __init__(self, rng: random.Random = None):
+        self.rng = rng
+
+    def current_weather(self, now: datetime) -> str:
+        return AutomationEngine.simulate_weather(self.rng)
+
+
+class FileWeatherProvider(WeatherProvider):
+    """Reads {"weather": "<condition>"} from a local JSON file, a stand-in for a live feed"""
+
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def current_weather(self, now: datetime) -> str:
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        weather = data.get("weather") if isinstance(data, dict) else None
+        if not isinstance(weather, str) or weather not in AutomationEngine.WEATHER_CONDITIONS:
+            raise ValueError(f"unknown weather condition {weather!r} in {self.path}")
+        return weather
+
+
+class EnvironmentSnapshot:
+    """Conditions for one interval (treat as read-only)"""
+
+    def __init__(self, interval: int, observed_at: datetime, weather: str, source: str):
+        self.interval = interval
+        self.observed_at = observed_at
+        self.weather = weather
+        self.source = source
+        self.weather_multiplier = AutomationEngine.get_weather_multiplier(weather)
+        self.is_rain = "مطر" in weather
+        self.is_peak = AutomationEngine.is_peak_hour(observed_at)
+        self.time_multiplier = AutomationEngine.PEAK_MULTIPLIER if self.is_peak else 1.0
+        self.total_multiplier = self.weather_multiplier * self.time_multiplier
+        self.time_period = AutomationEngine.get_time_period(observed_at)
+
+    def to_dict(self) -> Dict:
+        return {
+            "weather": self.weather, "weather_multiplier": self.weather_multiplier, "is_rain": self.is_rain,
+            "is_peak": self.is_peak, "time_multiplier": self.time_multiplier,
+            "total_multiplier": self.total_multiplier, "time_period": self.time_period,
+            "observed_at": self.observed_at.isoformat(timespec="seconds"), "source": self.source,
+        }
+
+
+class EnvironmentService:
+    """TTL cache of EnvironmentSnapshot shared across sessions and threads.
+
+    Time is cut into TTL-second intervals and the provider is asked once per interval, so every
+    caller in the same interval (wall clock or simulated) gets the same weather and multipliers.
+    If the provider fails, the previous weather is kept until it recovers.
+    """
+
+    TTL = 300.0
+    FALLBACK_WEATHER = "صافٍ"
+
+    def __init__(self, provider: WeatherProvider = None, ttl: float = None):
+        self.provider = provider if provider is not None else SimulatedWeatherProvider()
+        self.ttl = ttl or self.TTL
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self.refreshes = 0
+        self.provider_errors = 0
+
+    def snapshot(self, now: datetime = None) -> EnvironmentSnapshot:
+        now = now or datetime.now()
+        interval = int(now.timestamp() // self.ttl)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.interval == interval:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None or self._snapshot.interval != interval:
+                self._snapshot = self._refresh(interval, now)
+            return self._snapshot
+
+    def _refresh(self, interval: int, now: datetime) -> EnvironmentSnapshot:
+        self.refreshes += 1
+        try:
+            return EnvironmentSnapshot(interval, now, self.provider.current_weather(now), self.provider.name)
+        # TypeError too: a provider handed a payload of the wrong shape must not take pricing down
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.provider_errors += 1
+            print(f"Weather provider {self.provider.name} failed ({e}); keeping the last conditions")
+            weather = self._snapshot.weather if self._snapshot is not None else self.FALLBACK_WEATHER
+            return EnvironmentSnapshot(interval, now, weather, f"{self.provider.name} (stale)")
+
+
+_environment_service = None
+_environment_service_lock = threading.Lock()
+
+
+def get_environment_service() -> EnvironmentService:
+    """Process-wide service: weather from BITS_WEATHER_FILE if set, else the simulator (seeded by
+    BITS_SEED); BITS_ENV_TTL overrides the interval in seconds"""
+    global _environment_service
+    with _environment_service_lock:
+        if _environment_service is None:
+            weather_file = os.environ.get("BITS_WEATHER_FILE")
+            if weather_file:
+                provider = FileWeatherProvider(weather_file)
+            else:
+                provider = SimulatedWeatherProvider(Simulation.from_env().stream("weather"))
+            ttl = os.environ.get("BITS_ENV_TTL")
+            _environment_service = EnvironmentService(provider, float(ttl) if ttl else None)
+        return _environment_service
@@ -0,0 +1,440 @@
+"""
+===============================================================================
+BITS - Baghdad Geographical Intelligence
+===============================================================================
+Zone catalog, distance matrix cache, and reverse geocoding by zone polygon
+(when loaded) with the grid-indexed nearest centroid as the fallback
+===============================================================================
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .catalog import HotspotCatalog, ZoneCatalog
+
+
+class BaghdadGeographicalIntelligence:
+    """Comprehensive Baghdad Zones Dictionary with coordinates"""
+    
+    # Built-in catalogs (catalog.Catalog: columns behind the {name: {field: value}} mapping);
+    # load_zone_catalog() and load_hotspots() replace them from data files
+    ZONES = ZoneCatalog.from_records({
+        # KARKH (Western Baghdad)
+        "الكاظمية": {"region": "Karkh", "type": "historical", "lat": 33.3428, "lon": 44.3278, "typical_demand": "medium", "base_price": 3500, "icon": "🕌"},
+        "الزعفرانية": {"region": "Karkh", "type": "residential", "lat": 33.2987, "lon": 44.3456, "typical_demand": "high", "base_price": 3000, "icon": "🏘️"},
+        "حيبس": {"region": "Karkh", "type": "residential", "lat": 33.2856, "lon": 44.3534, "typical_demand": "medium", "base_price": 2800, "icon": "🏠"},
+        "الدورة": {"region": "Karkh", "type": "industrial", "lat": 33.2834, "lon": 44.3712, "typical_demand": "medium", "base_price": 3200, "icon": "🏭"},
+        "التاجي": {"region": "Karkh", "type": "suburban", "lat": 33.2656, "lon": 44.3289, "typical_demand": "low", "base_price": 2500, "icon": "🌾"},
+        
+        # RUSAFA (Eastern Baghdad)
+        "الكرادة": {"region": "Rusafa", "type": "commercial", "lat": 33.3156, "lon": 44.4012, "typical_demand": "very_high", "base_price": 4500, "icon": "🛒"},
+        "oley": {"region": "Rusafa", "type": "residential", "lat": 33.3289, "lon": 44.3923, "typical_demand": "high", "base_price": 3800, "icon": "🏠"},
+        "المزة": {"region": "Rusafa", "type": "upscale_residential", "lat": 33.3456, "lon": 44.4123, "typical_demand": "high", "base_price": 4200, "icon": "🏰"},
+        "اليرموك": {"region": "Rusafa", "type": "residential", "lat": 33.3123, "lon": 44.4234, "typical_demand": "medium", "base_price": 3200, "icon": "🏘️"},
+        "سبع ابكار": {"region": "Rusafa", "type": "residential", "lat": 33.3356, "lon": 44.4089, "typical_demand": "medium", "base_price": 3000, "icon": "🏡"},
+        
+        # CENTER (Downtown Baghdad)
+        "المنصور": {"region": "Center", "type": "commercial", "lat": 33.3209, "lon": 44.3661, "typical_demand": "very_high", "base_price": 5000, "icon": "🏛️"},
+        "الجادرية": {"region": "Center", "type": "business", "lat": 33.3089, "lon": 44.3432, "typical_demand": "very_high", "base_price": 4800, "icon": "🏢"},
+        "الأعظمية": {"region": "Center", "type": "historical", "lat": 33.3428, "lon": 44.3278, "typical_demand": "high", "base_price": 4000, "icon": "🕌"},
+        "شارع الرشيد": {"region": "Center", "type": "commercial", "lat": 33.3150, "lon": 44.3600, "typical_demand": "very_high", "base_price": 5500, "icon": "🛣️"},
+        "السعدون": {"region": "Center", "type": "commercial", "lat": 33.3180, "lon": 44.3680, "typical_demand": "very_high", "base_price": 5200, "icon": "🏪"},
+        
+        # SUBURBS (Outer Areas)
+        "الوزيرية": {"region": "Suburbs", "type": "residential", "lat": 33.3312, "lon": 44.3845, "typical_demand": "medium", "base_price": 2800, "icon": "🏘️"},
+        "حي الجامعة": {"region": "Suburbs", "type": "educational", "lat": 33.3056, "lon": 44.3567, "typical_demand": "medium", "base_price": 3000, "icon": "🎓"},
+        "البياع": {"region": "Suburbs", "type": "suburban", "lat": 33.2456, "lon": 44.3656, "typical_demand": "low", "base_price": 2200, "icon": "🌳"},
+        "ابي غريب": {"region": "Suburbs", "type": "suburban", "lat": 33.2567, "lon": 44.3890, "typical_demand": "low", "base_price": 2100, "icon": "🏕️"},
+        "المحمدية": {"region": "Suburbs", "type": "residential", "lat": 33.2890, "lon": 44.4123, "typical_demand": "low", "base_price": 2400, "icon": "🏡"},
+        "الصدر": {"region": "Suburbs", "type": "residential", "lat": 33.3567, "lon": 44.3890, "typical_demand": "medium", "base_price": 2900, "icon": "🏘️"},
+        "طريقيث": {"region": "Suburbs", "type": "suburban", "lat": 33.2234, "lon": 44.3567, "typical_demand": "low", "base_price": 2000, "icon": "🌾"},
+    })
+    
+    TRAFFIC_HOTSPOTS = HotspotCatalog.from_records({
+        "شارع فلسطين": {"lat": 33.3256, "lon": 44.4056, "congestion_level": "critical"},
+        "جسر السنك": {"lat": 33.3189, "lon": 44.3612, "congestion_level": "high"},
+        "جسر尔德": {"lat": 33.3123, "lon": 44.3589, "congestion_level": "high"},
+        "تقاطع liberty": {"lat": 33.3289, "lon": 44.3989, "congestion_level": "medium"},
+        "المنصور تقاطع": {"lat": 33.3212, "lon": 44.3656, "congestion_level": "critical"},
+    })
+    
+    # Fallback location for unknown zones
+    BAGHDAD_CENTER = (33.3128, 44.3615)
+    
+    # Spatial index tuning for reverse geocoding
+    SPATIAL_CELL_KM = 0.5
+    SPATIAL_MARGIN_KM = 10.0
+    BULK_CHUNK_SIZE = 1_000_000
+    
+    # Zone matrix cache: rebuilt whenever ZONES is replaced or resized, or set_zones() bumps the version
+    _zones_version = 0
+    _zone_cache = None
+    
+    # Zone boundaries (spatial.PolygonIndex) from load_zone_polygons; None: centroids only
+    _zone_polygons = None
+    zone_polygons_path = None
+    
+    # Catalog files from load_zone_catalog/load_hotspots, re-read when their mtime changes
+    # (checked at most every RELOAD_CHECK_SECONDS, from get_zone_cache)
+    RELOAD_CHECK_SECONDS = 5.0
+    zone_catalog_path = None
+    hotspot_catalog_path = None
+    _catalog_mtimes = {}
+    _reload_checked = 0.0
+    _reload_lock = threading.Lock()
+    
+    @classmethod
+    def get_zone_by_coordinates(cls, lat: float, lon: float) -> Tuple[str, str]:
+        """Reverse Geocoding Simulation: Find nearest zone"""
+        nearest_zone, nearest_region, _ = cls.get_nearest_zone(lat, lon)
+        return nearest_zone, nearest_region
+    
+    @classmethod
+    def get_nearest_zone(cls, lat: float, lon: float) -> Tuple[str, str, float]:
+        """Zone containing the point (distance 0) when zone polygons are loaded, else the nearest
+        zone centroid, with its region and the distance to it (km)"""
+        cache = cls.get_zone_cache()
+        nearest, distances = cls._nearest_zone_indices(np.array([lat]), np.array([lon]))
+        if nearest[0] < 0:
+            return "غير معروف", "غير معروف", float('inf')
+        return cache['names'][nearest[0]], cache['regions'][nearest[0]], float(distances[0])
+    
+    @classmethod
+    def bulk_reverse_geocode(cls, lats, lons) -> pd.DataFrame:
+        """Reverse geocode arrays of points: zone, region (categorical) and distance_km per point
+        (0 inside a zone polygon)"""
+        lats = np.asarray(lats, dtype=float).ravel()
+        lons = np.asarray(lons, dtype=float).ravel()
+        if lats.shape != lons.shape:
+            raise ValueError("lats and lons must have the same length")
+        
+        nearest = np.empty(len(lats), dtype=np.intp)
+        distances = np.empty(len(lats), dtype=float)
+        for start in range(0, len(lats), cls.BULK_CHUNK_SIZE):
+            chunk = slice(start, start + cls.BULK_CHUNK_SIZE)
+            nearest[chunk], distances[chunk] = cls._nearest_zone_indices(lats[chunk], lons[chunk])
+        
+        cache = cls.get_zone_cache()
+        unknown = len(cache['names'])
+        region_names = list(dict.fromkeys(cache['regions']))
+        zone_region_codes = np.array([region_names.index(r) for r in cache['regions']] + [len(region_names)],
+                                     dtype=np.intp)
+        zone_codes = np.where(nearest < 0, unknown, nearest)
+        return pd.DataFrame({
+            'zone': pd.Categorical.from_codes(zone_codes, cache['names'] + ["غير معروف"]),
+            'region': pd.Categorical.from_codes(zone_region_codes[zone_codes], region_names + ["غير معروف"]),
+            'distance_km': distances,
+        })
+    
+    @classmethod
+    def get_spatial_index(cls) -> Dict:
+        """Uniform grid over projected zone coordinates, built lazily once per zone table.
+        
+        Each cell keeps every zone that can be nearest to some point inside it, so a lookup
+        only evaluates the haversine for those few candidates.
+        """
+        cache = cls.get_zone_cache()
+        index = cache.get('spatial_index')
+        if index is None:
+            index = cls._build_spatial_index(cache['lats'][:-1], cache['lons'][:-1])
+            cache['spatial_index'] = index
+        return index
+    
+    @staticmethod
+    def _project(lats, lons, origin: Tuple[float, float]) -> Tuple[np.ndarray, np.ndarray]:
+        """Equirectangular projection to km around origin"""
+        x = np.radians(np.subtract(lons, origin[1])) * 6371 * math.cos(math.radians(origin[0]))
+        y = np.radians(np.subtract(lats, origin[0])) * 6371
+        return x, y
+    
+    @classmethod
+    def _build_spatial_index(cls, zone_lats: np.ndarray, zone_lons: np.ndarray) -> Dict:
+        if len(zone_lats) == 0:
+            return {'candidates': np.empty((0, 0), dtype=np.intp), 'nx': 0, 'ny': 0,
+                    'x0': 0.0, 'y0': 0.0, 'cell': cls.SPATIAL_CELL_KM, 'origin': cls.BAGHDAD_CENTER}
+        
+        origin = (float(zone_lats.mean()), float(zone_lons.mean()))
+        zone_x, zone_y = cls._project(zone_lats, zone_lons, origin)
+        cell, margin = cls.SPATIAL_CELL_KM, cls.SPATIAL_MARGIN_KM
+        x0, y0 = zone_x.min() - margin, zone_y.min() - margin
+        nx = int(math.ceil((zone_x.max() + margin - x0) / cell))
+        ny = int(math.ceil((zone_y.max() + margin - y0) / cell))
+        
+        cell_x0 = x0 + np.arange(nx) * cell
+        cell_y0 = y0 + np.arange(ny) * cell
+        # Per-axis nearest/farthest offsets between every cell edge and every zone: (cells, zones)
+        dx_min = np.maximum(np.maximum(cell_x0[:, None] - zone_x, zone_x - (cell_x0[:, None] + cell)), 0)
+        dx_max = np.maximum(np.abs(zone_x - cell_x0[:, None]), np.abs(zone_x - (cell_x0[:, None] + cell)))
+        dy_min = np.maximum(np.maximum(cell_y0[:, None] - zone_y, zone_y - (cell_y0[:, None] + cell)), 0)
+        dy_max = np.maximum(np.abs(zone_y - cell_y0[:, None]), np.abs(zone_y - (cell_y0[:, None] + cell)))
+        min_dist = np.sqrt(dx_min[:, None, :]**2 + dy_min[None, :, :]**2)
+        max_dist = np.sqrt(dx_max[:, None, :]**2 + dy_max[None, :, :]**2)
+        
+        # A zone is a candidate unless it is provably farther than some other zone for the whole cell.
+        # The slack absorbs the projection error against the haversine distance.
+        bound = max_dist.min(axis=2, keepdims=True) * 1.02 + 0.05
+        candidate = (min_dist <= bound).reshape(nx * ny, -1)
+        counts = candidate.sum(axis=1)
+        width = int(counts.max())
+        # Stable sort keeps candidates in ZONES order so ties resolve like a linear scan
+        order = np.argsort(~candidate, axis=1, kind='stable')[:, :width]
+        candidates = np.where(np.arange(width) < counts[:, None], order, -1)
+        
+        return {'candidates': candidates, 'nx': nx, 'ny': ny, 'x0': x0, 'y0': y0,
+                'cell': cell, 'origin': origin}
+    
+    @classmethod
+    def _nearest_zone_indices(cls, lats: np.ndarray, lons: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Zone index (-1 if none) and distance for each point: the containing zone polygon at distance 0,
+        or for points outside every polygon (or without polygons) the nearest centroid"""
+        polygons = cls._zone_polygons
+        if polygons is None:
+            return cls._nearest_centroid_indices(lats, lons)
+        cache = cls.get_zone_cache()
+        rows = cache.get('polygon_rows')
+        if rows is None or rows[0] is not polygons:
+            # Polygon position -> zone row, -1 for names no longer in ZONES
+            rows = (polygons, np.array([cache['index'].get(name, -1) for name in polygons.names] + [-1],
+                                       dtype=np.intp))
+            cache['polygon_rows'] = rows
+        nearest = rows[1][polygons.locate(lats, lons)]
+        distances = np.zeros(len(nearest))
+        outside = np.flatnonzero(nearest < 0)
+        if outside.size:
+            nearest[outside], distances[outside] = cls._nearest_centroid_indices(lats[outside], lons[outside])
+        return nearest, distances
+    
+    @classmethod
+    def _nearest_centroid_indices(cls, lats: np.ndarray, lons: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Index of the nearest zone centroid (-1 if none) and its haversine distance for each point"""
+        cache = cls.get_zone_cache()
+        index = cls.get_spatial_index()
+        zone_lats, zone_lons = cache['lats'][:-1], cache['lons'][:-1]
+        nearest = np.full(len(lats), -1, dtype=np.intp)
+        distances = np.full(len(lats), np.inf)
+        if len(zone_lats) == 0:
+            return nearest, distances
+        
+        x, y = cls._project(lats, lons, index['origin'])
+        with np.errstate(invalid='ignore'):
+            ix = np.floor((x - index['x0']) / index['cell'])
+            iy = np.floor((y - index['y0']) / index['cell'])
+        finite = np.isfinite(ix) & np.isfinite(iy)
+        inside = finite & (ix >= 0) & (ix < index['nx']) & (iy >= 0) & (iy < index['ny'])
+        
+        inner = np.flatnonzero(inside)
+        if inner.size:
+            cells = ix[inner].astype(np.intp) * index['ny'] + iy[inner].astype(np.intp)
+            candidates = index['candidates'][cells]
+            valid = candidates >= 0
+            candidates = np.where(valid, candidates, 0)
+            d = cls.haversine_vectorized(lats[inner, None], lons[inner, None],
+                                         zone_lats[candidates], zone_lons[candidates])
+            d[~valid] = np.inf
+            best = np.argmin(d, axis=1)
+            rows = np.arange(inner.size)
+            nearest[inner] = candidates[rows, best]
+            distances[inner] = d[rows, best]
+        
+        # Points beyond the grid margin are rare: scan every zone
+        outer = np.flatnonzero(finite & ~inside)
+        if outer.size:
+            d = cls.haversine_vectorized(lats[outer, None], lons[outer, None], zone_lats, zone_lons)
+            best = np.argmin(d, axis=1)
+            nearest[outer] = best
+            distances[outer] = d[np.arange(outer.size), best]
+        
+        return nearest, distances
+    
+    @staticmethod
+    def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+        """Calculate distance using Haversine formula (returns km)"""
+        R = 6371
+        lat1_rad, lat2_rad = math.radians(lat1), math.radians(lat2)
+        delta_lat = math.radians(lat2 - lat1)
+        delta_lon = math.radians(lon2 - lon1)
+        a = math.sin(delta_lat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon/2)**2
+        c = 2 * math.asin(math.sqrt(a))
+        return R * c
+    
+    @staticmethod
+    def haversine_vectorized(lat1, lon1, lat2, lon2) -> np.ndarray:
+        """Haversine formula over NumPy arrays with broadcasting (returns km)"""
+        R = 6371
+        lat1_rad, lat2_rad = np.radians(lat1), np.radians(lat2)
+        delta_lat = np.radians(np.subtract(lat2, lat1))
+        delta_lon = np.radians(np.subtract(lon2, lon1))
+        a = np.sin(delta_lat/2)**2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(delta_lon/2)**2
+        c = 2 * np.arcsin(np.sqrt(a))
+        return R * c
+    
+    @classmethod
+    def get_zone_cache(cls) -> Dict:
+        """Zone-name index, coordinate arrays and zone-to-zone distance matrix (built once per zone table).
+        
+        The last row/column of the matrix is BAGHDAD_CENTER, used for names missing from ZONES.
+        """
+        if cls.zone_catalog_path or cls.hotspot_catalog_path:
+            cls.reload_catalogs()
+        key = (id(cls.ZONES), len(cls.ZONES), cls._zones_version)
+        cache = cls._zone_cache
+        if cache is None or cache['key'] != key:
+            if not isinstance(cls.ZONES, ZoneCatalog):
+                cls.ZONES = ZoneCatalog.from_records(cls.ZONES)
+                key = (id(cls.ZONES), len(cls.ZONES), cls._zones_version)
+            zones = cls.ZONES
+            lats = np.append(zones.column('lat'), cls.BAGHDAD_CENTER[0])
+            lons = np.append(zones.column('lon'), cls.BAGHDAD_CENTER[1])
+            cache = {
+                'key': key,
+                'catalog': zones,
+                'names': zones.names,
+                'regions': zones.column('region').tolist(),
+                'index': zones.index,
+                'lats': lats,
+                'lons': lons,
+                'distance_matrix': cls.haversine_vectorized(lats[:, None], lons[:, None], lats[None, :], lons[None, :]),
+            }
+            cls._zone_cache = cache
+        return cache
+    
+    @classmethod
+    def get_zone_index(cls, zone: str) -> int:
+        """Row of a zone in the distance matrix (BAGHDAD_CENTER row for unknown zones)"""
+        cache = cls.get_zone_cache()
+        return cache['index'].get(zone, len(cache['names']))
+    
+    @classmethod
+    def get_zone_distance(cls, origin: str, destination: str) -> float:
+        """Zone-to-zone distance (km) read from the precomputed matrix"""
+        cache = cls.get_zone_cache()
+        center = len(cache['names'])
+        return float(cache['distance_matrix'][cache['index'].get(origin, center), cache['index'].get(destination, center)])
+    
+    @classmethod
+    def set_zones(cls, zones: Dict[str, Dict]):
+        """Replace the zone table ({name: {field: value}} or a ZoneCatalog) and invalidate the zone matrix cache"""
+        cls.ZONES = zones if isinstance(zones, ZoneCatalog) else ZoneCatalog.from_records(zones)
+        cls.invalidate_zone_cache()
+    
+    @classmethod
+    def set_hotspots(cls, hotspots: Dict[str, Dict]):
+        """Replace the traffic hotspots ({name: {lat, lon, congestion_level}} or a HotspotCatalog)"""
+        cls.TRAFFIC_HOTSPOTS = hotspots if isinstance(hotspots, HotspotCatalog) else HotspotCatalog.from_records(hotspots)
+    
+    @classmethod
+    def load_zones(cls, path: str):
+        """Load the zone table from a JSON file ({name: {region, type, lat, lon, ...}})"""
+        with open(path, encoding='utf-8') as f:
+            cls.set_zones(json.load(f))
+    
+    @classmethod
+    def load_zone_catalog(cls, path: str):
+        """Load the zones from a CSV, Parquet or GeoJSON catalog and follow later edits to the file.
+        
+        A GeoJSON catalog of zone polygons also becomes the reverse-geocoding boundaries. Polygons
+        loaded for the previous catalog are kept only if every name still exists.
+        """
+        mtime = os.path.getmtime(path)
+        zones = ZoneCatalog.load(path)
+        with cls._reload_lock:
+            cls._install_zones(zones, path)
+            cls.zone_catalog_path = zones.source
+            cls._catalog_mtimes[zones.source] = mtime
+    
+    @classmethod
+    def load_hotspots(cls, path: str):
+        """Load the traffic hotspots from a CSV, Parquet or GeoJSON catalog and follow later edits to the file"""
+        mtime = os.path.getmtime(path)
+        hotspots = HotspotCatalog.load(path)
+        with cls._reload_lock:
+            cls.set_hotspots(hotspots)
+            cls.hotspot_catalog_path = hotspots.source
+            cls._catalog_mtimes[hotspots.source] = mtime
+    
+    @classmethod
+    def _install_zones(cls, zones: ZoneCatalog, path: str):
+        cls.set_zones(zones)
+        if path.lower().endswith(('.geojson', '.json')) and cls._has_polygons(path):
+            cls.load_zone_polygons(path)
+        elif cls._zone_polygons is not None and not set(cls._zone_polygons.names) <= set(zones.index):
+            cls.clear_zone_polygons()
+    
+    @staticmethod
+    def _has_polygons(path: str) -> bool:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return data.get('type') == 'FeatureCollection' and any(
+            (feature.get('geometry') or {}).get('type') in ('Polygon', 'MultiPolygon') for feature in data['features'])
+    
+    @classmethod
+    def reload_catalogs(cls, force: bool = False) -> bool:
+        """Re-read the zone and hotspot catalog files that changed on disk (at most every
+        RELOAD_CHECK_SECONDS unless forced). A file that fails to load keeps the current catalog.
+        Returns True if anything was reloaded."""
+        now = time.monotonic()
+        if not force and now - cls._reload_checked < cls.RELOAD_CHECK_SECONDS:
+            return False
+        if not cls._reload_lock.acquire(blocking=force):
+            return False
+        reloaded = False
+        try:
+            cls._reload_checked = now
+            for path, catalog_type in ((cls.zone_catalog_path, ZoneCatalog), (cls.hotspot_catalog_path, HotspotCatalog)):
+                if path is None:
+                    continue
+                try:
+                    mtime = os.path.getmtime(path)
+                except OSError:
+                    continue
+                if mtime == cls._catalog_mtimes.get(path):
+                    continue
+                # Recorded first so a broken file is reported once, not on every check
+                cls._catalog_mtimes[path] = mtime
+                try:
+                    catalog = catalog_type.load(path)
+                    if catalog_type is ZoneCatalog:
+                        cls._install_zones(catalog, path)
+                    else:
+                        cls.set_hotspots(catalog)
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"Catalog reload of {path} failed, keeping the loaded catalog: {e}")
+                    continue
+                reloaded = True
+        finally:
+            cls._reload_lock.release()
+        return reloaded
+    
+    @classmethod
+    def load_zone_polygons(cls, path: str, name_property: str = "name"):
+        """Reverse geocode by the zone boundaries in a GeoJSON file (Polygon/MultiPolygon features
+        whose name_property is a ZONES name); points outside them all still get the nearest centroid"""
+        from .spatial import PolygonIndex  # spatial builds on this module
+        polygons = PolygonIndex.from_geojson(path, name_property)
+        unknown = sorted(set(polygons.names) - set(cls.ZONES))
+        if unknown:
+            raise ValueError(f"zone polygons for unknown zones in {path}: {', '.join(unknown)}")
+        cls._zone_polygons = polygons
+        cls.zone_polygons_path = os.path.abspath(path)
+    
+    @classmethod
+    def clear_zone_polygons(cls):
+        """Back to nearest-centroid reverse geocoding"""
+        cls._zone_polygons = None
+        cls.zone_polygons_path = None
+    
+    @classmethod
+    def invalidate_zone_cache(cls):
+        """Force a rebuild of the zone matrix cache"""
+        cls._zones_version += 1
+    
+    @classmethod
+    def get_zones_by_region(cls, region: str) -> List[str]:
+        return [zone for zone, data in cls.ZONES.items() if data['region'] == region]
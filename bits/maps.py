@@ -0,0 +1,320 @@
+"""
+===============================================================================
+BITS - Map Layers
+===============================================================================
+Process-wide cached base map (zones) with an incremental incident and
+hotspot congestion overlay. Above a configurable incident count the overlay
+switches from one folium Marker per incident to a single GeoJSON layer
+clustered in the browser
+Imported lazily by the map tab: depends on folium and streamlit_folium
+===============================================================================
+"""
+
+import html
+import json
+import os
+import re
+import threading
+from textwrap import dedent
+from typing import Callable, Dict, List
+
+import folium
+import streamlit as st
+import streamlit.components.v1 as components
+import streamlit_folium
+from branca.element import CssLink, Element, JavascriptLink, MacroElement
+from folium.elements import JSCSSMixin
+from folium.plugins import MarkerCluster
+from folium.template import Template
+from streamlit_folium import generate_js_hash, generate_leaflet_string, get_full_id
+
+from .geo import BaghdadGeographicalIntelligence
+
+MAP_ZOOM = 11
+MAP_TILES = 'CartoDB dark_matter'
+SEVERITY_COLORS = {'critical': 'red', 'high': 'orange'}
+DEFAULT_SEVERITY_COLOR = 'yellow'
+SEVERITY_RANK = {'low': 0, 'medium': 1, 'high': 2, 'critical': 3}
+CONGESTION_COLORS = {'critical': 'red', 'high': 'orange', 'medium': 'yellow', 'low': 'green'}
+
+# The st_folium browser component, declared here with Streamlit's public component API (same
+# frontend build) so cached arguments can be sent without going through st_folium's internals
+ST_FOLIUM_COMPONENT = components.declare_component(
+    "st_folium", path=os.path.join(os.path.dirname(streamlit_folium.__file__), "frontend", "build"))
+# Initial interaction state the component returns before the user touches the map
+COMPONENT_STATE_FIELDS = ("last_clicked", "last_object_clicked", "last_object_clicked_count",
+                          "last_object_clicked_tooltip", "last_object_clicked_popup", "all_drawings",
+                          "last_active_drawing", "bounds", "zoom", "last_circle_radius", "last_circle_polygon",
+                          "selected_layers", "selected_tags", "last_geocoder_result")
+
+
+def build_base_map(zones: Dict[str, Dict]) -> folium.Map:
+    """Map centered on Baghdad with a marker for every zone"""
+    m = folium.Map(location=list(BaghdadGeographicalIntelligence.BAGHDAD_CENTER), zoom_start=MAP_ZOOM, tiles=MAP_TILES)
+    for zone_name, zone_data in zones.items():
+        folium.Marker(
+            location=[zone_data['lat'], zone_data['lon']],
+            popup=f"<b>{zone_name}</b><br>{zone_data['type']}<br>السعر: {zone_data['base_price']}",
+            tooltip=f"{zone_data['icon']} {zone_name}",
+            icon=folium.Icon(color='blue', icon=zone_data['icon'], prefix='fa')
+        ).add_to(m)
+    return m
+
+
+def incidents_to_geojson(incidents: List[Dict]) -> Dict:
+    """One FeatureCollection for all incidents; text properties are HTML-escaped for the popups"""
+    return {
+        "type": "FeatureCollection",
+        "features": [{
+            "type": "Feature",
+            "geometry": {"type": "Point",
+                         "coordinates": [round(incident['longitude'], 6), round(incident['latitude'], 6)]},
+            "properties": {"severity": html.escape(str(incident['severity'])),
+                           "zone": html.escape(str(incident['zone'])),
+                           "description": html.escape(str(incident['description'] or ""))},
+        } for incident in incidents],
+    }
+
+
+class _LiteralScript(Element):
+    """Pre-rendered script text; a plain Element would compile it as a Jinja template"""
+
+    def __init__(self, text: str):
+        super().__init__()
+        self.text = text
+
+    def render(self, **kwargs) -> str:
+        return self.text
+
+
+class IncidentClusterLayer(JSCSSMixin, MacroElement):
+    """Incidents as a single GeoJSON layer inside a Leaflet.markercluster group.
+
+    Points are circle markers colored by severity; a cluster takes the color of the worst
+    severity it contains. All marker objects are created in the browser, so the page
+    carries one compact FeatureCollection instead of a Leaflet snippet per incident.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function() {
+                var colors = {{ this.colors|tojson }};
+                var ranks = {{ this.ranks|tojson }};
+                var names = ['low', 'medium', 'high', 'critical'];
+                var cluster = L.markerClusterGroup({chunkedLoading: true});
+                cluster.options.iconCreateFunction = function(group) {
+                    var worst = 0;
+                    group.getAllChildMarkers().forEach(function(marker) {
+                        worst = Math.max(worst, ranks[marker.feature.properties.severity] || 0);
+                    });
+                    var count = group.getChildCount();
+                    var size = count < 100 ? 32 : (count < 10000 ? 40 : 48);
+                    return L.divIcon({
+                        html: '<div style="background:' + (colors[names[worst]] || {{ this.default_color|tojson }})
+                            + ';opacity:0.85;border-radius:50%;width:' + size + 'px;height:' + size + 'px;'
+                            + 'line-height:' + size + 'px;text-align:center;color:#000;font-weight:bold">'
+                            + count + '</div>',
+                        className: '', iconSize: L.point(size, size)
+                    });
+                };
+                L.geoJSON({{ this.data_json }}, {
+                    pointToLayer: function(feature, latlng) {
+                        var color = colors[feature.properties.severity] || {{ this.default_color|tojson }};
+                        return L.circleMarker(latlng, {radius: 7, weight: 1, color: color, fillColor: color, fillOpacity: 0.8});
+                    },
+                    onEachFeature: function(feature, layer) {
+                        layer.bindPopup('<b>⚠️ ' + feature.properties.zone + '</b><br>' + feature.properties.description);
+                    }
+                }).addTo(cluster);
+                cluster.addTo({{ this._parent.get_name() }});
+                return cluster;
+            })();
+        {% endmacro %}
+    """)
+
+    default_js = MarkerCluster.default_js
+    default_css = MarkerCluster.default_css
+
+    def __init__(self, incidents: List[Dict]):
+        super().__init__()
+        self._name = "IncidentClusterLayer"
+        # Compact UTF-8 JSON rather than tojson, which \u-escapes every Arabic character
+        self.data_json = json.dumps(incidents_to_geojson(incidents), ensure_ascii=False,
+                                    separators=(",", ":")).replace("</", "<\\/")
+        self.colors = SEVERITY_COLORS
+        self.ranks = SEVERITY_RANK
+        self.default_color = DEFAULT_SEVERITY_COLOR
+
+    def render(self, **kwargs):
+        """Same output as JSCSSMixin.render without recompiling the data-sized script as a template"""
+        figure = self.get_root()
+        for name, url in self.default_js:
+            figure.header.add_child(JavascriptLink(url), name=name)
+        for name, url in self.default_css:
+            figure.header.add_child(CssLink(url), name=name)
+        figure.script.add_child(_LiteralScript(self._template.module.script(self, kwargs)), name=self.get_name())
+
+
+def build_incident_layer(incidents: List[Dict], cluster_threshold: int = None) -> folium.FeatureGroup:
+    """Incident markers colored by severity, clustered GeoJSON above cluster_threshold incidents"""
+    layer = folium.FeatureGroup(name="incidents")
+    if cluster_threshold is not None and len(incidents) > cluster_threshold:
+        IncidentClusterLayer(incidents).add_to(layer)
+        return layer
+    for incident in incidents:
+        color = SEVERITY_COLORS.get(incident['severity'], DEFAULT_SEVERITY_COLOR)
+        folium.Marker(
+            location=[incident['latitude'], incident['longitude']],
+            popup=f"<b>⚠️ {incident['zone']}</b><br>{incident['description']}",
+            icon=folium.Icon(color=color, icon='exclamation-triangle', prefix='fa')
+        ).add_to(layer)
+    return layer
+
+
+def add_hotspot_circles(layer: folium.FeatureGroup, hotspots: Dict[str, Dict]):
+    """A circle per traffic hotspot (CongestionTracker.snapshot()['hotspots']) colored by its level
+    (only the level is shown, so the overlay can be cached per congestion version)"""
+    for name, spot in hotspots.items():
+        color = CONGESTION_COLORS.get(spot['level'], DEFAULT_SEVERITY_COLOR)
+        folium.Circle(
+            location=[spot['lat'], spot['lon']],
+            radius=spot['radius_km'] * 1000,
+            color=color, weight=1, fill=True, fill_color=color, fill_opacity=0.25,
+            popup=f"<b>🚦 {html.escape(name)}</b><br>الازدحام: {spot['level']}",
+            tooltip=f"🚦 {html.escape(name)}: {spot['level']}"
+        ).add_to(layer)
+
+
+def _links(root) -> Dict[str, List[str]]:
+    """CSS and JS URLs of every folium element under root, in order and deduplicated"""
+    css, js = [], []
+    stack = [root]
+    while stack:
+        element = stack.pop(0)
+        css.extend(url for _, url in getattr(element, "default_css", []))
+        js.extend(url for _, url in getattr(element, "default_js", []))
+        stack[:0] = list(element._children.values())
+    return {"css_links": list(dict.fromkeys(css)), "js_links": list(dict.fromkeys(js))}
+
+
+# base_map_args and feature_group_script reproduce the component arguments st_folium builds in
+# streamlit-folium 0.27.4 (pinned in requirements.txt): that protocol is private and can change in
+# any release, so compare against st_folium's source before moving the pin. The public
+# st_folium(fig, feature_group_to_add=...) re-renders the map and the overlay on every rerun
+# (hundreds of ms to seconds at 50-500 incidents), which is what this cache exists to avoid.
+def base_map_args(fig: folium.Map, width, height: int) -> Dict:
+    """st_folium component arguments for a map, built from folium's rendered output: the page
+    header (styles only; scripts and stylesheets are loaded from the link lists), the map's
+    Leaflet script with the map variable renamed to the component's map_div, and the map's links"""
+    root = fig.get_root()
+    root.render()
+    map_id = get_full_id(fig)
+    header = root.header.render()
+    header = re.sub(r'<script\b[^>]*\bsrc=["\'][^"\']*["\'][^>]*>.*?</script\b[^>]*>', "", header,
+                    flags=re.IGNORECASE | re.DOTALL)
+    header = re.sub(r'<link rel="stylesheet" href=".*?"/>', "", header)
+    # Leaflet's default marker images live under dist/images/
+    header = re.sub(r'(L\.Icon\.Default\.imagePath\s*=\s*["\'])([^"\']*?/dist)(["\'])', r"\1\2/images/\3", header)
+    page = re.sub(r'<div class="folium-map" id=".*" ></div>', "", root.html.render()).strip()
+    script = generate_leaflet_string(fig).replace("alert(coords);", "")
+    script = dedent(re.sub(r"drawnItems_draw_control_div_\d+", "drawnItems", script))
+    if "drawnItems" not in script:
+        script += "\nvar drawnItems = [];"
+    (south, west), (north, east) = fig.get_bounds()
+    state = dict.fromkeys(COMPONENT_STATE_FIELDS)
+    state["bounds"] = {"_southWest": {"lat": south, "lng": west}, "_northEast": {"lat": north, "lng": east}}
+    state["zoom"] = fig.options.get("zoom")
+    # generate_leaflet_string renames the map to map_div
+    return {"script": script, "header": header.replace(map_id, "map_div"), "html": page, "id": get_full_id(fig),
+            "height": height, "width": width, "returned_objects": None, "default": state,
+            "zoom": None, "center": None, "return_on_hover": False, "layer_control": None,
+            "pixelated": False, "wrap_longitude": False, **_links(fig)}
+
+
+def feature_group_script(layer: folium.FeatureGroup, name: str = "feature_group_0") -> str:
+    """Leaflet script that adds a feature group to the component's map (map_div) as
+    feature_group_<name>, registered where the component replaces it on the next update"""
+    fig = folium.Map(tiles=None)
+    layer.add_to(fig)
+    fig.get_root().render()
+    script = dedent(generate_leaflet_string(layer, base_id=name).replace(get_full_id(fig), "map_div"))
+    return script + (f"\nmap_div.addLayer(feature_group_{name});"
+                     f"\nwindow.feature_group = window.feature_group || [];"
+                     f"\nwindow.feature_group.push(feature_group_{name});\n")
+
+
+class MapLayerCache:
+    """Render cache for the map tab, shared by every session in the process.
+
+    The zone layer is rendered to Leaflet JS once per zone table, the incident and hotspot
+    overlay once per incident data version and congestion version. A rerun only hands the cached strings to the st_folium
+    component, which swaps the overlay in place without remounting the base map.
+
+    The folium objects are rendered into component arguments once (base_map_args,
+    feature_group_script) and then discarded; `component` is the browser component they are
+    sent to (a stand-in in benchmarks).
+    """
+
+    CLUSTER_THRESHOLD = 500  # incidents; above this the overlay is one clustered GeoJSON layer
+
+    def __init__(self, cluster_threshold: int = CLUSTER_THRESHOLD, component: Callable = None):
+        self.cluster_threshold = cluster_threshold
+        self.component = component or ST_FOLIUM_COMPONENT
+        self._lock = threading.Lock()
+        self._base = None
+        self._overlay = None
+
+    def base_args(self, key: str, width, height: int) -> Dict:
+        zone_key = BaghdadGeographicalIntelligence.get_zone_cache()['key']
+        cache_key = (zone_key, key, width, height)
+        with self._lock:
+            if self._base is None or self._base[0] != cache_key:
+                args = base_map_args(build_base_map(BaghdadGeographicalIntelligence.ZONES), width, height)
+                args['key'] = generate_js_hash(args['script'], key)
+                # The component loads scripts when the map mounts, and the overlay can switch to
+                # clustering later without a remount, so the cluster plugin is always requested
+                args['css_links'] = list(dict.fromkeys(args['css_links'] + [url for _, url in MarkerCluster.default_css]))
+                args['js_links'] = list(dict.fromkeys(args['js_links'] + [url for _, url in MarkerCluster.default_js]))
+                self._base = (cache_key, args)
+            return self._base[1]
+
+    def incident_overlay(self, version, load_incidents: Callable[[], List[Dict]],
+                         hotspots: Dict[str, Dict] = None) -> str:
+        with self._lock:
+            if self._overlay is None or self._overlay[0] != version:
+                layer = build_incident_layer(load_incidents(), self.cluster_threshold)
+                if hotspots:
+                    add_hotspot_circles(layer, hotspots)
+                self._overlay = (version, feature_group_script(layer))
+            return self._overlay[1]
+
+    def render(self, incident_version: int, load_incidents: Callable[[], List[Dict]],
+               key: str = "dispatch_map", width="100%", height: int = 400, congestion: Dict = None):
+        """Draw the map, with hotspot circles when given a CongestionTracker snapshot;
+        returns the interaction state (also kept in st.session_state[key], as st_folium does)"""
+        args = dict(self.base_args(key, width, height))
+        if congestion is None:
+            args['feature_group'] = self.incident_overlay(incident_version, load_incidents)
+        else:
+            args['feature_group'] = self.incident_overlay((incident_version, congestion['version']), load_incidents,
+                                                          congestion['hotspots'])
+        component_key = args['key']
+
+        def on_change():
+            st.session_state[key] = st.session_state.get(component_key, {})
+
+        return self.component(**args, on_change=on_change)
+
+
+_map_layer_cache = None
+_map_layer_cache_lock = threading.Lock()
+
+
+def get_map_layer_cache() -> MapLayerCache:
+    """Process-wide cache; BITS_MAP_CLUSTER_THRESHOLD overrides the clustering threshold"""
+    global _map_layer_cache
+    with _map_layer_cache_lock:
+        if _map_layer_cache is None:
+            threshold = os.environ.get("BITS_MAP_CLUSTER_THRESHOLD")
+            _map_layer_cache = MapLayerCache(int(threshold) if threshold else MapLayerCache.CLUSTER_THRESHOLD)
+        return _map_layer_cache
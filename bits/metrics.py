@@ -0,0 +1,184 @@
+"""
+===============================================================================
+BITS - Timing Spans and Metrics Export
+===============================================================================
+Named timing spans aggregated into histograms, exported as Prometheus text
+(HTTP endpoint or file). Disabled unless BITS_METRICS is set; a disabled span
+costs one attribute check.
+===============================================================================
+"""
+
+import os
+import threading
+from bisect import bisect_left
+from contextlib import nullcontext
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter
+from typing import Dict, List
+
+_NULL_SPAN = nullcontext()
+
+
+class SpanHistogram:
+    """Cumulative-bucket histogram of one span's durations (seconds)"""
+
+    def __init__(self, buckets: List[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot: above the largest bucket
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Interpolated within the bucket holding the q-quantile, like Prometheus' histogram_quantile"""
+        rank = q * self.count
+        seen, lower = 0, 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                return min(lower + (bound - lower) * (rank - seen) / count, self.max)
+            seen += count
+            lower = bound
+        return self.max
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """Process-wide span histograms; cheap to leave in place when disabled"""
+
+    # Histogram bucket upper bounds in seconds
+    BUCKETS = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+    PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, SpanHistogram] = {}
+        self._server = None
+
+    def span(self, name: str):
+        """Context manager timing the enclosed block under `name`"""
+        return _Span(self, name) if self.enabled else _NULL_SPAN
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = SpanHistogram(self.BUCKETS)
+            histogram.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Per-span count/total/avg/p50/p95/max in milliseconds (percentiles estimated from the buckets)"""
+        with self._lock:
+            return {name: {'count': h.count, 'total_ms': h.sum * 1000, 'avg_ms': h.sum * 1000 / h.count,
+                           'p50_ms': h.quantile(0.5) * 1000, 'p95_ms': h.quantile(0.95) * 1000,
+                           'max_ms': h.max * 1000}
+                    for name, h in sorted(self._histograms.items())}
+
+    def to_prometheus(self) -> str:
+        lines = ["# HELP bits_span_seconds Wall time of instrumented BITS stages.",
+                 "# TYPE bits_span_seconds histogram"]
+        with self._lock:
+            for name, h in sorted(self._histograms.items()):
+                label = 'span="' + name.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    lines.append(f'bits_span_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+                lines.append(f'bits_span_seconds_bucket{{{label},le="+Inf"}} {h.count}')
+                lines.append(f"bits_span_seconds_sum{{{label}}} {h.sum!r}")
+                lines.append(f"bits_span_seconds_count{{{label}}} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """Prometheus text file (e.g. for node_exporter's textfile collector), replaced atomically"""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """GET /metrics on a daemon thread; started once per process"""
+        with self._lock:
+            if self._server is None:
+                metrics = self
+
+                class Handler(BaseHTTPRequestHandler):
+                    def do_GET(self):
+                        if self.path.split("?")[0] != "/metrics":
+                            self.send_error(404)
+                            return
+                        body = metrics.to_prometheus().encode("utf-8")
+                        self.send_response(200)
+                        self.send_header("Content-Type", metrics.PROMETHEUS_CONTENT_TYPE)
+                        self.send_header("Content-Length", str(len(body)))
+                        self.end_headers()
+                        self.wfile.write(body)
+
+                    def log_message(self, *args):
+                        pass
+
+                self._server = ThreadingHTTPServer((host, port), Handler)
+                threading.Thread(target=self._server.serve_forever, name="bits-metrics", daemon=True).start()
+            return self._server
+
+
+def timed(name: str):
+    """Decorator form of Metrics.span for the process-wide metrics"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            metrics = get_metrics()
+            if not metrics.enabled:
+                return fn(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.observe(name, perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """Process-wide metrics; enabled when BITS_METRICS is set to anything but 0/false"""
+    if _metrics is None:
+        _create_metrics()
+    return _metrics
+
+
+def _create_metrics():
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics(os.environ.get("BITS_METRICS", "").lower() not in ("", "0", "false", "no"))
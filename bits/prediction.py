@@ -0,0 +1,354 @@
+"""
+===============================================================================
+BITS - AI Predictive Analysis
+===============================================================================
+Trend predictor for traffic warnings: a zone x weekday x hour risk tensor
+trained incrementally from recorded incidents and pricing history
+===============================================================================
+"""
+
+import argparse
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .automation import AutomationEngine
+from .database import TrafficDatabase
+from .geo import BaghdadGeographicalIntelligence
+from .metrics import timed
+from .spatial import IncidentImpactIndex
+
+
+class RiskModel:
+    """Incident risk and pricing pressure per zone, weekday and hour, persisted as one .npz file.
+
+    Training aggregates the rows added since the last run (id watermarks) into running sums, so
+    retraining costs only the new data. Slots without much data lean on a prior built from
+    AIPredictiveAnalysis.TRAFFIC_PATTERNS, which is also what an untrained model predicts.
+    """
+
+    DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    # Baghdad has no daylight saving time; SQLite timestamps are UTC
+    UTC_OFFSET_HOURS = 3
+
+    # Prior: severity-weighted incidents per hour, and the mean quoted multiplier
+    BASE_RATE = 0.02
+    HIGH_RISK_PRIOR_RATE = 0.2
+    PRIOR_HOURS = 8.0
+    PRIOR_QUOTES = 20.0
+
+    # Risk levels: high-risk slot x peak slot, as in the original pattern table
+    HIGH_RISK_RATE = 0.1
+    PEAK_PRESSURE = 1.2
+
+    RETRAIN_INTERVAL = 300.0
+
+    _registry: Dict[str, "RiskModel"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, zone_names: List[str], path: str = None):
+        self.path = path
+        self.zone_names = list(zone_names)
+        shape = (len(self.zone_names), 7, 24)
+        self.incident_weight = np.zeros(shape)
+        self.pricing_sum = np.zeros(shape)
+        self.pricing_count = np.zeros(shape)
+        self.exposure = np.zeros((7, 24))
+        self.last_incident_id = 0
+        self.last_pricing_id = 0
+        self.observed_from = None
+        self.observed_until = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._trained_version = None
+        self._last_refresh = 0.0
+        self._derive()
+
+    @classmethod
+    def for_database(cls, db: TrafficDatabase, path: str = None) -> "RiskModel":
+        """Shared model for a database (one per process), loaded from disk on first use"""
+        if path is None:
+            path = os.environ.get("BITS_RISK_MODEL")
+        if path is None and db.db_path != ":memory:":
+            path = os.path.splitext(db.db_path)[0] + "_risk.npz"
+        key = os.path.abspath(path) if path else db.key
+        with cls._registry_lock:
+            model = cls._registry.get(key)
+            if model is None:
+                model = cls._registry[key] = cls.load(path)
+            return model
+
+    @classmethod
+    def load(cls, path: str = None) -> "RiskModel":
+        """Model saved at path, or an untrained one for the current zones"""
+        zone_names = BaghdadGeographicalIntelligence.get_zone_cache()['names']
+        if not path or not os.path.exists(path):
+            return cls(zone_names, path)
+        with np.load(path, allow_pickle=False) as data:
+            model = cls(data['zone_names'].tolist(), path)
+            model.incident_weight = data['incident_weight']
+            model.pricing_sum = data['pricing_sum']
+            model.pricing_count = data['pricing_count']
+            model.exposure = data['exposure']
+            model.last_incident_id, model.last_pricing_id = (int(v) for v in data['watermarks'])
+            observed = data['observed'].tolist()
+            model.observed_from, model.observed_until = (observed if observed else (None, None))
+        model._align(zone_names)
+        model._derive()
+        return model
+
+    def save(self):
+        """Write the accumulators atomically (no-op without a path)"""
+        if not self.path:
+            return
+        tmp = self.path + ".tmp.npz"
+        np.savez(
+            tmp, zone_names=np.array(self.zone_names), incident_weight=self.incident_weight,
+            pricing_sum=self.pricing_sum, pricing_count=self.pricing_count, exposure=self.exposure,
+            watermarks=np.array([self.last_incident_id, self.last_pricing_id]),
+            observed=np.array([] if self.observed_from is None else [self.observed_from, self.observed_until]),
+        )
+        os.replace(tmp, self.path)
+
+    def _align(self, zone_names: List[str]):
+        """Re-index the zone rows after the zone table changed (rows of removed zones are dropped)"""
+        if zone_names == self.zone_names:
+            return
+        rows = {name: i for i, name in enumerate(self.zone_names)}
+        keep = [(j, rows[name]) for j, name in enumerate(zone_names) if name in rows]
+        new, old = [j for j, _ in keep], [i for _, i in keep]
+        for field in ("incident_weight", "pricing_sum", "pricing_count"):
+            values = np.zeros((len(zone_names), 7, 24))
+            values[new] = getattr(self, field)[old]
+            setattr(self, field, values)
+        self.zone_names = list(zone_names)
+
+    def _prior(self):
+        """(rate, pressure) from the hand-written weekly patterns"""
+        rows = {name: i for i, name in enumerate(self.zone_names)}
+        rate = np.full((len(self.zone_names), 7, 24), self.BASE_RATE)
+        pressure = np.ones((7, 24))
+        patterns = AIPredictiveAnalysis.TRAFFIC_PATTERNS
+        for day, day_name in enumerate(self.DAY_NAMES):
+            pattern = patterns.get(day_name, patterns["Monday"])
+            rate[[rows[z] for z in pattern['high_risk_zones'] if z in rows], day, :] = self.HIGH_RISK_PRIOR_RATE
+            for start, end in pattern['peak_times']:
+                pressure[day, start:end + 1] = AutomationEngine.PEAK_MULTIPLIER
+        return rate, pressure
+
+    def _derive(self):
+        """Posterior tensors read by predictions: one float32 slice per (weekday, hour)"""
+        prior_rate, prior_pressure = self._prior()
+        self.risk = ((self.incident_weight + self.PRIOR_HOURS * prior_rate) /
+                     (self.exposure[None] + self.PRIOR_HOURS)).astype(np.float32)
+        self.pressure = ((self.pricing_sum + self.PRIOR_QUOTES * prior_pressure[None]) /
+                         (self.pricing_count + self.PRIOR_QUOTES)).astype(np.float32)
+        self.confidence = np.rint(50 + 45 * (1 - np.exp(-self.exposure / self.PRIOR_HOURS))).astype(np.int64)
+
+    # Training
+
+    def _slot_sql(self, column: str) -> str:
+        """SQL slot (weekday x 24 + hour, Monday=0) of a UTC timestamp column in Baghdad time.
+
+        Whole Julian days + 0.5 start on a Monday, so hours since then modulo a week give the slot;
+        1e-7 days (under a second) keeps exact hours from rounding down.
+        """
+        return f"CAST((julianday({column}) + 0.5 + {self.UTC_OFFSET_HOURS} / 24.0 + 1e-7) * 24 AS INTEGER) % 168"
+
+    def _weather_neutral_sql(self, column: str):
+        """(SQL, params) dividing a quoted multiplier column by its weather factor.
+
+        Pressure feeds peak-hour detection, so it must follow the clock only: a rainy off-peak
+        quote would otherwise push its slot over PEAK_PRESSURE. Weather is applied to the risk
+        score at prediction time instead.
+        """
+        conditions = AutomationEngine.WEATHER_CONDITIONS
+        case = " ".join("WHEN ? THEN ?" for _ in conditions)
+        params = [value for weather in conditions
+                  for value in (weather, AutomationEngine.get_weather_multiplier(weather))]
+        return f"{column} / CASE weather {case} ELSE 1.0 END", params
+
+    def _add_exposure(self, start_hour: int, end_hour: int):
+        """Count every (weekday, hour) slot between two epoch hours (end exclusive)"""
+        if end_hour <= start_hour:
+            return
+        local = np.arange(start_hour, end_hour) + self.UTC_OFFSET_HOURS
+        # 1970-01-01 was a Thursday (weekday 3)
+        slots = ((local // 24 + 3) % 7) * 24 + local % 24
+        self.exposure += np.bincount(slots, minlength=7 * 24).reshape(7, 24)
+
+    @timed("prediction.train")
+    def train(self, db: TrafficDatabase, now: float = None) -> Dict[str, int]:
+        """Fold in the incidents and pricing rows added since the last call"""
+        zone_names = BaghdadGeographicalIntelligence.get_zone_cache()['names']
+        rows = {name: i for i, name in enumerate(zone_names)}
+        weights = IncidentImpactIndex.SEVERITY_WEIGHTS
+        now_hour = int((time.time() if now is None else now) // 3600)
+        multiplier, weather_params = self._weather_neutral_sql("multiplier")
+        with self._lock:
+            self._align(zone_names)
+            with db.query("train_risk_model") as cursor:
+                cursor.execute(f"""
+                    SELECT zone, severity, {self._slot_sql('created_at')}, COUNT(*), MAX(id),
+                           MIN(created_at)
+                    FROM active_road_incidents WHERE id > ?
+                    GROUP BY 1, 2, 3
+                """, (self.last_incident_id,))
+                incidents = cursor.fetchall()
+                cursor.execute(f"""
+                    SELECT origin_zone, {self._slot_sql('created_at')}, SUM({multiplier}), COUNT(*),
+                           MAX(id), MIN(created_at)
+                    FROM pricing_history WHERE id > ? AND multiplier IS NOT NULL
+                    GROUP BY 1, 2
+                """, (*weather_params, self.last_pricing_id))
+                pricing = cursor.fetchall()
+
+            first = [int(datetime.fromisoformat(row[-1]).replace(tzinfo=timezone.utc).timestamp()) // 3600
+                     for row in incidents + pricing if row[-1] is not None]
+            for zone, severity, slot, count, last_id, _ in incidents:
+                if zone in rows:
+                    self.incident_weight[rows[zone], slot // 24, slot % 24] += count * weights.get(severity, 0.5)
+                self.last_incident_id = max(self.last_incident_id, last_id)
+            for zone, slot, total, count, last_id, _ in pricing:
+                if zone in rows:
+                    self.pricing_sum[rows[zone], slot // 24, slot % 24] += total
+                    self.pricing_count[rows[zone], slot // 24, slot % 24] += count
+                self.last_pricing_id = max(self.last_pricing_id, last_id)
+
+            # Every hour from the first record on counts as observed, including ones with no records
+            if self.observed_from is None:
+                if first:
+                    self.observed_from = self.observed_until = min(first)
+            elif first and min(first) < self.observed_from:
+                self._add_exposure(min(first), self.observed_from)
+                self.observed_from = min(first)
+            if self.observed_until is not None:
+                self._add_exposure(self.observed_until, now_hour + 1)
+                self.observed_until = max(self.observed_until, now_hour + 1)
+            self._derive()
+        return {"incident_groups": len(incidents), "pricing_groups": len(pricing)}
+
+    def refresh(self, db: TrafficDatabase) -> "RiskModel":
+        """Retrain and save when incidents changed or RETRAIN_INTERVAL has passed since the last run"""
+        version = db.incident_cache.snapshot().version
+        with self._refresh_lock:
+            now = time.monotonic()
+            if version != self._trained_version or now - self._last_refresh >= self.RETRAIN_INTERVAL:
+                self._trained_version, self._last_refresh = version, now
+                self.train(db)
+                self.save()
+        return self
+
+    # Prediction
+
+    @classmethod
+    def local_now(cls) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(hours=cls.UTC_OFFSET_HOURS)
+
+    @timed("prediction.predict_all")
+    def predict_all(self, day: int, hour: int, zones: Optional[List[str]] = None,
+                    weather_multiplier: float = 1.0) -> List[Dict]:
+        """Predictions for every zone (or the given ones) at one weekday and hour.
+
+        The weather multiplier scales the risk score only; peak time comes from the pressure tensor,
+        which is trained without weather.
+        """
+        zone_names = self.zone_names if zones is None else zones
+        rows = {name: i for i, name in enumerate(self.zone_names)}
+        index = np.array([rows.get(zone, -1) for zone in zone_names], dtype=np.int64)
+        known = index >= 0
+        # Unknown zones get the base prior
+        risk = (np.where(known, self.risk[index, day, hour], self.BASE_RATE) * weather_multiplier).tolist()
+        pressure = np.where(known, self.pressure[index, day, hour], 1.0).tolist()
+        confidence = int(self.confidence[day, hour])
+        day_name = self.DAY_NAMES[day]
+
+        predictions = []
+        for zone, zone_risk, zone_pressure in zip(zone_names, risk, pressure):
+            is_high_risk = zone_risk >= self.HIGH_RISK_RATE
+            is_peak_time = zone_pressure >= self.PEAK_PRESSURE
+            risk_level = "low"
+            warnings = []
+            if is_high_risk and is_peak_time:
+                risk_level = "critical"
+                warnings.append("🚨 ازدحام متوقع شديد")
+                delay = 15 + 20 * min(1.0, zone_risk / (4 * self.HIGH_RISK_RATE))
+                warnings.append(f"⏰ توقع تأخر {int(round(delay))} دقيقة")
+            elif is_high_risk:
+                risk_level = "high"
+                warnings.append("⚠️ ازدحام محتمل")
+            elif is_peak_time:
+                risk_level = "medium"
+                warnings.append("ℹ️ ازدحام خفيف خلال ساعة الذروة")
+            if day_name == "Friday":
+                warnings.append("🕌 يوم جمعة - ازدحام حول المساجد")
+            predictions.append({
+                "zone": zone, "day": day_name, "hour": hour,
+                "risk_level": risk_level, "is_high_risk": is_high_risk,
+                "is_peak_time": is_peak_time, "warnings": warnings,
+                "confidence": confidence, "risk_score": round(zone_risk, 3),
+                "pricing_pressure": round(zone_pressure, 2),
+            })
+        return predictions
+
+
+class AIPredictiveAnalysis:
+    """AI Predictive Analysis - Trend Predictor for traffic warnings"""
+
+    # Prior of RiskModel: what an untrained model predicts
+    TRAFFIC_PATTERNS = {
+        "Monday": {"high_risk_zones": ["المنصور", "الكرادة", "الجادرية"], "peak_times": [(7, 9), (14, 16), (17, 19)]},
+        "Tuesday": {"high_risk_zones": ["المنصور", "الكرادة"], "peak_times": [(7, 9), (14, 16), (17, 19)]},
+        "Wednesday": {"high_risk_zones": ["المنصور", "الكرادة", "الجادرية"], "peak_times": [(7, 9), (14, 16), (17, 19)]},
+        "Thursday": {"high_risk_zones": ["المنصور", "الكرادة", "الأعظمية"], "peak_times": [(7, 9), (14, 16), (17, 20)]},
+        "Friday": {"high_risk_zones": ["الأعظمية", "الكاظمية"], "peak_times": [(10, 13), (17, 21)]},
+        "Saturday": {"high_risk_zones": ["الكرادة", "المزة"], "peak_times": [(10, 14), (18, 22)]},
+        "Sunday": {"high_risk_zones": ["المنصور", "الجادرية"], "peak_times": [(7, 9), (14, 16), (17, 19)]}
+    }
+
+    _untrained: Optional[RiskModel] = None
+
+    @classmethod
+    def _model(cls, model: Optional[RiskModel]) -> RiskModel:
+        if model is not None:
+            return model
+        if cls._untrained is None or cls._untrained.zone_names != BaghdadGeographicalIntelligence.get_zone_cache()['names']:
+            cls._untrained = RiskModel.load()
+        return cls._untrained
+
+    @classmethod
+    def predict_traffic(cls, zone: str, current_hour: int = None, model: RiskModel = None,
+                        now: datetime = None, weather_multiplier: float = 1.0) -> Dict:
+        """Predict traffic conditions for a zone (now: Baghdad time, e.g. a simulated clock)"""
+        now = now or RiskModel.local_now()
+        return cls._model(model).predict_all(now.weekday(), now.hour if current_hour is None else current_hour,
+                                             [zone], weather_multiplier)[0]
+
+    @classmethod
+    def get_all_predictions(cls, model: RiskModel = None, current_hour: int = None,
+                            now: datetime = None, weather_multiplier: float = 1.0) -> List[Dict]:
+        """Predictions for every zone from one (weekday, hour) slice of the risk tensor"""
+        now = now or RiskModel.local_now()
+        return cls._model(model).predict_all(now.weekday(), now.hour if current_hour is None else current_hour,
+                                             weather_multiplier=weather_multiplier)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the risk tensor from a BITS database")
+    parser.add_argument("--db", default="bits_traffic.db")
+    parser.add_argument("--out", default=None, help="model file (default: <db>_risk.npz)")
+    parser.add_argument("--full", action="store_true", help="retrain from scratch instead of incrementally")
+    args = parser.parse_args()
+    database = TrafficDatabase(args.db)
+    out = args.out or os.environ.get("BITS_RISK_MODEL") or os.path.splitext(args.db)[0] + "_risk.npz"
+    model = RiskModel(BaghdadGeographicalIntelligence.get_zone_cache()['names'], out) if args.full else RiskModel.load(out)
+    start = time.perf_counter()
+    groups = model.train(database)
+    model.save()
+    print(f"trained in {time.perf_counter() - start:.2f} s ({groups}); "
+          f"incidents up to id {model.last_incident_id}, pricing up to id {model.last_pricing_id} -> {out}")
+    database.close()
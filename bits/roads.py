@@ -0,0 +1,531 @@
+"""
+===============================================================================
+BITS - Road Graph Routing
+===============================================================================
+Directed road network (edge-list CSV or OSM XML extract) with ALT shortest
+paths (A*, landmarks, triangle inequality): incident-adjusted travel time for
+the fastest route, road length for the economic route
+===============================================================================
+"""
+
+import csv
+import heapq
+import math
+import os
+import threading
+import xml.etree.ElementTree as ET
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .geo import BaghdadGeographicalIntelligence
+from .spatial import GridIndex
+
+# (from_lat, from_lon, to_lat, to_lon, speed_kmh, oneway, length_km or None)
+Edge = Tuple[float, float, float, float, float, bool, Optional[float]]
+
+
+class RoadGraph:
+    """Baghdad road graph in CSR form with landmark-accelerated shortest paths.
+
+    Latency does not meet the low-millisecond target for every query. Cached routes are
+    answered in well under a millisecond. A new incident version updates the costs in a few
+    ms. After any change, though, the first travel-time search for a pair runs on the
+    request path. On the 31k-node synthetic grid with 200 incidents, routing_benchmark measures
+    a median of 5-10 ms and a p95 of 25-50 ms for those searches. The free-flow landmark bounds
+    loosen as incidents slow roads down. Road-length paths are only re-timed.
+    """
+
+    # Free-flow speeds for OSM highway classes without a maxspeed tag
+    DEFAULT_SPEEDS_KMH = {
+        "motorway": 90, "trunk": 70, "primary": 50, "secondary": 40, "tertiary": 35,
+        "unclassified": 30, "residential": 25, "living_street": 10, "service": 15,
+        "motorway_link": 50, "trunk_link": 40, "primary_link": 35, "secondary_link": 30, "tertiary_link": 25,
+    }
+    DEFAULT_SPEED_KMH = 30.0
+
+    # Travel-time factors for arcs near an incident (by severity) or a hotspot (by congestion level)
+    SEVERITY_FACTORS = {"low": 1.2, "medium": 1.5, "high": 2.0, "critical": 3.0}
+    CONGESTION_FACTORS = {"low": 1.1, "medium": 1.3, "high": 1.6, "critical": 2.0}
+    INCIDENT_RADIUS_KM = 0.5
+    HOTSPOT_RADIUS_KM = 0.8
+    PROXIMITY_CHUNK = 1000
+
+    # Landmarks for the ALT lower bounds (each costs one forward and one backward Dijkstra at build time)
+    LANDMARKS = 8
+    ACTIVE_LANDMARKS = 4
+    UNREACHABLE = 1e18
+    SNAP_CACHE_SIZE = 4096
+    MAX_SNAP_KM = 1.0
+    ROUTE_CACHE_SIZE = 4096
+
+    _registry: Dict[str, "RoadGraph"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, node_lat: np.ndarray, node_lon: np.ndarray, sources: np.ndarray, targets: np.ndarray,
+                 length_km: np.ndarray, speed_kmh: np.ndarray):
+        self.node_lat = np.asarray(node_lat, dtype=float)
+        self.node_lon = np.asarray(node_lon, dtype=float)
+        sources = np.asarray(sources, dtype=np.int64)
+        order = np.argsort(sources, kind="stable")
+        self.arc_source = sources[order]
+        self.arc_target = np.asarray(targets, dtype=np.int64)[order]
+        self.arc_length = np.asarray(length_km, dtype=float)[order]
+        self.arc_minutes = self.arc_length / np.asarray(speed_kmh, dtype=float)[order] * 60
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(self.arc_source, minlength=self.node_count))])
+
+        # Arc midpoints locate the arcs an incident or hotspot slows down
+        self.arc_mid_lat = (self.node_lat[self.arc_source] + self.node_lat[self.arc_target]) / 2
+        self.arc_mid_lon = (self.node_lon[self.arc_source] + self.node_lon[self.arc_target]) / 2
+        self._arc_index = GridIndex(self.arc_mid_lat, self.arc_mid_lon, self.INCIDENT_RADIUS_KM / 2)
+        self._hotspots = BaghdadGeographicalIntelligence.TRAFFIC_HOTSPOTS
+        self._hotspot_levels = {name: h['congestion_level'] for name, h in self._hotspots.items()}
+        self.hotspot_factors = self._hotspot_factors(self._hotspot_levels)
+        # Arc costs are the free-flow minutes x hotspot factors, times the incident factor of the arcs
+        # near incidents; incidents are counted per arc and severity, so a change only touches its arcs
+        self._base_minutes = self.arc_minutes * self.hotspot_factors
+        self._severity_factors = np.array(list(self.SEVERITY_FACTORS.values()))
+        self._severity_counts = np.zeros((len(self.SEVERITY_FACTORS), self.arc_count), dtype=np.int32)
+        self._incident_factor = np.ones(self.arc_count)
+        self._counted: Counter = Counter()
+
+        # The search loops run on plain lists: indexing NumPy scalars one at a time is far slower
+        self._offsets = self.offsets.tolist()
+        self._targets = self.arc_target.tolist()
+        self._lengths = self.arc_length.tolist()
+        self._arc_sources = self.arc_source.tolist()
+        self.node_x, self.node_y = self._project(self.node_lat, self.node_lon)
+        self._snapped: Dict[Tuple[float, float], int] = {}
+        self._routes: Dict[Tuple, Optional[Dict]] = {}
+        self._length_paths: Dict[Tuple[int, int], Optional[List[int]]] = {}
+        self._lats = self.node_lat.tolist()
+        self._lons = self.node_lon.tolist()
+        self._reverse = None
+        self._landmarks: Dict[str, Dict] = {}
+        self._costs = None
+        # Bumped when hotspot levels change: cached routes are keyed by it as well as the incident version
+        self._hotspot_generation = 0
+        self._lock = threading.Lock()
+        self._landmarks_lock = threading.Lock()
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_lat)
+
+    @property
+    def arc_count(self) -> int:
+        return len(self.arc_target)
+
+    # Loading
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[Edge]) -> "RoadGraph":
+        """Build from edges given by endpoint coordinates (shared coordinates become one node)"""
+        node_ids: Dict[Tuple[float, float], int] = {}
+        sources, targets, lengths, speeds = [], [], [], []
+        for from_lat, from_lon, to_lat, to_lon, speed_kmh, oneway, length_km in edges:
+            u = node_ids.setdefault((round(from_lat, 6), round(from_lon, 6)), len(node_ids))
+            v = node_ids.setdefault((round(to_lat, 6), round(to_lon, 6)), len(node_ids))
+            if u == v:
+                continue
+            if length_km is None:
+                length_km = BaghdadGeographicalIntelligence.haversine_distance(from_lat, from_lon, to_lat, to_lon)
+            sources.append(u)
+            targets.append(v)
+            lengths.append(length_km)
+            speeds.append(speed_kmh)
+            if not oneway:
+                sources.append(v)
+                targets.append(u)
+                lengths.append(length_km)
+                speeds.append(speed_kmh)
+        if not sources:
+            raise ValueError("road graph has no edges")
+        coords = np.array(list(node_ids), dtype=float)
+        return cls(coords[:, 0], coords[:, 1], np.array(sources), np.array(targets),
+                   np.array(lengths), np.array(speeds))
+
+    @classmethod
+    def from_edge_list(cls, path: str) -> "RoadGraph":
+        """CSV with from_lat, from_lon, to_lat, to_lon and optional speed_kmh, oneway, length_km columns"""
+        def edges():
+            with open(path, encoding="utf-8", newline="") as f:
+                for row in csv.DictReader(f):
+                    length = row.get("length_km")
+                    yield (float(row["from_lat"]), float(row["from_lon"]), float(row["to_lat"]), float(row["to_lon"]),
+                           float(row.get("speed_kmh") or cls.DEFAULT_SPEED_KMH),
+                           str(row.get("oneway", "")).strip().lower() in ("1", "true", "yes"),
+                           float(length) if length else None)
+        return cls.from_edges(edges())
+
+    @classmethod
+    def from_osm(cls, path: str) -> "RoadGraph":
+        """OSM XML extract (.osm): every way tagged highway=* in DEFAULT_SPEEDS_KMH becomes road edges"""
+        nodes: Dict[str, Tuple[float, float]] = {}
+        ways: List[Tuple[List[str], float, bool]] = []
+        for _, element in ET.iterparse(path, events=("end",)):
+            if element.tag == "node":
+                nodes[element.get("id")] = (float(element.get("lat")), float(element.get("lon")))
+            elif element.tag == "way":
+                tags = {tag.get("k"): tag.get("v") for tag in element.iter("tag")}
+                highway = tags.get("highway")
+                if highway in cls.DEFAULT_SPEEDS_KMH:
+                    speed = cls.DEFAULT_SPEEDS_KMH[highway]
+                    maxspeed = tags.get("maxspeed", "").split(" ")[0]
+                    if maxspeed.isdigit():
+                        speed = float(maxspeed)
+                    refs = [nd.get("ref") for nd in element.iter("nd")]
+                    if tags.get("oneway") == "-1":
+                        refs.reverse()
+                    oneway = tags.get("oneway") in ("yes", "true", "1", "-1") or highway in ("motorway", "motorway_link")
+                    ways.append((refs, speed, oneway))
+            if element.tag in ("node", "way", "relation"):
+                element.clear()
+
+        def edges():
+            for refs, speed, oneway in ways:
+                points = [nodes[ref] for ref in refs if ref in nodes]
+                for (from_lat, from_lon), (to_lat, to_lon) in zip(points, points[1:]):
+                    yield from_lat, from_lon, to_lat, to_lon, speed, oneway, None
+        return cls.from_edges(edges())
+
+    @classmethod
+    def load(cls, path: str) -> "RoadGraph":
+        """Process-wide graph for a file (.osm is read as OSM XML, anything else as an edge-list CSV)"""
+        path = os.path.abspath(path)
+        with cls._registry_lock:
+            graph = cls._registry.get(path)
+            if graph is None:
+                graph = cls.from_osm(path) if path.lower().endswith(".osm") else cls.from_edge_list(path)
+                # Landmarks are built here rather than on the first quote
+                graph.landmarks("time")
+                graph.landmarks("distance")
+                cls._registry[path] = graph
+            return graph
+
+    @classmethod
+    def synthetic_grid(cls, spacing_km: float = 0.1, margin_km: float = 3.0,
+                       arterial_every: int = 10) -> "RoadGraph":
+        """Street grid over the zone bounding box, for benchmarks and demos without a road extract.
+
+        Every arterial_every-th street is an arterial at 60 km/h, the rest residential at 30 km/h.
+        """
+        geo = BaghdadGeographicalIntelligence
+        lats = [z['lat'] for z in geo.ZONES.values()]
+        lons = [z['lon'] for z in geo.ZONES.values()]
+        lat_step = spacing_km / 111.0
+        lon_step = spacing_km / (111.0 * math.cos(math.radians(geo.BAGHDAD_CENTER[0])))
+        lat_margin, lon_margin = margin_km / spacing_km * lat_step, margin_km / spacing_km * lon_step
+        grid_lats = np.arange(min(lats) - lat_margin, max(lats) + lat_margin, lat_step)
+        grid_lons = np.arange(min(lons) - lon_margin, max(lons) + lon_margin, lon_step)
+        rows, cols = len(grid_lats), len(grid_lons)
+        node = np.arange(rows * cols).reshape(rows, cols)
+
+        # Horizontal then vertical street segments, both directions
+        u = np.concatenate([node[:, :-1].ravel(), node[:-1, :].ravel()])
+        v = np.concatenate([node[:, 1:].ravel(), node[1:, :].ravel()])
+        arterial = np.concatenate([
+            np.repeat(np.arange(rows) % arterial_every == 0, cols - 1),
+            np.tile(np.arange(cols) % arterial_every == 0, rows - 1),
+        ])
+        node_lat = np.repeat(grid_lats, cols)
+        node_lon = np.tile(grid_lons, rows)
+        length = geo.haversine_vectorized(node_lat[u], node_lon[u], node_lat[v], node_lon[v])
+        speed = np.where(arterial, 60.0, 30.0)
+        return cls(node_lat, node_lon, np.concatenate([u, v]), np.concatenate([v, u]),
+                   np.concatenate([length, length]), np.concatenate([speed, speed]))
+
+    # Edge costs
+
+    def _proximity_factors(self, points: List[Tuple[float, float, float]], radius_km: float) -> np.ndarray:
+        """Per-arc product of the factors of every point within radius_km of the arc midpoint"""
+        factors = np.ones(self.arc_count)
+        # Chunked so the candidate (point, arc) pairs of thousands of incidents stay bounded in memory
+        for start in range(0, len(points), self.PROXIMITY_CHUNK):
+            lats, lons, point_factors = (np.array(column, dtype=float)
+                                         for column in zip(*points[start:start + self.PROXIMITY_CHUNK]))
+            point, arc, _ = self._arc_index.pairs_within(lats, lons, radius_km)
+            np.multiply.at(factors, arc, np.maximum(point_factors, 1.0)[point])
+        return factors
+
+    def _hotspot_factors(self, levels: Dict[str, str], hotspots: Dict[str, Dict] = None) -> np.ndarray:
+        hotspots = hotspots if hotspots is not None else self._hotspots
+        return self._proximity_factors(
+            [(hotspots[name]['lat'], hotspots[name]['lon'], self.CONGESTION_FACTORS.get(level, 1.0))
+             for name, level in levels.items() if name in hotspots],
+            self.HOTSPOT_RADIUS_KM
+        )
+
+    def set_hotspot_levels(self, levels: Dict[str, str]):
+        """Re-weight the arcs around each hotspot for its current congestion level (hotspot name -> level).
+        Cached costs and routes are dropped when a level changes or the hotspot catalog is reloaded;
+        the same levels again cost nothing."""
+        hotspots = BaghdadGeographicalIntelligence.TRAFFIC_HOTSPOTS
+        if levels == self._hotspot_levels and hotspots is self._hotspots:
+            return
+        factors = self._hotspot_factors(levels, hotspots)
+        with self._lock:
+            self._hotspots = hotspots
+            self._hotspot_levels = dict(levels)
+            self.hotspot_factors = factors
+            self._base_minutes = self.arc_minutes * factors
+            self._hotspot_generation += 1
+            self._costs = None
+            self._routes.clear()
+
+    def travel_minutes(self, incidents: List[Dict] = None, version=None) -> List[float]:
+        """Per-arc travel time with hotspot and incident slowdowns, cached per incident data version
+        (version None means no incidents, or an uncached one-off set when incidents are given).
+
+        A new version only recomputes the arcs near the incidents added or removed since the last
+        one; the list of the previous version is copied, never changed, so searches still using it
+        are unaffected. Factors are never below 1, so free-flow landmark distances stay valid lower bounds.
+        """
+        return self._travel_minutes(incidents, version)[0]
+
+    def _travel_minutes(self, incidents: List[Dict], version) -> Tuple[List[float], int]:
+        """travel_minutes() and the hotspot generation the costs were built for"""
+        if incidents and version is None:
+            counts = np.zeros_like(self._severity_counts)
+            self._count_incidents(Counter(self._incident_points(incidents)), 1, counts)
+            with self._lock:
+                base, generation = self._base_minutes, self._hotspot_generation
+            return (base * self._severity_product(counts)).tolist(), generation
+        with self._lock:
+            if self._costs is not None and self._costs[0] == version:
+                return self._costs[1], self._hotspot_generation
+            incidents = Counter(self._incident_points(incidents or []))
+            arcs = np.union1d(self._count_incidents(incidents - self._counted, 1, self._severity_counts),
+                              self._count_incidents(self._counted - incidents, -1, self._severity_counts))
+            self._counted = incidents
+            self._incident_factor[arcs] = self._severity_product(self._severity_counts[:, arcs])
+            if self._costs is None or len(arcs) > self.arc_count // 8:
+                minutes = (self._base_minutes * self._incident_factor).tolist()
+            else:
+                minutes = list(self._costs[1])
+                for arc, value in zip(arcs.tolist(), (self._base_minutes[arcs] * self._incident_factor[arcs]).tolist()):
+                    minutes[arc] = value
+            self._costs = (version, minutes)
+            return minutes, self._hotspot_generation
+
+    def _incident_points(self, incidents: List[Dict]) -> List[Tuple[float, float, int]]:
+        """(lat, lon, severity row) of the incidents that slow traffic"""
+        rows = {severity: row for row, severity in enumerate(self.SEVERITY_FACTORS)}
+        return [(i['latitude'], i['longitude'], rows[i['severity']]) for i in incidents if i['severity'] in rows]
+
+    def _count_incidents(self, points: Counter, sign: int, counts: np.ndarray) -> np.ndarray:
+        """Add (sign 1) or remove (sign -1) incidents in (severity, arc) counts; returns the arcs touched"""
+        if not points:
+            return np.empty(0, dtype=np.int64)
+        lats, lons, rows = (np.array(column) for column in zip(*points))
+        weights = np.array(list(points.values())) * sign
+        touched = []
+        for start in range(0, len(lats), self.PROXIMITY_CHUNK):
+            chunk = slice(start, start + self.PROXIMITY_CHUNK)
+            point, arc, _ = self._arc_index.pairs_within(lats[chunk], lons[chunk], self.INCIDENT_RADIUS_KM)
+            np.add.at(counts, (rows[chunk][point], arc), weights[chunk][point])
+            touched.append(arc)
+        return np.unique(np.concatenate(touched))
+
+    def _severity_product(self, counts: np.ndarray) -> np.ndarray:
+        """Incident factor of arcs from their (severity, arc) counts (the same whatever order they came in)"""
+        return np.prod(self._severity_factors[:, None] ** counts, axis=0)
+
+    # Search
+
+    def nearest_node(self, lat: float, lon: float) -> int:
+        """Graph node closest to a coordinate (memoized: routes mostly start at zone centroids)"""
+        key = (lat, lon)
+        node = self._snapped.get(key)
+        if node is None:
+            x, y = self._project(lat, lon)
+            node = int(np.argmin((self.node_x - x) ** 2 + (self.node_y - y) ** 2))
+            if len(self._snapped) >= self.SNAP_CACHE_SIZE:
+                self._snapped.clear()
+            self._snapped[key] = node
+        return node
+
+    @staticmethod
+    def _project(lat, lon):
+        """Equirectangular km around BAGHDAD_CENTER (only used to pick the nearest node)"""
+        center_lat, center_lon = BaghdadGeographicalIntelligence.BAGHDAD_CENTER
+        return ((np.asarray(lon) - center_lon) * 111.32 * math.cos(math.radians(center_lat)),
+                (np.asarray(lat) - center_lat) * 111.32)
+
+    def _reverse_graph(self) -> Tuple[List[int], List[int], List[int]]:
+        """(offsets, sources, arc ids) of the arcs entering each node"""
+        if self._reverse is None:
+            order = np.argsort(self.arc_target, kind="stable")
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(self.arc_target, minlength=self.node_count))])
+            self._reverse = (offsets.tolist(), self.arc_source[order].tolist(), order.tolist())
+        return self._reverse
+
+    @staticmethod
+    def _dijkstra(offsets: List[int], neighbors: List[int], arc_ids: Optional[List[int]],
+                  costs: List[float], source: int) -> np.ndarray:
+        """One-to-all distances (inf where unreachable)"""
+        dist = [math.inf] * (len(offsets) - 1)
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for a in range(offsets[u], offsets[u + 1]):
+                v = neighbors[a]
+                nd = d + costs[a if arc_ids is None else arc_ids[a]]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+        return np.array(dist)
+
+    def landmarks(self, metric: str = "time") -> Dict:
+        """Farthest-point landmarks with free-flow minutes ("time") or km ("distance") to and from
+        every node (built once per metric, under their own lock so costs and routes stay available)"""
+        landmarks = self._landmarks.get(metric)
+        if landmarks is not None:
+            return landmarks
+        with self._landmarks_lock:
+            if metric not in self._landmarks:
+                costs = self._metric_costs(metric)
+                reverse_offsets, reverse_sources, reverse_arcs = self._reverse_graph()
+                center = self.nearest_node(*BaghdadGeographicalIntelligence.BAGHDAD_CENTER)
+                from_center = self._dijkstra(self._offsets, self._targets, None, costs, center)
+                closest = np.where(np.isfinite(from_center), from_center, -1.0)
+                nodes, forward, backward = [], [], []
+                for _ in range(min(self.LANDMARKS, self.node_count)):
+                    landmark = int(np.argmax(closest))
+                    nodes.append(landmark)
+                    forward.append(self._dijkstra(self._offsets, self._targets, None, costs, landmark))
+                    backward.append(self._dijkstra(reverse_offsets, reverse_sources, reverse_arcs, costs, landmark))
+                    closest = np.minimum(closest, np.where(np.isfinite(forward[-1]), forward[-1], -1.0))
+                # Unreachable pairs get a finite sentinel so bound differences never produce NaN
+                forward = np.where(np.isfinite(forward), forward, self.UNREACHABLE)
+                backward = np.where(np.isfinite(backward), backward, self.UNREACHABLE)
+                self._landmarks[metric] = {"nodes": nodes, "from": forward, "to": backward,
+                                           "from_lists": forward.tolist(), "to_lists": backward.tolist()}
+            return self._landmarks[metric]
+
+    def _metric_costs(self, metric: str) -> List[float]:
+        """Free-flow arc costs the landmarks are computed on"""
+        if metric == "time":
+            return self.arc_minutes.tolist()
+        if metric == "distance":
+            return self._lengths
+        raise ValueError(f"unknown metric {metric!r}")
+
+    def _landmark_bound(self, metric: str, source: int, target: int):
+        """ALT lower bound on the cost from a node to target, by the triangle inequality.
+
+        Only the ACTIVE_LANDMARKS landmarks with the tightest bound at the source are used:
+        evaluating every landmark at every reached node costs more than it prunes.
+        """
+        landmarks = self.landmarks(metric)
+        from_l, to_l = landmarks["from_lists"], landmarks["to_lists"]
+        tightness = [max(f[target] - f[source], t[source] - t[target]) for f, t in zip(from_l, to_l)]
+        active = sorted(range(len(from_l)), key=tightness.__getitem__)[-self.ACTIVE_LANDMARKS:]
+        terms = [(from_l[i][target], from_l[i], to_l[i], to_l[i][target]) for i in active]
+
+        def bound(v: int) -> float:
+            best = 0.0
+            for from_t, from_l, to_l, to_t in terms:
+                forward = from_t - from_l[v]
+                if forward > best:
+                    best = forward
+                backward = to_l[v] - to_t
+                if backward > best:
+                    best = backward
+            return best
+        return bound
+
+    def _astar(self, source: int, target: int, costs: List[float], bound) -> Optional[List[int]]:
+        """Arc ids of the cheapest source -> target path (None if unreachable).
+
+        Bounds are consistent (free-flow costs never exceed the adjusted ones), so every node is
+        expanded at most once; they are computed only for the nodes the search reaches.
+        """
+        offsets, targets, unreachable = self._offsets, self._targets, self.UNREACHABLE
+        n = len(offsets) - 1
+        dist = [math.inf] * n
+        parent = [-1] * n
+        bounds = [-1.0] * n
+        dist[source] = 0.0
+        bounds[source] = bound(source)
+        heap = [(bounds[source], bounds[source], 0.0, source)]
+        pop, push = heapq.heappop, heapq.heappush
+        while heap:
+            _, _, du, u = pop(heap)
+            if u == target:
+                arcs = []
+                while u != source:
+                    arc = parent[u]
+                    arcs.append(arc)
+                    u = self._arc_sources[arc]
+                return arcs[::-1]
+            if du > dist[u]:
+                continue
+            for a in range(offsets[u], offsets[u + 1]):
+                v = targets[a]
+                nd = du + costs[a]
+                if nd < dist[v]:
+                    h = bounds[v]
+                    if h < 0.0:
+                        h = bounds[v] = bound(v)
+                    if h >= unreachable:
+                        continue
+                    dist[v] = nd
+                    parent[v] = a
+                    # Ties on f go to the node closer to the target (grids have many equal-cost paths)
+                    push(heap, (nd + h, h, nd, v))
+        return None
+
+    def route(self, origin: Tuple[float, float], destination: Tuple[float, float], metric: str = "time",
+              incidents: List[Dict] = None, version=None) -> Dict:
+        """Shortest path between two coordinates by travel time ("time") or road length ("distance").
+
+        Returns distance_km and time_minutes along the path (time includes incident/hotspot
+        slowdowns for both metrics) and the path as [lat, lon] points; None if unreachable or if
+        either end is more than MAX_SNAP_KM from the network.
+        Results are cached per incident data version and hotspot generation (treat them as
+        read-only); road-length paths do not depend on incidents or congestion, so they are searched
+        once and only re-timed.
+        """
+        minutes, generation = self._travel_minutes(incidents, version)
+        source, target = self.nearest_node(*origin), self.nearest_node(*destination)
+        geo = BaghdadGeographicalIntelligence
+        if max(geo.haversine_distance(*origin, self._lats[source], self._lons[source]),
+               geo.haversine_distance(*destination, self._lats[target], self._lons[target])) > self.MAX_SNAP_KM:
+            return None
+        # A search started before a hotspot change is stored under the old generation, never hit again
+        key = (source, target, metric, version if incidents else None, generation)
+        cacheable = not incidents or version is not None
+        with self._lock:
+            if cacheable and key in self._routes:
+                return self._routes[key]
+            length_path = self._length_paths.get((source, target), False) if metric == "distance" else False
+
+        if length_path is not False:
+            arcs = length_path
+        else:
+            costs = minutes if metric == "time" else self._metric_costs(metric)
+            arcs = self._astar(source, target, costs, self._landmark_bound(metric, source, target))
+            if metric == "distance":
+                with self._lock:
+                    if len(self._length_paths) >= self.ROUTE_CACHE_SIZE:
+                        self._length_paths.clear()
+                    self._length_paths[(source, target)] = arcs
+        route = None
+        if arcs is not None:
+            nodes = [source] + [self._targets[a] for a in arcs]
+            route = {
+                "distance_km": sum(self._lengths[a] for a in arcs),
+                "time_minutes": sum(minutes[a] for a in arcs),
+                "path": [[self._lats[n], self._lons[n]] for n in nodes],
+            }
+        if cacheable:
+            with self._lock:
+                if len(self._routes) >= self.ROUTE_CACHE_SIZE:
+                    self._routes.clear()
+                self._routes[key] = route
+        return route
@@ -0,0 +1,363 @@
+"""
+===============================================================================
+BITS - Smart Routing System
+===============================================================================
+Dual pricing (Fastest/Economic), scalar and vectorized; distances and ETAs
+come from a road graph when one is configured, else from straight-line estimates,
+and the economic surcharge scales with the incidents near the route corridor
+===============================================================================
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .automation import AutomationEngine
+from .congestion import CongestionTracker, get_congestion_tracker
+from .database import IncidentSnapshot, TrafficDatabase
+from .geo import BaghdadGeographicalIntelligence
+from .metrics import timed
+from .roads import RoadGraph
+from .surge import SurgeEngine, get_surge_engine
+
+
+class SmartRoutingSystem:
+    """Smart Routing with dual pricing (Fastest/Economic)"""
+    
+    # Economic surcharge at full incident impact (one critical incident on the route, or equivalent)
+    INCIDENT_SURCHARGE = 0.3
+    
+    _registry: Dict[Tuple[str, Optional[str]], "SmartRoutingSystem"] = {}
+    _registry_lock = threading.Lock()
+    
+    def __init__(self, db: TrafficDatabase, record_history: bool = True, road_graph: RoadGraph = None,
+                 surge: SurgeEngine = None, congestion: CongestionTracker = None):
+        self.db = db
+        self.geo = BaghdadGeographicalIntelligence
+        self.record_history = record_history
+        self.road_graph = road_graph
+        # Live per-zone demand/supply multipliers applied at the origin (none: no surge)
+        self.surge = surge
+        # Live hotspot congestion levels for the road graph's travel times (none: catalog levels)
+        self.congestion = congestion
+        self._congestion_version = None
+        self._live_tables = None
+        self._live_tables_lock = threading.Lock()
+    
+    @classmethod
+    def for_database(cls, db: TrafficDatabase, road_graph_path: str = None) -> "SmartRoutingSystem":
+        """Shared engine for a database and road network (one per process), so the per-zone-pair
+        incident tables are built once per incident version rather than once per session; prices
+        include the process-wide surge engine and routes the process-wide congestion levels"""
+        key = (db.key, os.path.abspath(road_graph_path) if road_graph_path else None)
+        with cls._registry_lock:
+            routing = cls._registry.get(key)
+            if routing is None or routing.db is not db:
+                road_graph = RoadGraph.load(road_graph_path) if road_graph_path else None
+                routing = cls._registry[key] = cls(db, road_graph=road_graph, surge=get_surge_engine(),
+                                                    congestion=get_congestion_tracker())
+            return routing
+    
+    def _zone_point(self, zone: str) -> Tuple[float, float]:
+        """Zone centroid (BAGHDAD_CENTER for unknown zones)"""
+        cache = self.geo.get_zone_cache()
+        i = self.geo.get_zone_index(zone)
+        return float(cache['lats'][i]), float(cache['lons'][i])
+    
+    def _road_routes(self, origin: Tuple[float, float], destination: Tuple[float, float],
+                     snapshot: IncidentSnapshot = None) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """Fastest (incident- and congestion-adjusted travel time) and economic (shortest road length) paths"""
+        # Levels are only pushed to the graph when the tracker has published new ones
+        if self.congestion is not None and self.congestion.version != self._congestion_version:
+            self._congestion_version = self.congestion.version
+            self.road_graph.set_hotspot_levels(self.congestion.hotspot_levels())
+        if snapshot is None:
+            snapshot = self.db.incident_cache.snapshot()
+        version = (id(self.db.incident_cache), snapshot.version)
+        return (self.road_graph.route(origin, destination, "time", snapshot.incidents, version),
+                self.road_graph.route(origin, destination, "distance", snapshot.incidents, version))
+    
+    def _incident_impact(self, origin: Tuple[float, float], destination: Tuple[float, float],
+                         economic_route: Optional[Dict], snapshot: IncidentSnapshot = None) -> Tuple[float, Dict]:
+        """(economic multiplier factor, impact) from incidents along the economic path, or the straight line"""
+        corridor = economic_route['path'] if economic_route is not None else [origin, destination]
+        if snapshot is None:
+            snapshot = self.db.incident_cache.snapshot()
+        impact = snapshot.impact_index.corridor_impact(corridor)
+        return 1 + self.INCIDENT_SURCHARGE * min(impact['score'], 1.0), impact
+    
+    @timed("pricing.calculate_route_pricing")
+    def calculate_route_pricing(self, origin: str, destination: str, 
+                                 weather_multiplier: float, time_multiplier: float,
+                                 is_peak: bool, weather: str = None, time_period: str = None) -> Dict:
+        """Calculate dual pricing for both route options (recorded to pricing_history in the background).
+        
+        With a road graph each option carries its path, and distance_km is the shortest road distance.
+        Incidents within IncidentImpactIndex.CORRIDOR_KM of the economic route raise its multiplier
+        by up to INCIDENT_SURCHARGE, weighted by severity and distance. With a surge engine both
+        options are scaled by the origin zone's surge multiplier.
+        """
+        origin_data = self.geo.ZONES.get(origin, {})
+        dest_data = self.geo.ZONES.get(destination, {})
+        
+        distance = self.geo.get_zone_distance(origin, destination)
+        
+        base_price = (origin_data.get('base_price', 3000) + dest_data.get('base_price', 3000)) / 2
+        
+        # Road paths when a graph is configured; straight-line estimates otherwise (or if unreachable)
+        origin_point, dest_point = self._zone_point(origin), self._zone_point(destination)
+        snapshot = self.db.incident_cache.snapshot()
+        fastest_route = economic_route = None
+        if self.road_graph is not None:
+            fastest_route, economic_route = self._road_routes(origin_point, dest_point, snapshot)
+        incident_factor, impact = self._incident_impact(origin_point, dest_point, economic_route, snapshot)
+        surge = self.surge.multiplier(origin) if self.surge is not None else 1.0
+        
+        # Option A: Fastest Route
+        fastest_base = base_price * 1.5
+        fastest_multiplier = weather_multiplier * time_multiplier
+        if is_peak:
+            fastest_multiplier *= 1.2
+        fastest_multiplier *= surge
+        fastest_price = int(fastest_base * fastest_multiplier)
+        if fastest_route is not None:
+            fastest_distance = fastest_route['distance_km']
+            fastest_time = int(fastest_route['time_minutes'])
+        else:
+            fastest_distance = distance * 0.85
+            fastest_time = int((fastest_distance / 40) * 60)
+        
+        # Option B: Economic Route
+        economic_base = base_price * 1.0
+        economic_multiplier = weather_multiplier * time_multiplier
+        economic_multiplier *= incident_factor
+        economic_multiplier *= surge
+        economic_price = int(economic_base * economic_multiplier)
+        if economic_route is not None:
+            economic_distance = economic_route['distance_km']
+            economic_time = int(economic_route['time_minutes'])
+            distance = economic_distance
+        else:
+            economic_distance = distance * 1.2
+            economic_time = int((economic_distance / 25) * 60)
+        
+        if self.record_history:
+            if time_period is None:
+                time_period = AutomationEngine.get_time_period()
+            self.db.record_pricing([
+                (origin, destination, base_price, fastest_price, "fastest",
+                 round(fastest_distance, 1), round(fastest_multiplier, 2), weather, time_period),
+                (origin, destination, base_price, economic_price, "economic",
+                 round(economic_distance, 1), round(economic_multiplier, 2), weather, time_period),
+            ])
+        
+        result = {
+            "fastest": {"name": "أسرع مسار", "price": fastest_price, "time_minutes": fastest_time,
+                       "distance_km": round(fastest_distance, 1), "multiplier": round(fastest_multiplier, 2),
+                       "description": "🏎️ مسار مباشر - تجنب الزحام"},
+            "economic": {"name": "المسار الأقتصادي", "price": economic_price, "time_minutes": economic_time,
+                        "distance_km": round(economic_distance, 1), "multiplier": round(economic_multiplier, 2),
+                        "description": "💰 مسار اقتصادي - توفير في التكلفة"},
+            "distance_km": round(distance, 1),
+            "incident_impact": round(impact['score'], 2),
+            "incident_count": impact['count'],
+            "surge_multiplier": round(surge, 2)
+        }
+        if fastest_route is not None:
+            result["fastest"]["path"] = fastest_route['path']
+        if economic_route is not None:
+            result["economic"]["path"] = economic_route['path']
+        return result
+    
+    @timed("pricing.calculate_route_pricing_batch")
+    def calculate_route_pricing_batch(self, origins: List[str], destinations: List[str],
+                                      weather_multiplier: float, time_multiplier: float,
+                                      is_peak: bool) -> pd.DataFrame:
+        """Vectorized dual pricing for many origin/destination pairs (same results as calculate_route_pricing)"""
+        board = self._price_pairs(origins, destinations, [weather_multiplier], [time_multiplier], [is_peak])
+        return board.drop(columns=['weather_multiplier', 'time_multiplier', 'is_peak'])
+    
+    def calculate_fare_board(self, weather_conditions: List[str] = None) -> pd.DataFrame:
+        """Price every zone pair under every weather/peak combination in one pass"""
+        if weather_conditions is None:
+            weather_conditions = list(AutomationEngine.WEATHER_CONDITIONS.keys())
+        
+        zone_names = list(self.geo.ZONES.keys())
+        origins = np.repeat(zone_names, len(zone_names))
+        destinations = np.tile(zone_names, len(zone_names))
+        
+        scenarios = [(weather, peak) for weather in weather_conditions for peak in (False, True)]
+        board = self._price_pairs(
+            origins, destinations,
+            [AutomationEngine.get_weather_multiplier(weather) for weather, _ in scenarios],
+            [AutomationEngine.PEAK_MULTIPLIER if peak else 1.0 for _, peak in scenarios],
+            [peak for _, peak in scenarios]
+        )
+        board.insert(0, 'weather', np.repeat([weather for weather, _ in scenarios], len(origins)))
+        return board
+    
+    _route_tables_cache = None
+    
+    @classmethod
+    def _route_tables(cls) -> Dict:
+        """Per-zone-pair distance/ETA tables derived from the geo distance matrix (rebuilt with it)"""
+        zone_cache = BaghdadGeographicalIntelligence.get_zone_cache()
+        tables = cls._route_tables_cache
+        if tables is None or tables['key'] != zone_cache['key']:
+            distance = zone_cache['distance_matrix']
+            round_1 = np.vectorize(lambda x: round(x, 1), otypes=[float])
+            tables = {
+                'key': zone_cache['key'],
+                'names': zone_cache['names'],
+                'base_prices': np.append(zone_cache['catalog'].column('base_price'), 3000).astype(float),
+                'distance': distance,
+                'distance_km': round_1(distance),
+                'fastest_distance_km': round_1(distance * 0.85),
+                'economic_distance_km': round_1(distance * 1.2),
+                'fastest_time': np.trunc((distance * 0.85 / 40) * 60).astype(np.int64),
+                'economic_time': np.trunc((distance * 1.2 / 25) * 60).astype(np.int64),
+            }
+            cls._route_tables_cache = tables
+        return tables
+    
+    # Cells a road graph overrides: straight-line estimates stay where the graph cannot connect a pair
+    ROAD_TABLES = ('distance', 'distance_km', 'fastest_distance_km', 'economic_distance_km',
+                   'fastest_time', 'economic_time')
+    
+    def _tables(self) -> Dict:
+        """Route tables for _price_pairs with the incident-dependent cells (road paths when a graph is
+        configured, and the incident impact of each economic corridor) filled in by _fill for the
+        pairs asked for; replaced when incidents, or with a graph the hotspot congestion levels, change"""
+        tables = self._route_tables()
+        congestion = self.congestion.version if self.congestion is not None and self.road_graph is not None else None
+        snapshot = self.db.incident_cache.snapshot()
+        key = (tables['key'], id(self.db.incident_cache), snapshot.version, congestion)
+        live = self._live_tables
+        if live is not None and live['key'] == key:
+            return live
+        # One rebuild per version even when many sessions ask at once
+        with self._live_tables_lock:
+            if self._live_tables is not None and self._live_tables['key'] == key:
+                return self._live_tables
+            zone_cache = self.geo.get_zone_cache()
+            lats, lons = zone_cache['lats'], zone_cache['lons']
+            size = len(lats)
+            live = {**tables, 'key': key, 'snapshot': snapshot, 'lats': lats, 'lons': lons,
+                    'scored': np.zeros((size, size), dtype=bool),
+                    'incident_factor': np.ones((size, size)), 'incident_impact': np.zeros((size, size))}
+            if self.road_graph is not None:
+                live.update({name: tables[name].copy() for name in self.ROAD_TABLES})
+            self._live_tables = live
+            return live
+    
+    def _fill(self, tables: Dict, origin_idx: np.ndarray, dest_idx: np.ndarray):
+        """Fill the cells of the zone pairs not yet filled for this incident version (cells, once
+        written, never change): road routes from the graph's route cache, or the straight corridors
+        scored all in one pass over the incident index.
+        
+        Routes missing from the cache are searched here, on the request path. The first batch after
+        an incident or congestion change therefore costs about as much as quoting its new pairs one
+        at a time (see RoadGraph for the per-search latency)."""
+        if tables['scored'][origin_idx, dest_idx].all():
+            return
+        with self._live_tables_lock:
+            scored = tables['scored']
+            pairs = np.unique(origin_idx * len(scored) + dest_idx)
+            pairs = pairs[~scored.ravel()[pairs]]
+            if len(pairs) == 0:
+                return
+            origin, destination = pairs // len(scored), pairs % len(scored)
+            lats, lons, snapshot = tables['lats'], tables['lons'], tables['snapshot']
+            if self.road_graph is None:
+                scores, _ = snapshot.impact_index.straight_impacts(
+                    lats[origin], lons[origin], lats[destination], lons[destination])
+            else:
+                scores = np.empty(len(pairs))
+                for k, (i, j) in enumerate(zip(origin.tolist(), destination.tolist())):
+                    origin_point, dest_point = (float(lats[i]), float(lons[i])), (float(lats[j]), float(lons[j]))
+                    fastest, economic = self._road_routes(origin_point, dest_point, snapshot)
+                    if fastest is not None:
+                        tables['fastest_distance_km'][i, j] = round(fastest['distance_km'], 1)
+                        tables['fastest_time'][i, j] = int(fastest['time_minutes'])
+                    if economic is not None:
+                        tables['distance'][i, j] = economic['distance_km']
+                        tables['distance_km'][i, j] = tables['economic_distance_km'][i, j] = round(
+                            economic['distance_km'], 1)
+                        tables['economic_time'][i, j] = int(economic['time_minutes'])
+                    scores[k] = self._incident_impact(origin_point, dest_point, economic, snapshot)[1]['score']
+            tables['incident_factor'][origin, destination] = 1 + self.INCIDENT_SURCHARGE * np.minimum(scores, 1.0)
+            tables['incident_impact'][origin, destination] = [round(score, 2) for score in scores.tolist()]
+            scored[origin, destination] = True
+    
+    def _price_pairs(self, origins, destinations, weather_multipliers: List[float],
+                     time_multipliers: List[float], peak_flags: List[bool]) -> pd.DataFrame:
+        """Price pairs x scenarios as (scenario, pair) arrays from the per-zone-pair tables"""
+        origins = np.asarray(origins, dtype=str)
+        destinations = np.asarray(destinations, dtype=str)
+        if origins.shape != destinations.shape:
+            raise ValueError("origins and destinations must have the same length")
+        
+        # Unknown zones map to the BAGHDAD_CENTER row, as in calculate_route_pricing
+        tables = self._tables()
+        zone_names = tables['names']
+        base_prices = tables['base_prices']
+        
+        zone_index = pd.Index(zone_names)
+        default_idx = len(zone_names)
+        origin_idx = zone_index.get_indexer(origins)
+        origin_idx[origin_idx < 0] = default_idx
+        dest_idx = zone_index.get_indexer(destinations)
+        dest_idx[dest_idx < 0] = default_idx
+        base_price = (base_prices[origin_idx] + base_prices[dest_idx]) / 2
+        self._fill(tables, origin_idx, dest_idx)
+        
+        incident_factor = tables['incident_factor'][origin_idx, dest_idx]
+        zone_surge = self.surge.multipliers(zone_names) if self.surge is not None else np.ones(len(zone_names) + 1)
+        surge = zone_surge[origin_idx]
+        
+        weather_multipliers = np.asarray(weather_multipliers, dtype=float)
+        time_multipliers = np.asarray(time_multipliers, dtype=float)
+        peak_flags = np.asarray(peak_flags, dtype=bool)
+        n_pairs, n_scenarios = len(origins), len(weather_multipliers)
+        
+        # Option A: Fastest Route
+        fastest_base = base_price * 1.5
+        fastest_multiplier = weather_multipliers * time_multipliers
+        fastest_multiplier = np.where(peak_flags, fastest_multiplier * 1.2, fastest_multiplier)
+        fastest_multiplier = fastest_multiplier[:, None] * surge[None, :]
+        fastest_price = np.trunc(fastest_base[None, :] * fastest_multiplier).astype(np.int64)
+        fastest_time = tables['fastest_time'][origin_idx, dest_idx]
+        
+        # Option B: Economic Route
+        economic_base = base_price * 1.0
+        economic_multiplier = (weather_multipliers * time_multipliers)[:, None] * incident_factor[None, :]
+        economic_multiplier = economic_multiplier * surge[None, :]
+        economic_price = np.trunc(economic_base[None, :] * economic_multiplier).astype(np.int64)
+        economic_time = tables['economic_time'][origin_idx, dest_idx]
+        
+        # Python round() on the few distinct values keeps the scalar rounding semantics
+        round_2 = np.vectorize(lambda x: round(x, 2), otypes=[float])
+        fastest_values, fastest_inverse = np.unique(fastest_multiplier, return_inverse=True)
+        economic_values, economic_inverse = np.unique(economic_multiplier, return_inverse=True)
+        
+        return pd.DataFrame({
+            'weather_multiplier': np.repeat(weather_multipliers, n_pairs),
+            'time_multiplier': np.repeat(time_multipliers, n_pairs),
+            'is_peak': np.repeat(peak_flags, n_pairs),
+            'origin': np.tile(origins, n_scenarios),
+            'destination': np.tile(destinations, n_scenarios),
+            'distance_km': np.tile(tables['distance_km'][origin_idx, dest_idx], n_scenarios),
+            'fastest_price': fastest_price.ravel(),
+            'fastest_time_minutes': np.tile(fastest_time, n_scenarios),
+            'fastest_distance_km': np.tile(tables['fastest_distance_km'][origin_idx, dest_idx], n_scenarios),
+            'fastest_multiplier': round_2(fastest_values)[fastest_inverse.ravel()],
+            'economic_price': economic_price.ravel(),
+            'economic_time_minutes': np.tile(economic_time, n_scenarios),
+            'economic_distance_km': np.tile(tables['economic_distance_km'][origin_idx, dest_idx], n_scenarios),
+            'economic_multiplier': round_2(economic_values)[economic_inverse.ravel()],
+            'incident_impact': np.tile(tables['incident_impact'][origin_idx, dest_idx], n_scenarios),
+            'surge_multiplier': np.tile(round_2(zone_surge)[origin_idx], n_scenarios),
+        })
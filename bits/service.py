@@ -0,0 +1,194 @@
+"""
+===============================================================================
+BITS - Headless HTTP/JSON Service
+===============================================================================
+asyncio HTTP/1.1 server in front of BitsAPI; blocking DB work runs in a thread pool
+Run:  python -m bits.service --host 127.0.0.1 --port 8600
+===============================================================================
+"""
+
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .api import BitsAPI
+from .metrics import Metrics, get_metrics
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class BitsService:
+    """Async HTTP front end: one coroutine per connection, keep-alive, JSON in and out"""
+
+    MAX_BODY_BYTES = 1_000_000
+
+    def __init__(self, api: BitsAPI = None, workers: int = 8):
+        self.api = api if api is not None else BitsAPI()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bits-db")
+        self.requests_served = 0
+
+    async def _blocking(self, fn, *args, **kwargs):
+        """Run a call that may touch SQLite on the thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, object]:
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        payload: Dict = json.loads(body) if body else {}
+        api = self.api
+
+        if path == "/health" and method == "GET":
+            return 200, api.health()
+        if path == "/dispatch" and method == "POST":
+            return 200, await self._blocking(api.dispatch, payload["drivers"], payload["orders"])
+        if path == "/surge" and method == "GET":
+            return 200, api.get_surge()
+        if path == "/surge/events" and method == "POST":
+            return 200, {"recorded": api.record_surge_events(payload["events"])}
+        if path == "/congestion" and method == "GET":
+            return 200, api.get_congestion()
+        if path == "/pings" and method == "POST":
+            return 200, {"counted": await self._blocking(api.ingest_pings, payload["pings"])}
+        if path == "/environment" and method == "GET":
+            return 200, api.get_environment()
+        if path == "/quote" and method == "POST":
+            return 200, await self._blocking(api.quote, **payload)
+        if path == "/incidents":
+            if method == "GET":
+                getter = api.get_critical_incidents if params.get("critical") in ("1", "true") else api.get_active_incidents
+                return 200, await self._blocking(getter)
+            if method == "POST":
+                return 200, {"ok": await self._blocking(api.add_incident, **payload)}
+            return 405, {"error": f"{method} not allowed"}
+        if path == "/incidents/counts" and method == "GET":
+            return 200, await self._blocking(api.get_incident_count_by_zone)
+        if path == "/incidents/version" and method == "GET":
+            return 200, {"version": await self._blocking(api.get_incident_version)}
+        if path.startswith("/incidents/") and method == "DELETE":
+            return 200, {"ok": await self._blocking(api.remove_incident, int(path.rsplit("/", 1)[1]))}
+        if path == "/predictions" and method == "GET":
+            if "zone" in params:
+                return 200, await self._blocking(api.predict, params["zone"], params.get("hour"))
+            return 200, await self._blocking(api.get_predictions)
+        if path == "/reverse-geocode" and method == "GET":
+            return 200, api.reverse_geocode(params["lat"], params["lon"])
+        if path == "/stats" and method == "GET":
+            return 200, await self._blocking(api.get_stats)
+        if path == "/metrics" and method == "GET":
+            # Prometheus text (span histograms are empty unless BITS_METRICS is set)
+            return 200, get_metrics().to_prometheus()
+        return 404, {"error": f"no route for {method} {path}"}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                if len(parts) != 3:
+                    await self._respond(writer, 400, {"error": "malformed request line"}, keep_alive=False)
+                    break
+                method, target, version = parts
+                length = int(headers.get("content-length") or 0)
+                if length > self.MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "request body too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                try:
+                    status, result = await self.dispatch(method.upper(), target, body)
+                except (KeyError, ValueError, TypeError) as e:
+                    status, result = 400, {"error": f"{type(e).__name__}: {e}"}
+                except Exception as e:
+                    print(f"Error handling {method} {target}: {e}")
+                    status, result = 500, {"error": "internal error"}
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" or (version == "HTTP/1.1" and connection != "close")
+                await self._respond(writer, status, result, keep_alive)
+                self.requests_served += 1
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, result, keep_alive: bool):
+        """JSON, except plain-text results (the /metrics exposition)"""
+        if isinstance(result, str):
+            data, content_type = result.encode("utf-8"), Metrics.PROMETHEUS_CONTENT_TYPE
+        else:
+            data, content_type = json.dumps(result, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8"
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + data)
+        await writer.drain()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8600) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.api.db.get_pricing_writer().close()
+        self.api.db.close()
+
+
+async def serve(host: str, port: int, db_path: str, workers: int, road_graph_path: str = None,
+                pings: str = None, ping_workers: int = 0):
+    service = BitsService(BitsAPI(db_path=db_path, road_graph_path=road_graph_path), workers=workers)
+    if pings:
+        service.api.congestion.start_feed(pings, ping_workers)
+    server = await service.start(host, port)
+    print(f"BITS service listening on http://{host}:{server.sockets[0].getsockname()[1]}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BITS headless pricing and incident service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--db", default="bits_traffic.db", help="SQLite database path")
+    parser.add_argument("--workers", type=int, default=8, help="thread pool size for database calls")
+    parser.add_argument("--road-graph", default=None,
+                        help="road network (.osm XML or edge-list CSV); defaults to $BITS_ROAD_GRAPH")
+    parser.add_argument("--pings", default=None,
+                        help="vehicle ping CSV to follow for live congestion: a path, - (stdin) or tcp://host:port "
+                             "(or set BITS_PINGS)")
+    parser.add_argument("--ping-workers", type=int, default=0, help="process pool size for parsing pings")
+    parser.add_argument("--metrics", action="store_true", help="record timing spans for GET /metrics (or set BITS_METRICS)")
+    args = parser.parse_args()
+    if args.metrics:
+        get_metrics().enabled = True
+    try:
+        asyncio.run(serve(args.host, args.port, args.db, args.workers, args.road_graph,
+                          args.pings, args.ping_workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
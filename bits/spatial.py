@@ -0,0 +1,388 @@
+"""
+===============================================================================
+BITS - Spatial Indexes
+===============================================================================
+Uniform grid index for radius and route-corridor queries over many points,
+the severity/distance-weighted incident impact built on it, and an STR-tree
+polygon index for bulk point-in-polygon lookup
+===============================================================================
+"""
+
+import json
+import math
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .geo import BaghdadGeographicalIntelligence
+
+# Cell coordinates are offset so keys stay non-negative; a key fits in _KEY_BITS bits
+_CELL_OFFSET = 1 << 20
+_KEY_BITS = 42
+
+
+def project(lats, lons) -> Tuple[np.ndarray, np.ndarray]:
+    """Equirectangular km around BAGHDAD_CENTER (error well under 1% at city scale)"""
+    center_lat, center_lon = BaghdadGeographicalIntelligence.BAGHDAD_CENTER
+    return ((np.asarray(lons, dtype=float) - center_lon) * 111.32 * math.cos(math.radians(center_lat)),
+            (np.asarray(lats, dtype=float) - center_lat) * 111.32)
+
+
+class GridIndex:
+    """Points bucketed into square cells, sorted by cell for range lookups.
+
+    Queries enumerate the cells that can hold a match and only measure distances to the
+    points in them, so their cost follows the number of nearby points, not the total.
+    """
+
+    def __init__(self, lats, lons, cell_km: float = 1.0):
+        self.cell_km = cell_km
+        x, y = project(lats, lons)
+        keys = self._keys(np.floor(x / cell_km).astype(np.int64), np.floor(y / cell_km).astype(np.int64))
+        self.order = np.argsort(keys, kind="stable")
+        self.x, self.y = x[self.order], y[self.order]
+        self.cell_keys, self.cell_starts, self.cell_counts = np.unique(
+            keys[self.order], return_index=True, return_counts=True)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    @staticmethod
+    def _keys(cx: np.ndarray, cy: np.ndarray) -> np.ndarray:
+        return (cx + _CELL_OFFSET) * (2 * _CELL_OFFSET) + (cy + _CELL_OFFSET)
+
+    def _reach(self, radius_km: float) -> int:
+        """Cells to search on each side of a cell so nothing within radius_km (+ half a cell) is missed"""
+        return int(math.floor((radius_km + self.cell_km / 2) / self.cell_km)) + 1
+
+    def _expand(self, groups: np.ndarray, cx: np.ndarray, cy: np.ndarray,
+                reach: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(group, sorted point position) for every point in the cells around (cx, cy), one pair per group"""
+        offsets = np.arange(-reach, reach + 1)
+        dx, dy = np.repeat(offsets, len(offsets)), np.tile(offsets, len(offsets))
+        keys = self._keys((cx[:, None] + dx).ravel(), (cy[:, None] + dy).ravel())
+        # One lookup per distinct (group, cell); keys fit in 42 bits, groups in the bits above
+        pairs = np.sort((np.repeat(groups, len(dx)) << _KEY_BITS) | keys)
+        pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]
+        groups, keys = pairs >> _KEY_BITS, pairs & ((1 << _KEY_BITS) - 1)
+        at = np.searchsorted(self.cell_keys, keys)
+        at[at == len(self.cell_keys)] = 0
+        found = self.cell_keys[at] == keys
+        groups, at = groups[found], at[found]
+        counts = self.cell_counts[at]
+        total = int(counts.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        starts = np.repeat(self.cell_starts[at] - np.cumsum(counts) + counts, counts)
+        return np.repeat(groups, counts), starts + np.arange(total)
+
+    def pairs_within(self, lats, lons, radius_km: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(query index, point index, distance km) for every query/point pair closer than radius_km"""
+        qx, qy = project(np.atleast_1d(lats), np.atleast_1d(lons))
+        if len(self) == 0 or len(qx) == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0)
+        query, position = self._expand(np.arange(len(qx)), np.floor(qx / self.cell_km).astype(np.int64),
+                                       np.floor(qy / self.cell_km).astype(np.int64), self._reach(radius_km))
+        distance = np.hypot(self.x[position] - qx[query], self.y[position] - qy[query])
+        near = distance <= radius_km
+        return query[near], self.order[position[near]], distance[near]
+
+    def corridor(self, path: Sequence[Sequence[float]], radius_km: float,
+                 tolerance_km: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        """(point index, distance km to the polyline) for every point within radius_km of the path.
+
+        With tolerance_km > 0 the path is simplified first (Douglas-Peucker), so distances may
+        be off by up to that much; straight runs of road vertices collapse to one segment.
+        """
+        if len(self) == 0 or len(path) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        path = np.asarray(path, dtype=float).reshape(-1, 2)
+        px, py = project(path[:, 0], path[:, 1])
+        if len(px) == 1:
+            px, py = np.repeat(px, 2), np.repeat(py, 2)
+        elif tolerance_km > 0 and len(px) > 2:
+            keep = simplify(px, py, tolerance_km)
+            px, py = px[keep], py[keep]
+        _, point, distance = self.segments_within(px[:-1], py[:-1], px[1:], py[1:],
+                                                  np.zeros(len(px) - 1, dtype=np.int64), radius_km)
+        return point, distance
+
+    def segments_within(self, ax: np.ndarray, ay: np.ndarray, bx: np.ndarray, by: np.ndarray,
+                        groups: np.ndarray, radius_km: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(group, point index, distance km) for every point within radius_km of a segment of the group,
+        at its distance to the nearest one; segments (ax, ay) -> (bx, by) are in projected km.
+
+        Results are ordered by group, then by grid position, so a group of one polyline's segments
+        gives exactly what corridor() gives for it.
+        """
+        empty = np.empty(0, dtype=np.int64)
+        if len(self) == 0 or len(ax) == 0:
+            return empty, empty, np.empty(0)
+
+        # Sample every segment at least once per cell; candidates are the points around the samples
+        samples = np.ceil(np.hypot(bx - ax, by - ay) / self.cell_km).astype(np.int64) + 1
+        segment = np.repeat(np.arange(len(ax)), samples)
+        t = (np.arange(len(segment)) - np.repeat(np.cumsum(samples) - samples, samples)) / np.repeat(
+            np.maximum(samples - 1, 1), samples)
+        sx = ax[segment] + t * (bx - ax)[segment]
+        sy = ay[segment] + t * (by - ay)[segment]
+        segment, position = self._expand(segment, np.floor(sx / self.cell_km).astype(np.int64),
+                                         np.floor(sy / self.cell_km).astype(np.int64), self._reach(radius_km))
+
+        # Point-to-segment distance for each (segment, candidate), then the minimum per (group, candidate)
+        x, y = self.x[position], self.y[position]
+        vx, vy = (bx - ax)[segment], (by - ay)[segment]
+        length_sq = vx * vx + vy * vy
+        u = np.clip(((x - ax[segment]) * vx + (y - ay[segment]) * vy) / np.where(length_sq > 0, length_sq, 1), 0, 1)
+        distance = np.hypot(x - (ax[segment] + u * vx), y - (ay[segment] + u * vy))
+        near = distance <= radius_km
+        key = np.asarray(groups, dtype=np.int64)[segment[near]] * len(self) + position[near]
+        distance = distance[near]
+        if len(key) == 0:
+            return empty, empty, np.empty(0)
+        order = np.argsort(key, kind="stable")
+        key, distance = key[order], distance[order]
+        first = np.flatnonzero(np.concatenate(([True], key[1:] != key[:-1])))
+        key = key[first]
+        return key // len(self), self.order[key % len(self)], np.minimum.reduceat(distance, first)
+
+
+def simplify(x: np.ndarray, y: np.ndarray, tolerance: float) -> np.ndarray:
+    """Indices of the Douglas-Peucker simplification of the polyline (x, y), endpoints included"""
+    keep = np.zeros(len(x), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(x) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        dx, dy = x[last] - x[first], y[last] - y[first]
+        length = math.hypot(dx, dy)
+        inner_x, inner_y = x[first + 1:last] - x[first], y[first + 1:last] - y[first]
+        if length > 0:
+            offset = np.abs(inner_x * dy - inner_y * dx) / length
+        else:
+            offset = np.hypot(inner_x, inner_y)
+        worst = int(np.argmax(offset))
+        if offset[worst] > tolerance:
+            split = first + 1 + worst
+            keep[split] = True
+            stack.extend(((first, split), (split, last)))
+    return np.flatnonzero(keep)
+
+
+class IncidentImpactIndex:
+    """Active incidents on a grid, scored by severity and distance to a route corridor"""
+
+    SEVERITY_WEIGHTS = {'low': 0.25, 'medium': 0.5, 'high': 0.75, 'critical': 1.0}
+    CORRIDOR_KM = 1.0
+    # Half the corridor radius: the cells searched hug the corridor without too many lookups
+    CELL_KM = 0.5
+    # Route paths are simplified to within this distance before scoring
+    SIMPLIFY_KM = 0.01
+
+    def __init__(self, incidents: List[Dict], cell_km: float = CELL_KM):
+        n = len(incidents)
+        self.grid = GridIndex(np.fromiter((i['latitude'] for i in incidents), float, n),
+                              np.fromiter((i['longitude'] for i in incidents), float, n), cell_km)
+        self.weights = np.fromiter((self.SEVERITY_WEIGHTS.get(i['severity'], 0.5) for i in incidents), float, n)
+
+    def corridor_impact(self, path: Sequence[Sequence[float]], radius_km: float = CORRIDOR_KM) -> Dict:
+        """Sum of severity weight x (1 - distance / radius) over incidents near the path, and their count"""
+        position, distance = self.grid.corridor(path, radius_km, self.SIMPLIFY_KM)
+        score = self._scores(np.zeros(len(position), dtype=np.int64), position, distance, 1, radius_km)[0]
+        return {"score": float(score), "count": int(len(position))}
+
+    def straight_impacts(self, origin_lats, origin_lons, dest_lats, dest_lons,
+                         radius_km: float = CORRIDOR_KM) -> Tuple[np.ndarray, np.ndarray]:
+        """(score, count) arrays for many straight origin -> destination corridors in one pass
+        (each the same as corridor_impact([origin, destination]))"""
+        ax, ay = project(origin_lats, origin_lons)
+        bx, by = project(dest_lats, dest_lons)
+        n = len(ax)
+        group, position, distance = self.grid.segments_within(ax, ay, bx, by, np.arange(n), radius_km)
+        return self._scores(group, position, distance, n, radius_km), np.bincount(group, minlength=n)
+
+    def _scores(self, group: np.ndarray, position: np.ndarray, distance: np.ndarray, n: int,
+                radius_km: float) -> np.ndarray:
+        """Impact score per group; bincount adds in order, so a corridor scores the same alone or in a batch"""
+        return np.bincount(group, self.weights[position] * (1 - distance / radius_km), minlength=n)
+
+
+
+def _ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Concatenation of range(start, start + count) for each pair"""
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + offsets
+
+
+class PolygonIndex:
+    """Named polygons (holes and multiple parts allowed) for bulk point-in-polygon lookup.
+
+    Part bounding boxes are packed into a Sort-Tile-Recursive R-tree. locate() walks it one level
+    at a time for all points together, then tests each (point, candidate part) pair by ray
+    crossing against only the edges in the part's horizontal band at the point, so the cost
+    follows the edges near a point rather than the size of the polygon. Coordinates are (lon, lat)
+    as in GeoJSON.
+    """
+
+    NODE_CAPACITY = 16
+    # Each part's edges are bucketed into horizontal bands holding about this many edges
+    BAND_EDGES = 2
+    # Points per locate() pass, bounding the candidate arrays
+    CHUNK_POINTS = 250_000
+
+    def __init__(self, names: List[str], polygons: List[List[List[Sequence[Sequence[float]]]]]):
+        """polygons[i] lists the parts of names[i]; a part is its rings (exterior first, then holes)
+        of [lon, lat] positions, as in GeoJSON MultiPolygon coordinates"""
+        self.names = list(names)
+        part_polygon, edges = [], []
+        for polygon, parts in enumerate(polygons):
+            for rings in parts:
+                part_edges = [self._ring_edges(ring) for ring in rings if len(ring) >= 3]
+                part_edges = [e for e in part_edges if len(e)]
+                if part_edges:
+                    part_polygon.append(polygon)
+                    edges.append(np.concatenate(part_edges))
+        self.part_polygon = np.array(part_polygon, dtype=np.int64)
+        self.levels: List[Dict] = []
+        if edges:
+            self.part_bounds = np.array([[e[:, [0, 2]].min(), e[:, [1, 3]].min(),
+                                          e[:, [0, 2]].max(), e[:, [1, 3]].max()] for e in edges])
+            self._build_bands(edges)
+            self._build_tree()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_geojson(cls, path: str, name_property: str = "name") -> "PolygonIndex":
+        """Polygon and MultiPolygon features of a GeoJSON FeatureCollection, named by a feature property"""
+        with open(path, encoding="utf-8") as f:
+            collection = json.load(f)
+        names, polygons = [], []
+        for feature in collection.get("features", []):
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") == "Polygon":
+                parts = [geometry["coordinates"]]
+            elif geometry.get("type") == "MultiPolygon":
+                parts = geometry["coordinates"]
+            else:
+                continue
+            name = (feature.get("properties") or {}).get(name_property)
+            if name is None:
+                raise ValueError(f"polygon feature without a {name_property!r} property in {path}")
+            names.append(str(name))
+            polygons.append(parts)
+        return cls(names, polygons)
+
+    @staticmethod
+    def _ring_edges(ring) -> np.ndarray:
+        """(x0, y0, x1, y1) rows of a ring's edges, minus horizontal ones (they never cross a ray)"""
+        ring = np.asarray(ring, dtype=float)[:, :2]
+        if not np.array_equal(ring[0], ring[-1]):
+            ring = np.vstack([ring, ring[:1]])
+        edges = np.hstack([ring[:-1], ring[1:]])
+        return edges[edges[:, 1] != edges[:, 3]]
+
+    def _build_bands(self, edges: List[np.ndarray]):
+        """Edges grouped by (part, band), each listed in every band its y-range touches"""
+        counts = np.array([len(e) for e in edges])
+        self.band_count = np.ceil(counts / self.BAND_EDGES).astype(np.int64)
+        self.band_offset = np.cumsum(self.band_count) - self.band_count
+        self.band_height = np.maximum((self.part_bounds[:, 3] - self.part_bounds[:, 1]) / self.band_count, 1e-12)
+        edges = np.concatenate(edges)
+        part = np.repeat(np.arange(len(counts)), counts)
+        last, y0, height = self.band_count[part] - 1, self.part_bounds[part, 1], self.band_height[part]
+        low = np.clip(np.floor((np.minimum(edges[:, 1], edges[:, 3]) - y0) / height), 0, last).astype(np.int64)
+        high = np.clip(np.floor((np.maximum(edges[:, 1], edges[:, 3]) - y0) / height), 0, last).astype(np.int64)
+        spans = high - low + 1
+        edge = np.repeat(np.arange(len(edges)), spans)
+        band = _ranges(self.band_offset[part] + low, spans)
+        order = np.argsort(band, kind="stable")
+        self.edges = edges[edge[order]]
+        self.band_starts = np.concatenate(
+            [[0], np.cumsum(np.bincount(band, minlength=int(self.band_count.sum())))])
+
+    @classmethod
+    def _str_order(cls, bounds: np.ndarray) -> np.ndarray:
+        """Sort-Tile-Recursive order: vertical slices by x centre, sorted by y centre within each, so
+        consecutive runs of NODE_CAPACITY entries are compact nodes"""
+        n, capacity = len(bounds), cls.NODE_CAPACITY
+        per_slice = math.ceil(math.sqrt(math.ceil(n / capacity))) * capacity
+        by_x = np.argsort(bounds[:, 0] + bounds[:, 2], kind="stable")
+        return by_x[np.lexsort(((bounds[by_x, 1] + bounds[by_x, 3]), np.arange(n) // per_slice))]
+
+    def _build_tree(self):
+        """Levels root first, each with node bounds and the start and count of each node's children in
+        the level below; the last level's children are positions in self.leaf_parts"""
+        self.leaf_parts = self._str_order(self.part_bounds)
+        entries = self.part_bounds[self.leaf_parts]
+        while True:
+            starts = np.arange(0, len(entries), self.NODE_CAPACITY)
+            level = {
+                'bounds': np.column_stack([np.minimum.reduceat(entries[:, 0], starts),
+                                           np.minimum.reduceat(entries[:, 1], starts),
+                                           np.maximum.reduceat(entries[:, 2], starts),
+                                           np.maximum.reduceat(entries[:, 3], starts)]),
+                'child_start': starts,
+                'child_count': np.diff(np.append(starts, len(entries))),
+            }
+            self.levels.insert(0, level)
+            if len(starts) <= self.NODE_CAPACITY:
+                break
+            # Nodes keep their children however they are reordered for the next level up
+            order = self._str_order(level['bounds'])
+            for key in level:
+                level[key] = level[key][order]
+            entries = level['bounds']
+
+    @staticmethod
+    def _covers(bounds: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        return (bounds[:, 0] <= x) & (x <= bounds[:, 2]) & (bounds[:, 1] <= y) & (y <= bounds[:, 3])
+
+    def locate(self, lats, lons) -> np.ndarray:
+        """Position in names of the polygon containing each point, -1 outside all of them (the first
+        listed polygon wins where they overlap)"""
+        x = np.asarray(lons, dtype=float).ravel()
+        y = np.asarray(lats, dtype=float).ravel()
+        result = np.full(len(x), -1, dtype=np.int64)
+        if self.levels:
+            for start in range(0, len(x), self.CHUNK_POINTS):
+                chunk = slice(start, start + self.CHUNK_POINTS)
+                result[chunk] = self._locate(x[chunk], y[chunk])
+        return result
+
+    def _locate(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        # (point, node) candidates, narrowed level by level down to (point, part)
+        roots = len(self.levels[0]['bounds'])
+        point, node = np.repeat(np.arange(len(x)), roots), np.tile(np.arange(roots), len(x))
+        keep = self._covers(self.levels[0]['bounds'][node], x[point], y[point])
+        point, node = point[keep], node[keep]
+        for depth, level in enumerate(self.levels):
+            counts = level['child_count'][node]
+            point, child = np.repeat(point, counts), _ranges(level['child_start'][node], counts)
+            if depth + 1 < len(self.levels):
+                bounds = self.levels[depth + 1]['bounds'][child]
+            else:
+                child = self.leaf_parts[child]
+                bounds = self.part_bounds[child]
+            keep = self._covers(bounds, x[point], y[point])
+            point, node = point[keep], child[keep]
+
+        # Ray crossings to +x against the part's edges in the point's band; odd means inside
+        part, px, py = node, x[point], y[point]
+        band = np.clip(np.floor((py - self.part_bounds[part, 1]) / self.band_height[part]),
+                       0, self.band_count[part] - 1).astype(np.int64) + self.band_offset[part]
+        counts = self.band_starts[band + 1] - self.band_starts[band]
+        pair = np.repeat(np.arange(len(point)), counts)
+        x0, y0, x1, y1 = self.edges[_ranges(self.band_starts[band], counts)].T
+        qx, qy = px[pair], py[pair]
+        crosses = ((y0 > qy) != (y1 > qy)) & (qx < x0 + (qy - y0) * (x1 - x0) / (y1 - y0))
+        inside = np.bincount(pair[crosses], minlength=len(point)) % 2 == 1
+
+        found = np.full(len(x), len(self.names), dtype=np.int64)
+        np.minimum.at(found, point[inside], self.part_polygon[part[inside]])
+        found[found == len(self.names)] = -1
+        return found
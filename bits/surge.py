@@ -0,0 +1,204 @@
+"""
+===============================================================================
+BITS - Surge Engine
+===============================================================================
+Per-zone demand (orders) and supply (available drivers) over a sliding window
+of per-minute ring buffers, turned into surge multipliers for pricing
+===============================================================================
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, List
+
+import numpy as np
+
+from .geo import BaghdadGeographicalIntelligence
+
+
+class SurgeEngine:
+    """Sliding-window order and driver counters per zone, with surge multipliers kept up to date.
+
+    Each zone has a ring buffer of WINDOW_MINUTES per-minute counts for each event kind plus running
+    window totals, so recording an event and reading a zone's multiplier are O(1). Expiring a minute
+    clears one ring column for all zones, once per minute rather than per event. Events are stamped
+    with the engine clock unless they carry their own time; events older than the window are dropped.
+    Events stamped ahead of the clock count in the current minute (clock skew between sources), so one
+    bad timestamp cannot advance the ring and clear every zone's window; events a whole window or more
+    ahead are dropped.
+    An engine built on the geo catalog (no zone_names given) follows it when it is reloaded.
+    """
+
+    KINDS = ("order", "driver")
+    WINDOW_MINUTES = 15
+    # Pseudo-counts of balanced demand and supply per zone, so a few events cannot swing the price
+    PRIOR_EVENTS = 5.0
+    # Multiplier = 1 + SENSITIVITY * (demand / supply - 1), clamped to [1, MAX_MULTIPLIER]
+    SENSITIVITY = 0.5
+    MAX_MULTIPLIER = 2.0
+
+    def __init__(self, zone_names: List[str] = None, window_minutes: int = None,
+                 clock: Callable[[], float] = None):
+        geo = BaghdadGeographicalIntelligence
+        self._catalog = geo.ZONES if zone_names is None else None
+        self.zone_names = zone_names if zone_names is not None else geo.get_zone_cache()['names']
+        self._zone_index = {name: i for i, name in enumerate(self.zone_names)}
+        self.window = window_minutes or self.WINDOW_MINUTES
+        self.clock = clock or time.time
+        # The extra last row stands for zones outside the catalog and never surges
+        rows = len(self.zone_names) + 1
+        self._counts = {kind: np.zeros((rows, self.window), dtype=np.int64) for kind in self.KINDS}
+        self._totals = {kind: np.zeros(rows, dtype=np.int64) for kind in self.KINDS}
+        self._multipliers = np.ones(rows)
+        self._minute = None
+        self._lock = threading.Lock()
+        self.events = 0
+        self.dropped = 0
+
+    def _multiplier(self, orders, drivers):
+        ratio = (orders + self.PRIOR_EVENTS) / (drivers + self.PRIOR_EVENTS)
+        return np.clip(1.0 + self.SENSITIVITY * (ratio - 1.0), 1.0, self.MAX_MULTIPLIER)
+
+    def _advance(self, minute: int):
+        """Make `minute` the newest ring column, clearing the columns that fall out of the window (lock held)"""
+        if self._minute is not None:
+            for expired in range(self._minute + 1, min(minute, self._minute + self.window) + 1):
+                column = expired % self.window
+                for kind in self.KINDS:
+                    self._totals[kind] -= self._counts[kind][:, column]
+                    self._counts[kind][:, column] = 0
+        self._minute = minute
+        self._multipliers = self._multiplier(self._totals['order'], self._totals['driver'])
+
+    def _sync_zones(self):
+        """Follow a reloaded geo zone catalog: zones that remain keep their windows, new ones start empty"""
+        if self._catalog is None or BaghdadGeographicalIntelligence.ZONES is self._catalog:
+            return
+        with self._lock:
+            cache = BaghdadGeographicalIntelligence.get_zone_cache()
+            if cache['catalog'] is self._catalog:
+                return
+            names = cache['names']
+            source = np.array([self._zone_index.get(name, -1) for name in names], dtype=np.int64)
+            kept = np.flatnonzero(source >= 0)
+            for kind in self.KINDS:
+                counts = np.zeros((len(names) + 1, self.window), dtype=np.int64)
+                counts[kept] = self._counts[kind][source[kept]]
+                self._counts[kind] = counts
+                self._totals[kind] = counts.sum(axis=1)
+            self._catalog, self.zone_names = cache['catalog'], names
+            self._zone_index = {name: i for i, name in enumerate(names)}
+            self._multipliers = self._multiplier(self._totals['order'], self._totals['driver'])
+
+    def _expire(self):
+        self._sync_zones()
+        minute = int(self.clock() // 60)
+        if self._minute is None or minute > self._minute:
+            with self._lock:
+                if self._minute is None or minute > self._minute:
+                    self._advance(minute)
+
+    def record(self, kind: str, zone: str, at: float = None, count: int = 1) -> bool:
+        """Count `count` events of `kind` ("order" or "driver") in a zone; `at` is epoch seconds.
+        Returns False for unknown kinds or zones and events outside the window."""
+        if kind not in self.KINDS:
+            return False
+        self._sync_zones()
+        now_minute = int(self.clock() // 60)
+        minute = now_minute if at is None else int(at // 60)
+        too_far = minute >= now_minute + self.window
+        minute = min(minute, now_minute)
+        with self._lock:
+            i = self._zone_index.get(zone)
+            if i is None or too_far or (self._minute is not None and minute <= self._minute - self.window):
+                self.dropped += count
+                return False
+            if self._minute is None or minute > self._minute:
+                self._advance(minute)
+            self._counts[kind][i, minute % self.window] += count
+            totals = self._totals[kind]
+            totals[i] += count
+            self._multipliers[i] = min(max(1.0 + self.SENSITIVITY * (
+                (self._totals['order'][i] + self.PRIOR_EVENTS) / (self._totals['driver'][i] + self.PRIOR_EVENTS)
+                - 1.0), 1.0), self.MAX_MULTIPLIER)
+            self.events += count
+        return True
+
+    def record_many(self, kind: str, zones: Iterable[str], at: Iterable[float] = None) -> int:
+        """Vectorized record() of one event per zone (optionally with per-event times); returns the count kept"""
+        if kind not in self.KINDS:
+            return 0
+        zones = list(zones)
+        self._sync_zones()
+        now_minute = int(self.clock() // 60)
+        if at is None:
+            minutes = np.full(len(zones), now_minute, dtype=np.int64)
+            too_far = None
+        else:
+            minutes = (np.asarray(list(at), dtype=float) // 60).astype(np.int64)
+            too_far = minutes >= now_minute + self.window
+            minutes = np.minimum(minutes, now_minute)
+        with self._lock:
+            zone_index = self._zone_index
+            index = np.fromiter((zone_index.get(zone, -1) for zone in zones), dtype=np.int64, count=len(zones))
+            if too_far is not None:
+                index[too_far] = -1
+            if len(zones) and (self._minute is None or minutes.max() > self._minute):
+                self._advance(int(minutes.max()))
+            keep = (index >= 0) & (minutes > self._minute - self.window) if self._minute is not None else index >= 0
+            index, minutes = index[keep], minutes[keep]
+            np.add.at(self._counts[kind], (index, minutes % self.window), 1)
+            self._totals[kind] += np.bincount(index, minlength=len(self._multipliers))
+            touched = np.unique(index)
+            self._multipliers[touched] = self._multiplier(self._totals['order'][touched],
+                                                          self._totals['driver'][touched])
+            self.events += len(index)
+            self.dropped += len(zones) - len(index)
+        return len(index)
+
+    def multiplier(self, zone: str) -> float:
+        """Current surge multiplier of a zone (1.0 for unknown zones)"""
+        self._expire()
+        i = self._zone_index.get(zone)
+        return 1.0 if i is None else float(self._multipliers[i])
+
+    def multipliers(self, zone_names: List[str] = None) -> np.ndarray:
+        """Multipliers aligned with zone_names plus a trailing 1.0 for unknown zones (engine order by default)"""
+        self._expire()
+        multipliers = self._multipliers
+        if zone_names is None or zone_names is self.zone_names or zone_names == self.zone_names:
+            return multipliers.copy()
+        rows = [self._zone_index.get(zone, len(self.zone_names)) for zone in zone_names]
+        return multipliers[rows + [len(self.zone_names)]]
+
+    def snapshot(self) -> Dict:
+        """Window totals, current-minute counts and multipliers per zone, plus city-wide totals"""
+        self._expire()
+        with self._lock:
+            column = self._minute % self.window
+            zones = {
+                zone: {"orders": int(self._totals['order'][i]), "drivers": int(self._totals['driver'][i]),
+                       "new_orders": int(self._counts['order'][i, column]),
+                       "new_drivers": int(self._counts['driver'][i, column]),
+                       "multiplier": round(float(self._multipliers[i]), 2)}
+                for i, zone in enumerate(self.zone_names)
+            }
+        return {
+            "window_minutes": self.window, "zones": zones,
+            "orders": sum(z['orders'] for z in zones.values()), "drivers": sum(z['drivers'] for z in zones.values()),
+            "new_orders": sum(z['new_orders'] for z in zones.values()),
+            "new_drivers": sum(z['new_drivers'] for z in zones.values()),
+        }
+
+
+_surge_engine = None
+_surge_engine_lock = threading.Lock()
+
+
+def get_surge_engine() -> SurgeEngine:
+    """Process-wide engine fed by BitsAPI.record_surge_events and read by the shared routing engine"""
+    global _surge_engine
+    with _surge_engine_lock:
+        if _surge_engine is None:
+            _surge_engine = SurgeEngine()
+        return _surge_engine